@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 from os import getenv, path
 from loguru import logger
 from datetime import timedelta, date
+from celery.schedules import crontab
 import cloudinary
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -27,6 +28,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.sites",
     "django.contrib.humanize",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -97,6 +99,18 @@ DATABASES = {
     }
 }
 
+REDIS_URL = getenv("REDIS_URL", "redis://redis:6379/0")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": REDIS_URL,
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+    }
+}
+
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.Argon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
@@ -145,6 +159,12 @@ SITE_ID = 1
 STATIC_URL = "static/"
 STATIC_ROOT = str(BASE_DIR / "staticfiles")
 
+MEDIA_URL = "mediafiles/"
+MEDIA_ROOT = str(BASE_DIR / "mediafiles")
+
+# Uploads above this size are spooled to a temporary file instead of memory.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -190,6 +210,10 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
 }
 
+# Process-local cache of validated access tokens, read when the auth module loads
+JWT_CACHE_ENABLED = True
+JWT_CACHE_MAX_SIZE = 10_000
+
 DJOSER = {
     "USER_ID_FIELD": "id",
     "LOGIN_FIELD": "email",
@@ -236,6 +260,43 @@ CELERY_TASK_SOFT_TIME_LIMIT = 60
 
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 
+CONTENT_VIEW_FLUSH_INTERVAL = timedelta(seconds=30)
+
+BALANCE_SHARD_REBALANCE_INTERVAL = timedelta(minutes=1)
+
+EMAIL_RETRY_INTERVAL = timedelta(minutes=1)
+
+CELERY_BEAT_SCHEDULE = {
+    "retry-failed-emails": {
+        "task": "retry_failed_emails",
+        "schedule": EMAIL_RETRY_INTERVAL,
+    },
+    "flush-buffered-content-views": {
+        "task": "flush_buffered_content_views",
+        "schedule": CONTENT_VIEW_FLUSH_INTERVAL,
+    },
+    "reconcile-content-view-counts": {
+        "task": "reconcile_content_view_counts",
+        "schedule": timedelta(days=1),
+    },
+    "snapshot-account-balances": {
+        "task": "snapshot_account_balances",
+        "schedule": crontab(hour=0, minute=15),
+    },
+    "accrue-savings-interest": {
+        "task": "accrue_savings_interest",
+        "schedule": crontab(hour=0, minute=30),
+    },
+    "rebalance-balance-shards": {
+        "task": "rebalance_balance_shards",
+        "schedule": BALANCE_SHARD_REBALANCE_INTERVAL,
+    },
+    "purge-expired-idempotency-keys": {
+        "task": "purge_expired_idempotency_keys",
+        "schedule": timedelta(hours=1),
+    },
+}
+
 
 CLOUDINARY_CLOUD_NAME = getenv("CLOUDINARY_CLOUD_NAME")
 CLOUDINARY_API_KEY = getenv("CLOUDINARY_API_KEY")
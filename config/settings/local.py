@@ -1,3 +1,4 @@
+from decimal import Decimal
 from os import getenv, path
 from dotenv import load_dotenv
 from .base import *  # noqa
@@ -20,7 +21,20 @@ ALLOWED_HOSTS = ["localhost", "127.0.0.1", "0.0.0.0", "api"]
 
 ADMIN_URL = getenv("ADMIN_URL")
 
-EMAIL_BACKEND = "djcelery_email.backends.CeleryEmailBackend"
+EMAIL_BACKEND = "core_apps.common.mail.BatchedEmailBackend"
+
+BATCHED_EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+
+EMAIL_BATCH_SIZE = 100
+
+EMAIL_BATCH_WINDOW = 2
+
+EMAIL_MAX_SEND_ATTEMPTS = 3
+
+EMAIL_FLUSH_LOCK_TIMEOUT = 300
+
+# Keeps a single send well inside the flush lock, which is renewed per message
+EMAIL_TIMEOUT = 30
 
 EMAIL_HOST = getenv("EMAIL_HOST")
 
@@ -30,7 +44,7 @@ DEFAULT_FROM_EMAIL = getenv("DEFAULT_FROM_EMAIL")
 
 DOMAIN = getenv("DOMAIN")
 
-MAX_UPLOAD_SIZE = 1 * 1024 * 1024
+UPLOAD_STAGING_DIR = "uploads/staging"
 
 CSRF_TRUSTED_ORIGINS = ["http://localhost:8000", "http://localhost:8080"]
 
@@ -39,3 +53,35 @@ LOCKOUT_DURATION = timedelta(minutes=1)
 LOGIN_ATTEMPTS = 3
 
 OTP_EXPIRATION = timedelta(minutes=1)
+
+OTP_MAX_ATTEMPTS = 3
+
+OTP_STORE_BACKEND = "core_apps.user_auth.otp_store.RedisOTPStore"
+
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
+
+AUTH_USER_CACHE_VERSION = 2
+
+PROFILE_CACHE_TIMEOUT = 10 * 60
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+IDEMPOTENCY_IN_PROGRESS_TIMEOUT = timedelta(minutes=5)
+
+PROFILE_PHOTO_UPLOADER = "core_apps.user_profile.uploaders.CloudinaryUploader"
+
+PROFILE_IMAGE_FORMAT = "WEBP"
+
+PROFILE_IMAGE_MAX_DIMENSION = 1600
+
+PROFILE_IMAGE_QUALITY = 82
+
+PROFILE_THUMBNAIL_DIMENSION = 160
+
+PROFILE_THUMBNAIL_QUALITY = 70
+
+SAVINGS_INTEREST_RATE = Decimal("0.035")
+
+INTEREST_ACCRUAL_CHUNK_SIZE = 1000
+
+DEFAULT_BALANCE_SHARD_COUNT = 8
@@ -20,8 +20,8 @@ urlpatterns = [
         SpectacularRedocView.as_view(url_name="schema"),
         name="redoc",
     ),
-    path("api/v1/auth/", include("djoser.urls")),
     path("api/v1/auth/", include("core_apps.user_auth.urls")),
+    path("api/v1/auth/", include("djoser.urls")),
     path("api/v1/profiles/", include("core_apps.user_profile.urls")),
     path("api/v1/accounts/", include("core_apps.accounts.urls")),
 ]
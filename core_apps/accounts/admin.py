@@ -1,20 +1,61 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from django.utils.translation import gettext_lazy as _
-from .models import BankAccount
+from core_apps.common.search import TrigramSearchMixin
+from .posting import PostingError, adjust
+from .shards import live_balance
+from .models import (
+    BalanceShard,
+    BalanceSnapshot,
+    BankAccount,
+    DepositImport,
+    InterestAccrualChunk,
+    InterestAccrualRun,
+    LedgerEntry,
+)
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
+class BankAccountAdminForm(forms.ModelForm):
+    balance_adjustment = forms.DecimalField(
+        label=_("Balance adjustment"),
+        max_digits=20,
+        decimal_places=2,
+        required=False,
+        help_text=_(
+            "Posted to the ledger on save. A negative amount debits the account."
+        ),
+    )
+    adjustment_reason = forms.CharField(
+        label=_("Adjustment reason"), max_length=500, required=False
+    )
+
+    class Meta:
+        model = BankAccount
+        fields = "__all__"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("balance_adjustment") and not cleaned_data.get(
+            "adjustment_reason"
+        ):
+            self.add_error("adjustment_reason", _("Give a reason for the adjustment."))
+        return cleaned_data
+
+
 @admin.register(BankAccount)
-class BankAccountAdmin(admin.ModelAdmin):
+class BankAccountAdmin(TrigramSearchMixin, admin.ModelAdmin):
+    form = BankAccountAdminForm
     list_display = [
         "account_number",
         "user",
         "currency",
         "account_type",
-        "account_balance",
+        "get_balance",
         "account_status",
+        "is_sharded",
         "is_primary",
         "kyc_verified",
         "get_verified_by",
@@ -27,13 +68,19 @@ class BankAccountAdmin(admin.ModelAdmin):
         "kyc_submitted",
         "kyc_verified",
     ]
-    search_fields = [
+    search_fields = ["account_number"]
+    user_search_fields = ["first_name", "last_name", "email"]
+    search_help_text = _("Search by account number, customer name or email.")
+    # Balances only move through postings; corrections are adjustment entries
+    readonly_fields = [
         "account_number",
-        "user__email",
-        "user__first_name",
-        "user__last_name",
+        "account_balance",
+        "get_balance",
+        "is_sharded",
+        "shard_count",
+        "created_at",
+        "updated_at",
     ]
-    readonly_fields = ["account_number", "created_at", "updated_at"]
     fieldsets = (
         (
             None,
@@ -42,6 +89,9 @@ class BankAccountAdmin(admin.ModelAdmin):
                     "user",
                     "account_number",
                     "account_balance",
+                    "get_balance",
+                    "is_sharded",
+                    "shard_count",
                     "currency",
                     "account_type",
                     "is_primary",
@@ -69,6 +119,10 @@ class BankAccountAdmin(admin.ModelAdmin):
             },
         ),
     )
+    adjustment_fieldset = (
+        _("Balance Adjustment"),
+        {"fields": ("balance_adjustment", "adjustment_reason")},
+    )
 
     def get_verified_by(self, obj):
         return obj.verified_by.full_name if obj.verified_by else "-"
@@ -76,9 +130,49 @@ class BankAccountAdmin(admin.ModelAdmin):
     get_verified_by.short_description = "Verified By"
     get_verified_by.admin_order_field = "verified_by__first_name"
 
+    # account_balance of a sharded account lags behind its shards until the
+    # next rebalance, so the balance shown is the live one.
+    def get_balance(self, obj):
+        return getattr(obj, "live_balance", obj.account_balance)
+
+    get_balance.short_description = _("Balance")
+    get_balance.admin_order_field = "live_balance"
+
+    # New accounts open at zero; only existing ones can be adjusted
+    def get_fieldsets(self, request, obj=None):
+        fieldsets = super().get_fieldsets(request, obj)
+        if obj is None:
+            return fieldsets
+        return [fieldsets[0], self.adjustment_fieldset, *fieldsets[1:]]
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            super().save_model(request, obj, form, change)
+            return
+
+        # Never write back the balance read with the form over later postings
+        fields = [
+            field.name
+            for field in obj._meta.concrete_fields
+            if field.name in form.changed_data
+        ]
+        obj.save(update_fields=[*fields, "updated_at"])
+
+        amount = form.cleaned_data.get("balance_adjustment")
+        if amount:
+            try:
+                adjust(
+                    obj.pk,
+                    amount,
+                    initiated_by=request.user,
+                    description=form.cleaned_data["adjustment_reason"],
+                )
+            except PostingError as e:
+                messages.error(request, str(e))
+
     # Superuser has priviledge to see all accounts
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
+        qs = super().get_queryset(request).annotate(live_balance=live_balance())
         if request.user.is_superuser:
             return qs
 
@@ -94,3 +188,109 @@ class BankAccountAdmin(admin.ModelAdmin):
             kwargs["queryset"] = User.objects.filter(is_staff=True)
 
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ["transaction", "account", "entry_type", "amount", "created_at"]
+    list_filter = ["entry_type"]
+    list_select_related = ["transaction", "account"]
+    raw_id_fields = ["transaction", "account"]
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BalanceShard)
+class BalanceShardAdmin(admin.ModelAdmin):
+    list_display = ["account", "shard_index", "balance", "updated_at"]
+    list_select_related = ["account"]
+    raw_id_fields = ["account"]
+    readonly_fields = ["account", "shard_index", "balance", "created_at", "updated_at"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DepositImport)
+class DepositImportAdmin(admin.ModelAdmin):
+    list_display = [
+        "reference",
+        "imported_by",
+        "deposits_posted",
+        "total_amount",
+        "created_at",
+    ]
+    list_select_related = ["imported_by"]
+    search_fields = ["reference"]
+    readonly_fields = [
+        "reference",
+        "file_digest",
+        "imported_by",
+        "deposits_posted",
+        "total_amount",
+        "created_at",
+        "updated_at",
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(BalanceSnapshot)
+class BalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ["account", "as_of", "balance"]
+    date_hierarchy = "as_of"
+    raw_id_fields = ["account"]
+    readonly_fields = ["account", "as_of", "balance", "created_at", "updated_at"]
+
+    def has_add_permission(self, request):
+        return False
+
+
+class InterestAccrualChunkInline(admin.TabularInline):
+    model = InterestAccrualChunk
+    extra = 0
+    can_delete = False
+    readonly_fields = [
+        "after_account_id",
+        "last_account_id",
+        "status",
+        "accounts_credited",
+        "total_interest",
+        "updated_at",
+    ]
+
+
+@admin.register(InterestAccrualRun)
+class InterestAccrualRunAdmin(admin.ModelAdmin):
+    list_display = [
+        "accrual_date",
+        "annual_rate",
+        "status",
+        "accounts_credited",
+        "total_interest",
+    ]
+    list_filter = ["status"]
+    readonly_fields = [
+        "accrual_date",
+        "annual_rate",
+        "status",
+        "chunks_planned",
+        "accounts_credited",
+        "total_interest",
+    ]
+    inlines = [InterestAccrualChunkInline]
+
+    def has_add_permission(self, request):
+        return False
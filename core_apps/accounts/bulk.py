@@ -0,0 +1,316 @@
+"""Bulk deposit import for back-office files such as payroll runs.
+
+Rows are read and validated one at a time from CSV or NDJSON and the valid
+ones are written to a spooled CSV buffer, so memory stays flat however big
+the file is. The buffer is loaded with ``COPY`` into a temporary table and
+everything else happens in set-based SQL inside a single transaction:
+unknown or inactive accounts are reported and dropped, the affected
+accounts are locked in primary-key order (the same order the posting
+engine uses), one ``Transaction`` row and its two ledger entries are
+inserted per deposit and each balance is updated once with the sum of its
+deposits. For a sharded account that sum goes to its first shard, which
+the next rebalance spreads over the others.
+
+Every posted file is recorded as a ``DepositImport`` in the same
+transaction, under a reference that defaults to the file's SHA-256, so
+uploading the same file again is rejected instead of paying twice.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import tempfile
+from decimal import Decimal, InvalidOperation
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from django.db import DataError, IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import BalanceShard, BankAccount, DepositImport, LedgerEntry, Transaction
+
+FILE_FORMATS = ("csv", "ndjson")
+REQUIRED_COLUMNS = ("account_number", "amount")
+STAGING_TABLE = "bulk_deposit_staging"
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+MAX_AMOUNT = Decimal("1e18")
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+class DuplicateImportError(ValueError):
+    pass
+
+
+def get_file_digest(file: IO[bytes]) -> str:
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(DIGEST_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def iter_rows(file: IO[bytes], file_format: str) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(row_number, row)`` pairs; malformed NDJSON lines yield ``None``."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if file_format == "csv":
+        reader = csv.DictReader(text)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Missing CSV columns: {', '.join(missing)}")
+        for row_number, row in enumerate(reader, start=1):
+            yield row_number, row
+    else:
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield row_number, json.loads(line)
+            except ValueError:
+                yield row_number, None
+
+
+def validate_row(row: Any) -> Tuple[Optional[List[str]], List[str]]:
+    """Return ``(staging_values, errors)`` for one input row."""
+    if not isinstance(row, dict):
+        return None, ["Row is not a valid JSON object."]
+
+    errors = []
+    account_number = str(row.get("account_number") or "").strip()
+    if not account_number:
+        errors.append("account_number is required.")
+    elif len(account_number) > 20:
+        errors.append("account_number must be at most 20 characters.")
+
+    amount = None
+    try:
+        amount = Decimal(str(row.get("amount", "")).strip())
+    except InvalidOperation:
+        errors.append("amount must be a number.")
+    else:
+        if not amount.is_finite() or amount <= 0 or amount >= MAX_AMOUNT:
+            errors.append("amount must be a positive number.")
+        elif amount != amount.quantize(Decimal("0.01")):
+            errors.append("amount must have at most 2 decimal places.")
+
+    description = str(row.get("description") or "")
+    if len(description) > 500:
+        errors.append("description must be at most 500 characters.")
+
+    if errors:
+        return None, errors
+    return [account_number, str(amount), description], []
+
+
+def import_deposits(
+    file: IO[bytes],
+    file_format: str,
+    initiated_by: Optional[Any] = None,
+    all_or_nothing: bool = False,
+    reference: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Post every valid deposit in ``file`` and return a per-row report.
+
+    With ``all_or_nothing`` nothing is posted when any row is rejected.
+    Raises ``DuplicateImportError`` if ``reference`` (by default the file's
+    SHA-256) was already posted.
+    """
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}")
+    file_digest = get_file_digest(file)
+    reference = reference or file_digest
+
+    errors: List[Dict[str, Any]] = []
+    total_rows = 0
+    staged_rows = 0
+
+    with tempfile.SpooledTemporaryFile(
+        max_size=SPOOL_MAX_SIZE, mode="w+", newline="", encoding="utf-8"
+    ) as buffer:
+        writer = csv.writer(buffer)
+        for row_number, row in iter_rows(file, file_format):
+            total_rows += 1
+            values, row_errors = validate_row(row)
+            if row_errors:
+                errors.append({"row": row_number, "errors": row_errors})
+            else:
+                writer.writerow([row_number, *values])
+                staged_rows += 1
+
+        report = {
+            "reference": reference,
+            "rows": total_rows,
+            "posted": 0,
+            "total_amount": "0.00",
+        }
+        if staged_rows and not (all_or_nothing and errors):
+            buffer.seek(0)
+            try:
+                with transaction.atomic():
+                    batch = record_import(reference, file_digest, initiated_by)
+                    posted, total_amount = post_staged_deposits(
+                        buffer, initiated_by, errors, all_or_nothing
+                    )
+                    if posted:
+                        batch.deposits_posted = posted
+                        batch.total_amount = total_amount
+                        batch.save()
+                    else:
+                        batch.delete()
+            except DataError:
+                raise ValueError("The deposits would overflow an account balance.")
+            report.update(posted=posted, total_amount=str(total_amount))
+
+    errors.sort(key=lambda error: error["row"])
+    report["errors"] = errors
+    return report
+
+
+def record_import(
+    reference: str, file_digest: str, initiated_by: Optional[Any]
+) -> DepositImport:
+    # A concurrent upload of the same file waits here until the first one
+    # commits, then fails on the unique reference.
+    try:
+        with transaction.atomic():
+            return DepositImport.objects.create(
+                reference=reference,
+                file_digest=file_digest,
+                imported_by_id=getattr(initiated_by, "pk", None),
+            )
+    except IntegrityError:
+        raise DuplicateImportError(f"Import {reference} was already posted.")
+
+
+def post_staged_deposits(
+    buffer: IO[str],
+    initiated_by: Optional[Any],
+    errors: List[Dict[str, Any]],
+    all_or_nothing: bool,
+) -> Tuple[int, Decimal]:
+    account_table = BankAccount._meta.db_table
+    transaction_table = Transaction._meta.db_table
+    now = timezone.now()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            CREATE TEMPORARY TABLE {STAGING_TABLE} (
+                row_number integer NOT NULL,
+                account_number varchar(20) NOT NULL,
+                amount numeric(20, 2) NOT NULL,
+                description varchar(500) NOT NULL
+            ) ON COMMIT DROP
+            """
+        )
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} FROM STDIN WITH (FORMAT csv)", buffer
+        )
+        # Temporary tables are never auto-analyzed; without statistics the
+        # joins below are planned for a handful of rows.
+        cursor.execute(f"ANALYZE {STAGING_TABLE}")
+
+        cursor.execute(
+            f"""
+            SELECT a.id FROM {account_table} a
+            WHERE a.account_number IN (SELECT account_number FROM {STAGING_TABLE})
+            ORDER BY a.id
+            FOR NO KEY UPDATE
+            """
+        )
+
+        cursor.execute(
+            f"""
+            SELECT s.row_number, a.id IS NULL
+            FROM {STAGING_TABLE} s
+            LEFT JOIN {account_table} a ON a.account_number = s.account_number
+            WHERE a.id IS NULL OR a.account_status <> %s
+            """,
+            [BankAccount.AccountStatus.ACTIVE],
+        )
+        rejected = cursor.fetchall()
+        for row_number, missing in rejected:
+            message = "Bank account not found." if missing else "Account is inactive."
+            errors.append({"row": row_number, "errors": [message]})
+        if rejected:
+            if all_or_nothing:
+                return 0, Decimal("0.00")
+            cursor.execute(
+                f"DELETE FROM {STAGING_TABLE} WHERE row_number = ANY(%s)",
+                [[row_number for row_number, _ in rejected]],
+            )
+
+        # Each deposit is a debit on the bank's side (no account) and a
+        # credit to the customer account.
+        cursor.execute(
+            f"""
+            WITH posted AS (
+                INSERT INTO {transaction_table} (
+                    id, created_at, updated_at, user_id, amount, description,
+                    receiver_id, receiver_account_id, status, transaction_type
+                )
+                SELECT gen_random_uuid(), %s, %s, %s, s.amount, s.description,
+                    a.user_id, a.id, %s, %s
+                FROM {STAGING_TABLE} s
+                JOIN {account_table} a ON a.account_number = s.account_number
+                ORDER BY s.row_number
+                RETURNING id, receiver_account_id, amount
+            )
+            INSERT INTO {LedgerEntry._meta.db_table} (
+                id, created_at, updated_at, transaction_id, account_id,
+                entry_type, amount
+            )
+            SELECT gen_random_uuid(), %s, %s, p.id,
+                CASE WHEN e.entry_type = %s THEN p.receiver_account_id END,
+                e.entry_type, p.amount
+            FROM posted p
+            CROSS JOIN (VALUES (%s), (%s)) AS e (entry_type)
+            """,
+            [
+                now,
+                now,
+                getattr(initiated_by, "pk", None),
+                Transaction.TransactionStatus.COMPLETED,
+                Transaction.TransactionType.DEPOSIT,
+                now,
+                now,
+                LedgerEntry.EntryType.CREDIT,
+                LedgerEntry.EntryType.DEBIT,
+                LedgerEntry.EntryType.CREDIT,
+            ],
+        )
+        posted = cursor.rowcount // 2
+
+        cursor.execute(
+            f"""
+            UPDATE {account_table} a
+            SET account_balance = a.account_balance + t.total, updated_at = %s
+            FROM (
+                SELECT account_number, SUM(amount) AS total
+                FROM {STAGING_TABLE}
+                GROUP BY account_number
+            ) t
+            WHERE a.account_number = t.account_number AND NOT a.is_sharded
+            """,
+            [now],
+        )
+        # The sharded accounts are locked above too, so their shards cannot
+        # be dropped before this update.
+        cursor.execute(
+            f"""
+            UPDATE {BalanceShard._meta.db_table} b
+            SET balance = b.balance + t.total, updated_at = %s
+            FROM (
+                SELECT account_number, SUM(amount) AS total
+                FROM {STAGING_TABLE}
+                GROUP BY account_number
+            ) t
+            JOIN {account_table} a ON a.account_number = t.account_number
+            WHERE a.is_sharded AND b.account_id = a.id AND b.shard_index = 0
+            """,
+            [now],
+        )
+
+        cursor.execute(f"SELECT COALESCE(SUM(amount), 0) FROM {STAGING_TABLE}")
+        total_amount = cursor.fetchone()[0]
+
+    return posted, total_amount
@@ -0,0 +1,42 @@
+"""Closing customers instead of deleting them.
+
+Ledger entries protect the accounts and transactions they reference, so a
+customer whose accounts have any posted history cannot be deleted without
+rewriting the ledger. Such customers are closed instead: their login is
+deactivated and every bank account is set inactive, which the posting
+engine already refuses to debit or credit. Balances and history stay in
+place for statements and reconciliation. Customers without history are
+deleted as before.
+"""
+
+from typing import Any
+
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+
+from .models import BankAccount
+
+
+def close_user(user: Any) -> None:
+    with transaction.atomic():
+        BankAccount.objects.filter(user=user).update(
+            account_status=BankAccount.AccountStatus.INACTIVE,
+            updated_at=timezone.now(),
+        )
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+
+
+def delete_or_close_user(user: Any) -> bool:
+    """Delete ``user``, or close them if the ledger protects their accounts.
+
+    Returns whether the user was deleted.
+    """
+    try:
+        with transaction.atomic():
+            user.delete()
+    except ProtectedError:
+        close_user(user)
+        return False
+    return True
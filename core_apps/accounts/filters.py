@@ -0,0 +1,18 @@
+import django_filters
+
+from .models import Transaction
+
+
+class TransactionHistoryFilter(django_filters.FilterSet):
+    # Plain range lookups on created_at, so the filters stay usable by the
+    # (account, created_at, id) indexes; __date lookups would not be.
+    created_after = django_filters.DateTimeFilter(
+        field_name="created_at", lookup_expr="gte"
+    )
+    created_before = django_filters.DateTimeFilter(
+        field_name="created_at", lookup_expr="lt"
+    )
+
+    class Meta:
+        model = Transaction
+        fields = ["status", "transaction_type", "created_after", "created_before"]
@@ -0,0 +1,233 @@
+"""Daily interest accrual for savings accounts.
+
+A run covers one accrual date. Planning splits the active savings accounts
+into keyset ranges (``InterestAccrualChunk``); each chunk is posted in its
+own transaction that also marks the chunk completed, so a chunk is posted
+at most once however often its task is delivered, and an interrupted run
+resumes from its pending chunks. The run itself is unique per date.
+
+Within a chunk the accounts are locked in primary-key order (as in the
+posting engine) and interest is computed with Decimal and ROUND_HALF_EVEN
+on each account's ledger balance at the end of the accrual date, so a
+chunk that runs late or is retried days later still pays on that day's
+balance. The transactions and ledger entries are written with
+``bulk_create`` and all balances are moved by a single UPDATE ... FROM
+(VALUES ...). Sharded accounts are credited to one random shard.
+
+A chunk that keeps failing stays pending and its run stays running; the
+daily task resumes every earlier run that has not completed.
+"""
+
+import random
+from datetime import date
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Any, Dict, List, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, QuerySet, Sum
+from django.utils import timezone
+
+from .ledger import balances_as_of, iter_account_ranges
+from .models import (
+    BalanceShard,
+    BankAccount,
+    InterestAccrualChunk,
+    InterestAccrualRun,
+    LedgerEntry,
+    Transaction,
+)
+
+TWO_PLACES = Decimal("0.01")
+DAYS_IN_YEAR = 365
+
+
+def get_savings_accounts() -> QuerySet:
+    return BankAccount.objects.filter(
+        account_type=BankAccount.AccountType.SAVINGS,
+        account_status=BankAccount.AccountStatus.ACTIVE,
+    )
+
+
+def plan_run(accrual_date: date) -> InterestAccrualRun:
+    """Return the run for ``accrual_date``, creating it and its chunks once."""
+    with transaction.atomic():
+        run, _ = InterestAccrualRun.objects.select_for_update().get_or_create(
+            accrual_date=accrual_date,
+            defaults={"annual_rate": settings.SAVINGS_INTEREST_RATE},
+        )
+        if not run.chunks_planned:
+            InterestAccrualChunk.objects.bulk_create(
+                [
+                    InterestAccrualChunk(
+                        run=run, after_account_id=after_id, last_account_id=last_id
+                    )
+                    for after_id, last_id in iter_account_ranges(
+                        settings.INTEREST_ACCRUAL_CHUNK_SIZE, get_savings_accounts()
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+            run.chunks_planned = True
+            run.save(update_fields=["chunks_planned", "updated_at"])
+    return run
+
+
+def compute_accruals(
+    balances: List[Tuple[Any, Any, Decimal]], annual_rate: Decimal
+) -> List[Tuple[Any, Any, Decimal]]:
+    """Daily interest for ``(account_id, user_id, balance)`` rows.
+
+    Rows whose interest rounds to zero are dropped.
+    """
+    daily_rate = annual_rate / DAYS_IN_YEAR
+    accruals = [
+        (
+            account_id,
+            user_id,
+            (balance * daily_rate).quantize(TWO_PLACES, rounding=ROUND_HALF_EVEN),
+        )
+        for account_id, user_id, balance in balances
+    ]
+    return [accrual for accrual in accruals if accrual[2] > 0]
+
+
+def accrue_chunk(chunk_id: Any) -> int:
+    """Post one chunk's interest; a completed chunk is left untouched."""
+    with transaction.atomic():
+        chunk = (
+            InterestAccrualChunk.objects.select_for_update()
+            .select_related("run")
+            .get(pk=chunk_id)
+        )
+        if chunk.status == InterestAccrualChunk.ChunkStatus.COMPLETED:
+            return 0
+
+        accounts = get_savings_accounts().filter(pk__lte=chunk.last_account_id)
+        if chunk.after_account_id is not None:
+            accounts = accounts.filter(pk__gt=chunk.after_account_id)
+        rows = list(
+            accounts.select_for_update(no_key=True)
+            .order_by("pk")
+            .values_list("pk", "user_id", "is_sharded", "shard_count")
+        )
+        shard_counts = {
+            account_id: shard_count
+            for account_id, _, is_sharded, shard_count in rows
+            if is_sharded
+        }
+        run = chunk.run
+        balances = balances_as_of(
+            run.accrual_date, chunk.after_account_id, chunk.last_account_id
+        )
+        accruals = compute_accruals(
+            [
+                (account_id, user_id, balances[account_id])
+                for account_id, user_id, _, _ in rows
+                if balances[account_id] > 0
+            ],
+            run.annual_rate,
+        )
+
+        if accruals:
+            post_accruals(accruals, run.accrual_date, shard_counts)
+
+        chunk.status = InterestAccrualChunk.ChunkStatus.COMPLETED
+        chunk.accounts_credited = len(accruals)
+        chunk.total_interest = sum((amount for _, _, amount in accruals), Decimal("0"))
+        chunk.save(
+            update_fields=[
+                "status",
+                "accounts_credited",
+                "total_interest",
+                "updated_at",
+            ]
+        )
+    return len(accruals)
+
+
+def post_accruals(
+    accruals: List[Tuple[Any, Any, Decimal]],
+    accrual_date: date,
+    shard_counts: Dict[Any, int],
+) -> None:
+    description = f"Interest accrued for {accrual_date.isoformat()}"
+    transactions = Transaction.objects.bulk_create(
+        [
+            Transaction(
+                amount=amount,
+                description=description,
+                receiver_id=user_id,
+                receiver_account_id=account_id,
+                status=Transaction.TransactionStatus.COMPLETED,
+                transaction_type=Transaction.TransactionType.INTEREST,
+            )
+            for account_id, user_id, amount in accruals
+        ]
+    )
+    # Interest is paid by the bank: debit its side, credit the account.
+    LedgerEntry.objects.bulk_create(
+        [
+            LedgerEntry(
+                transaction=posted,
+                account_id=account_id,
+                entry_type=entry_type,
+                amount=posted.amount,
+            )
+            for posted in transactions
+            for entry_type, account_id in (
+                (LedgerEntry.EntryType.DEBIT, None),
+                (LedgerEntry.EntryType.CREDIT, posted.receiver_account_id),
+            )
+        ]
+    )
+
+    for account_id, _, amount in accruals:
+        if account_id in shard_counts:
+            BalanceShard.objects.filter(
+                account_id=account_id,
+                shard_index=random.randrange(shard_counts[account_id]),
+            ).update(balance=F("balance") + amount)
+
+    unsharded = [accrual for accrual in accruals if accrual[0] not in shard_counts]
+    if not unsharded:
+        return
+    values = ", ".join(["(%s::uuid, %s::numeric)"] * len(unsharded))
+    params: List[Any] = []
+    for account_id, _, amount in unsharded:
+        params.extend([account_id, amount])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {BankAccount._meta.db_table} a
+            SET account_balance = a.account_balance + v.amount, updated_at = %s
+            FROM (VALUES {values}) AS v (id, amount)
+            WHERE a.id = v.id
+            """,
+            [timezone.now(), *params],
+        )
+
+
+def finish_run(run_id: Any) -> InterestAccrualRun:
+    """Mark the run completed once every chunk is, and record its totals."""
+    with transaction.atomic():
+        run = InterestAccrualRun.objects.select_for_update().get(pk=run_id)
+        chunks = run.chunks.all()
+        if chunks.filter(status=InterestAccrualChunk.ChunkStatus.PENDING).exists():
+            return run
+
+        totals = chunks.aggregate(
+            accounts=Sum("accounts_credited"), interest=Sum("total_interest")
+        )
+        run.accounts_credited = totals["accounts"] or 0
+        run.total_interest = totals["interest"] or 0
+        run.status = InterestAccrualRun.RunStatus.COMPLETED
+        run.save(
+            update_fields=[
+                "accounts_credited",
+                "total_interest",
+                "status",
+                "updated_at",
+            ]
+        )
+    return run
@@ -0,0 +1,239 @@
+"""Double-entry ledger and balance snapshots.
+
+A credit entry adds to an account's balance and a debit entry takes from
+it, so the balance of an account at any moment is its latest snapshot
+before that moment plus the signed sum of the entries since the snapshot.
+Snapshots are taken daily, which bounds that sum to about a day of
+entries.
+"""
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, DecimalField, F, QuerySet, Sum, When
+from django.utils import timezone
+
+from .models import (
+    BalanceShard,
+    BalanceSnapshot,
+    BankAccount,
+    LedgerEntry,
+    Transaction,
+)
+
+SIGNED_AMOUNT = Case(
+    When(entry_type=LedgerEntry.EntryType.CREDIT, then=F("amount")),
+    default=-F("amount"),
+    output_field=DecimalField(max_digits=20, decimal_places=2),
+)
+
+
+def record_entries(
+    transaction: Transaction,
+    debit_account: Optional[BankAccount],
+    credit_account: Optional[BankAccount],
+) -> None:
+    """Write the debit and credit side of ``transaction``.
+
+    ``None`` stands for the bank's own side of money entering or leaving it.
+    """
+    LedgerEntry.objects.bulk_create(
+        [
+            LedgerEntry(
+                transaction=transaction,
+                account=debit_account,
+                entry_type=LedgerEntry.EntryType.DEBIT,
+                amount=transaction.amount,
+            ),
+            LedgerEntry(
+                transaction=transaction,
+                account=credit_account,
+                entry_type=LedgerEntry.EntryType.CREDIT,
+                amount=transaction.amount,
+            ),
+        ]
+    )
+
+
+def day_end(as_of: date) -> datetime:
+    return timezone.make_aware(datetime.combine(as_of + timedelta(days=1), time.min))
+
+
+def balance_as_of(account: BankAccount, as_of: date) -> Decimal:
+    """Balance of ``account`` at the end of ``as_of``."""
+    snapshot = (
+        BalanceSnapshot.objects.filter(account=account, as_of__lte=as_of)
+        .order_by("-as_of")
+        .values_list("as_of", "balance")
+        .first()
+    )
+    entries = LedgerEntry.objects.filter(account=account, created_at__lt=day_end(as_of))
+    balance = Decimal("0.00")
+    if snapshot is not None:
+        snapshot_date, balance = snapshot
+        if snapshot_date == as_of:
+            return balance
+        entries = entries.filter(created_at__gte=day_end(snapshot_date))
+
+    return balance + (entries.aggregate(total=Sum(SIGNED_AMOUNT))["total"] or 0)
+
+
+def iter_account_ranges(
+    chunk_size: int, queryset: Optional[QuerySet] = None
+) -> Iterator[Tuple[Any, Any]]:
+    """Split accounts into ``(after_id, last_id)`` ranges of ``chunk_size`` rows.
+
+    Only the range boundaries are kept, so the ranges can be handed to a pool
+    of workers without materializing every account id.
+    """
+    after_id = None
+    last_id = None
+    count = 0
+    if queryset is None:
+        queryset = BankAccount.objects.all()
+    ids = queryset.order_by("pk").values_list("pk", flat=True)
+    for last_id in ids.iterator(chunk_size=chunk_size):
+        count += 1
+        if count == chunk_size:
+            yield after_id, last_id
+            after_id, count = last_id, 0
+    if count:
+        yield after_id, last_id
+
+
+def ledger_balance_sql(until: bool = False) -> str:
+    """SQL for the ledger balance of account ``a`` joined to its snapshot ``s``.
+
+    With ``until``, only entries before the ``%(until)s`` parameter count.
+    """
+    return f"""
+        COALESCE(s.balance, 0) + COALESCE((
+            SELECT SUM(
+                CASE WHEN e.entry_type = 'credit' THEN e.amount ELSE -e.amount END
+            )
+            FROM {LedgerEntry._meta.db_table} e
+            WHERE e.account_id = a.id
+            AND (
+                s.as_of IS NULL
+                OR e.created_at >= (s.as_of + 1)::timestamp AT TIME ZONE %(tz)s
+            )
+            {"AND e.created_at < %(until)s" if until else ""}
+        ), 0)
+    """
+
+
+def latest_snapshot_sql(before: bool = False) -> str:
+    """SQL joining the latest snapshot of account ``a`` as ``s``.
+
+    With ``before``, only snapshots older than the ``%(as_of)s`` parameter
+    are considered.
+    """
+    return f"""
+        LEFT JOIN LATERAL (
+            SELECT as_of, balance
+            FROM {BalanceSnapshot._meta.db_table}
+            WHERE account_id = a.id {"AND as_of < %(as_of)s" if before else ""}
+            ORDER BY as_of DESC
+            LIMIT 1
+        ) s ON true
+    """
+
+
+# The current balance of account ``a``; for a sharded account, its shards.
+ACCOUNT_BALANCE_SQL = f"""
+    CASE WHEN a.is_sharded THEN COALESCE((
+        SELECT SUM(b.balance) FROM {BalanceShard._meta.db_table} b
+        WHERE b.account_id = a.id
+    ), 0) ELSE a.account_balance END
+"""
+
+ACCOUNT_RANGE_SQL = (
+    "(%(after_id)s IS NULL OR a.id > %(after_id)s) AND a.id <= %(last_id)s"
+)
+
+
+def snapshot_balances(as_of: date, after_id: Any, last_id: Any) -> int:
+    """Write the end-of-day balance on ``as_of`` for one range of accounts.
+
+    Re-running it for the same day overwrites that day's snapshots.
+    """
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {BalanceSnapshot._meta.db_table}
+                (id, created_at, updated_at, account_id, as_of, balance)
+            SELECT gen_random_uuid(), %(now)s, %(now)s, a.id, %(as_of)s,
+                {ledger_balance_sql(until=True)}
+            FROM {BankAccount._meta.db_table} a
+            {latest_snapshot_sql(before=True)}
+            WHERE {ACCOUNT_RANGE_SQL}
+            ON CONFLICT (account_id, as_of) DO UPDATE
+            SET balance = EXCLUDED.balance, updated_at = EXCLUDED.updated_at
+            """,
+            {
+                "now": now,
+                "as_of": as_of,
+                "until": day_end(as_of),
+                "tz": settings.TIME_ZONE,
+                "after_id": after_id,
+                "last_id": last_id,
+            },
+        )
+        return cursor.rowcount
+
+
+def balances_as_of(as_of: date, after_id: Any, last_id: Any) -> Dict[Any, Decimal]:
+    """End-of-day balance on ``as_of`` of every account in one range."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT a.id, {ledger_balance_sql(until=True)}
+            FROM {BankAccount._meta.db_table} a
+            {latest_snapshot_sql(before=True)}
+            WHERE {ACCOUNT_RANGE_SQL}
+            """,
+            {
+                # Snapshots taken on as_of itself are usable too
+                "as_of": as_of + timedelta(days=1),
+                "until": day_end(as_of),
+                "tz": settings.TIME_ZONE,
+                "after_id": after_id,
+                "last_id": last_id,
+            },
+        )
+        return dict(cursor.fetchall())
+
+
+def find_ledger_mismatches(after_id: Any, last_id: Any) -> List[Dict[str, Any]]:
+    """Accounts in the range whose balance differs from snapshot plus entries."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT id, account_number, account_balance, ledger_balance
+            FROM (
+                SELECT a.id, a.account_number,
+                    {ACCOUNT_BALANCE_SQL} AS account_balance,
+                    {ledger_balance_sql()} AS ledger_balance
+                FROM {BankAccount._meta.db_table} a
+                {latest_snapshot_sql()}
+                WHERE {ACCOUNT_RANGE_SQL}
+            ) balances
+            WHERE account_balance <> ledger_balance
+            """,
+            {"tz": settings.TIME_ZONE, "after_id": after_id, "last_id": last_id},
+        )
+        return [
+            {
+                "account_id": str(account_id),
+                "account_number": account_number,
+                "account_balance": account_balance,
+                "ledger_balance": ledger_balance,
+            }
+            for account_id, account_number, account_balance, ledger_balance in (
+                cursor.fetchall()
+            )
+        ]
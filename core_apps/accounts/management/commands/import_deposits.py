@@ -0,0 +1,56 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from core_apps.accounts.bulk import FILE_FORMATS, import_deposits
+
+
+class Command(BaseCommand):
+    help = "Post a CSV or NDJSON file of deposits in one set-based transaction."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "path", help="File with account_number, amount and description columns."
+        )
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=FILE_FORMATS,
+            help="Input format; inferred from the file extension by default.",
+        )
+        parser.add_argument(
+            "--all-or-nothing",
+            action="store_true",
+            help="Post nothing if any row is rejected.",
+        )
+        parser.add_argument(
+            "--reference",
+            help="Batch reference that may only be posted once; "
+            "defaults to the file's SHA-256.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path = options["path"]
+        file_format = options["file_format"] or path.rsplit(".", 1)[-1].lower()
+        if file_format not in FILE_FORMATS:
+            raise CommandError("Could not infer the format; pass --format.")
+
+        with open(path, "rb") as file:
+            try:
+                report = import_deposits(
+                    file,
+                    file_format,
+                    all_or_nothing=options["all_or_nothing"],
+                    reference=options["reference"],
+                )
+            except (ValueError, UnicodeDecodeError) as e:
+                raise CommandError(str(e))
+
+        for error in report["errors"]:
+            self.stderr.write(f"Row {error['row']}: {' '.join(error['errors'])}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Posted {report['posted']} of {report['rows']} deposits "
+                f"totalling {report['total_amount']}."
+            )
+        )
@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+
+from core_apps.accounts.ledger import find_ledger_mismatches, iter_account_ranges
+
+
+def check_range(account_range: Tuple[Any, Any]) -> List[Dict[str, Any]]:
+    try:
+        return find_ledger_mismatches(*account_range)
+    finally:
+        # Each worker thread opens its own connection; don't leave it behind.
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that every account balance equals its latest balance snapshot "
+        "plus the ledger entries since then."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of accounts checked per query.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of chunks checked in parallel, each on its own connection.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        checked_ranges = 0
+        mismatches = []
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            for found in pool.map(
+                check_range, iter_account_ranges(options["chunk_size"])
+            ):
+                checked_ranges += 1
+                mismatches.extend(found)
+
+        for mismatch in mismatches:
+            self.stderr.write(
+                f"{mismatch['account_number']}: balance {mismatch['account_balance']}, "
+                f"ledger {mismatch['ledger_balance']}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} accounts do not match the ledger.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"All accounts match the ledger ({checked_ranges} chunks checked)."
+            )
+        )
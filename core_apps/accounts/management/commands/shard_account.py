@@ -0,0 +1,53 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from core_apps.accounts.models import BankAccount
+from core_apps.accounts.shards import (
+    ShardingError,
+    disable_sharding,
+    enable_sharding,
+)
+
+
+class Command(BaseCommand):
+    help = "Turn the sharded-balance mode of a hot account on or off."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("account_number")
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=settings.DEFAULT_BALANCE_SHARD_COUNT,
+            help="Number of balance shards to split the account into.",
+        )
+        parser.add_argument(
+            "--disable",
+            action="store_true",
+            help="Fold the shards back into the account balance.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        account_id = (
+            BankAccount.objects.filter(account_number=options["account_number"])
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if account_id is None:
+            raise CommandError("Bank account not found.")
+
+        try:
+            if options["disable"]:
+                account = disable_sharding(account_id)
+                message = f"Account {account.account_number} is no longer sharded."
+            else:
+                account = enable_sharding(account_id, options["shards"])
+                message = (
+                    f"Account {account.account_number} is split into "
+                    f"{account.shard_count} shards."
+                )
+        except ShardingError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.15 on 2026-10-16 10:40
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db.models import F, TextField
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("user_auth", "0004_user_trigram_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="bankaccount",
+            index=GinIndex(
+                OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            F("account_number"), output_field=TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="account_number_trgm_idx",
+            ),
+        ),
+    ]
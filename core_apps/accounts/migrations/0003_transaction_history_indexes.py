@@ -0,0 +1,73 @@
+# Generated by Django 4.2.15 on 2026-10-17 13:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0002_bankaccount_account_number_trgm_idx"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="transaction",
+            index=models.Index(
+                fields=["sender_account", "created_at", "id"],
+                name="txn_sender_created_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="transaction",
+            index=models.Index(
+                fields=["receiver_account", "created_at", "id"],
+                name="txn_receiver_created_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["sender_account", "created_at"],
+                name="txn_sender_pending_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["receiver_account", "created_at"],
+                name="txn_receiver_pending_idx",
+            ),
+        ),
+        # The composite indexes lead with the account columns, which makes the
+        # single-column foreign key indexes redundant.
+        migrations.AlterField(
+            model_name="transaction",
+            name="receiver_account",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="received_transactions",
+                to="accounts.bankaccount",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="sender_account",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="sent_transactions",
+                to="accounts.bankaccount",
+            ),
+        ),
+    ]
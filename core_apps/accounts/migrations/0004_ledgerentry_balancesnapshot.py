@@ -0,0 +1,135 @@
+# Generated by Django 4.2.15 on 2026-10-17 14:05
+
+from datetime import timedelta
+from itertools import islice
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+import uuid
+
+
+def create_opening_snapshots(apps, schema_editor):
+    # Balances posted before the ledger existed have no entries, so each
+    # account starts from a snapshot of its current balance.
+    BankAccount = apps.get_model("accounts", "BankAccount")
+    BalanceSnapshot = apps.get_model("accounts", "BalanceSnapshot")
+    as_of = timezone.localdate() - timedelta(days=1)
+
+    snapshots = (
+        BalanceSnapshot(account_id=account_id, as_of=as_of, balance=balance)
+        for account_id, balance in BankAccount.objects.values_list(
+            "id", "account_balance"
+        ).iterator(chunk_size=2000)
+    )
+    while True:
+        batch = list(islice(snapshots, 2000))
+        if not batch:
+            break
+        BalanceSnapshot.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_transaction_history_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("as_of", models.DateField(verbose_name="As Of")),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=20, verbose_name="Balance"
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_snapshots",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Balance Snapshot",
+                "verbose_name_plural": "Balance Snapshots",
+                "unique_together": {("account", "as_of")},
+            },
+        ),
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "entry_type",
+                    models.CharField(
+                        choices=[("debit", "Debit"), ("credit", "Credit")],
+                        max_length=10,
+                        verbose_name="Entry Type",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=20, verbose_name="Amount"
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="ledger_entries",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="ledger_entries",
+                        to="accounts.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ledger Entry",
+                "verbose_name_plural": "Ledger Entries",
+                "indexes": [
+                    models.Index(
+                        fields=["account", "created_at"],
+                        name="ledger_account_created_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_opening_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 4.2.15 on 2026-10-17 15:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_ledgerentry_balancesnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InterestAccrualRun",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "accrual_date",
+                    models.DateField(unique=True, verbose_name="Accrual Date"),
+                ),
+                (
+                    "annual_rate",
+                    models.DecimalField(
+                        decimal_places=6, max_digits=8, verbose_name="Annual Rate"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("running", "Running"), ("completed", "Completed")],
+                        default="running",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "chunks_planned",
+                    models.BooleanField(default=False, verbose_name="Chunks Planned"),
+                ),
+                (
+                    "accounts_credited",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Accounts Credited"
+                    ),
+                ),
+                (
+                    "total_interest",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=20,
+                        verbose_name="Total Interest",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Interest Accrual Run",
+                "verbose_name_plural": "Interest Accrual Runs",
+            },
+        ),
+        migrations.CreateModel(
+            name="InterestAccrualChunk",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "after_account_id",
+                    models.UUIDField(
+                        blank=True, null=True, verbose_name="After Account ID"
+                    ),
+                ),
+                (
+                    "last_account_id",
+                    models.UUIDField(verbose_name="Last Account ID"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("completed", "Completed")],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "accounts_credited",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Accounts Credited"
+                    ),
+                ),
+                (
+                    "total_interest",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=20,
+                        verbose_name="Total Interest",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="accounts.interestaccrualrun",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Interest Accrual Chunk",
+                "verbose_name_plural": "Interest Accrual Chunks",
+                "unique_together": {("run", "last_account_id")},
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.15 on 2026-10-17 16:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_interestaccrualrun_interestaccrualchunk"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bankaccount",
+            name="is_sharded",
+            field=models.BooleanField(default=False, verbose_name="Sharded Balance"),
+        ),
+        migrations.AddField(
+            model_name="bankaccount",
+            name="shard_count",
+            field=models.PositiveSmallIntegerField(
+                default=0, verbose_name="Shard Count"
+            ),
+        ),
+        migrations.CreateModel(
+            name="BalanceShard",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "shard_index",
+                    models.PositiveSmallIntegerField(verbose_name="Shard Index"),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=20,
+                        verbose_name="Balance",
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_shards",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Balance Shard",
+                "verbose_name_plural": "Balance Shards",
+                "unique_together": {("account", "shard_index")},
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.15 on 2026-10-17 18:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("accounts", "0006_bankaccount_sharding_balanceshard"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DepositImport",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "reference",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Reference"
+                    ),
+                ),
+                (
+                    "file_digest",
+                    models.CharField(max_length=64, verbose_name="File SHA-256"),
+                ),
+                (
+                    "deposits_posted",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Deposits Posted"
+                    ),
+                ),
+                (
+                    "total_amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=20,
+                        verbose_name="Total Amount",
+                    ),
+                ),
+                (
+                    "imported_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="deposit_imports",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Deposit Import",
+                "verbose_name_plural": "Deposit Imports",
+            },
+        ),
+    ]
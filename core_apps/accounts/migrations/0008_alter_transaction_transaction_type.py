@@ -0,0 +1,28 @@
+# Generated by Django 4.2.15 on 2026-10-17 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0007_depositimport"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transaction",
+            name="transaction_type",
+            field=models.CharField(
+                choices=[
+                    ("deposit", "Deposit"),
+                    ("withdrawal", "Withdrawal"),
+                    ("transfer", "Transfer"),
+                    ("interest", "Interest"),
+                    ("adjustment", "Adjustment"),
+                ],
+                max_length=20,
+                verbose_name="Type",
+            ),
+        ),
+    ]
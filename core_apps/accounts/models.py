@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from core_apps.common.indexes import trigram_index
 from core_apps.common.models import TimeStampedModel
 
 User = get_user_model()
@@ -53,6 +54,10 @@ class BankAccount(TimeStampedModel):
     verification_date = models.DateField(_("Verification Date"), null=True, blank=True)
     verification_notes = models.TextField(_("Verification Notes"), blank=True)
     fully_activated = models.BooleanField(_("Fully Activated"), default=False)
+    # Hot accounts keep their balance in BalanceShard rows instead, see
+    # accounts/shards.py; account_balance then holds the last rebalanced total.
+    is_sharded = models.BooleanField(_("Sharded Balance"), default=False)
+    shard_count = models.PositiveSmallIntegerField(_("Shard Count"), default=0)
 
     def __str__(self) -> str:
         return (
@@ -64,6 +69,7 @@ class BankAccount(TimeStampedModel):
         verbose_name = _("Bank Account")
         verbose_name_plural = _("Bank Accounts")
         unique_together = ["user", "currency", "account_type"]
+        indexes = [trigram_index("account_number", "account_number_trgm_idx")]
 
     def clean(self) -> None:
         if self.account_balance < 0:
@@ -86,6 +92,7 @@ class Transaction(TimeStampedModel):
         WITHDRAWAL = "withdrawal", _("Withdrawal")
         TRANSFER = "transfer", _("Transfer")
         INTEREST = "interest", _("Interest")
+        ADJUSTMENT = "adjustment", _("Adjustment")
 
     user = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True, related_name="transactions"
@@ -110,12 +117,14 @@ class Transaction(TimeStampedModel):
         blank=True,
         related_name="sent_transactions",
     )
+    # Indexed through the (account, created_at, id) indexes in Meta.
     receiver_account = models.ForeignKey(
         BankAccount,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
         related_name="received_transactions",
+        db_index=False,
     )
     sender_account = models.ForeignKey(
         BankAccount,
@@ -123,6 +132,7 @@ class Transaction(TimeStampedModel):
         null=True,
         blank=True,
         related_name="sent_transactions",
+        db_index=False,
     )
     status = models.CharField(
         _("Status"),
@@ -139,4 +149,190 @@ class Transaction(TimeStampedModel):
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["created_at"])]
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(
+                fields=["sender_account", "created_at", "id"],
+                name="txn_sender_created_idx",
+            ),
+            models.Index(
+                fields=["receiver_account", "created_at", "id"],
+                name="txn_receiver_created_idx",
+            ),
+            models.Index(
+                fields=["sender_account", "created_at"],
+                name="txn_sender_pending_idx",
+                condition=models.Q(status="pending"),
+            ),
+            models.Index(
+                fields=["receiver_account", "created_at"],
+                name="txn_receiver_pending_idx",
+                condition=models.Q(status="pending"),
+            ),
+        ]
+
+
+class LedgerEntry(TimeStampedModel):
+    """One side of a posted transaction; rows are only ever inserted.
+
+    Every ``Transaction`` has one debit and one credit entry of the same
+    amount. An entry without an account is the bank's side of money
+    entering or leaving it (cash deposits, withdrawals, interest).
+    """
+
+    class EntryType(models.TextChoices):
+        DEBIT = "debit", _("Debit")
+        CREDIT = "credit", _("Credit")
+
+    transaction = models.ForeignKey(
+        Transaction, on_delete=models.PROTECT, related_name="ledger_entries"
+    )
+    account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+        db_index=False,
+    )
+    entry_type = models.CharField(
+        _("Entry Type"), max_length=10, choices=EntryType.choices
+    )
+    amount = models.DecimalField(_("Amount"), decimal_places=2, max_digits=20)
+
+    def __str__(self) -> str:
+        return f"{self.entry_type} {self.amount} - {self.account_id or 'external'}"
+
+    class Meta:
+        verbose_name = _("Ledger Entry")
+        verbose_name_plural = _("Ledger Entries")
+        indexes = [
+            models.Index(
+                fields=["account", "created_at"], name="ledger_account_created_idx"
+            )
+        ]
+
+
+class DepositImport(TimeStampedModel):
+    """A posted bulk deposit file; its reference can only be posted once."""
+
+    reference = models.CharField(_("Reference"), max_length=255, unique=True)
+    file_digest = models.CharField(_("File SHA-256"), max_length=64)
+    imported_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="deposit_imports",
+    )
+    deposits_posted = models.PositiveIntegerField(_("Deposits Posted"), default=0)
+    total_amount = models.DecimalField(
+        _("Total Amount"), decimal_places=2, max_digits=20, default=0
+    )
+
+    def __str__(self) -> str:
+        return f"{self.reference} - {self.deposits_posted} deposits"
+
+    class Meta:
+        verbose_name = _("Deposit Import")
+        verbose_name_plural = _("Deposit Imports")
+
+
+class BalanceSnapshot(TimeStampedModel):
+    """Balance of an account at the end of ``as_of``, in ``TIME_ZONE``."""
+
+    account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="balance_snapshots"
+    )
+    as_of = models.DateField(_("As Of"))
+    balance = models.DecimalField(_("Balance"), decimal_places=2, max_digits=20)
+
+    def __str__(self) -> str:
+        return f"{self.account_id} on {self.as_of}: {self.balance}"
+
+    class Meta:
+        verbose_name = _("Balance Snapshot")
+        verbose_name_plural = _("Balance Snapshots")
+        unique_together = ["account", "as_of"]
+
+
+class InterestAccrualRun(TimeStampedModel):
+    """One day's interest accrual over all savings accounts.
+
+    The work is split into ``InterestAccrualChunk`` ranges of accounts,
+    each posted in its own transaction, so a failed run resumes from the
+    chunks that are still pending.
+    """
+
+    class RunStatus(models.TextChoices):
+        RUNNING = "running", _("Running")
+        COMPLETED = "completed", _("Completed")
+
+    accrual_date = models.DateField(_("Accrual Date"), unique=True)
+    annual_rate = models.DecimalField(_("Annual Rate"), decimal_places=6, max_digits=8)
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=RunStatus.choices,
+        default=RunStatus.RUNNING,
+    )
+    chunks_planned = models.BooleanField(_("Chunks Planned"), default=False)
+    accounts_credited = models.PositiveIntegerField(_("Accounts Credited"), default=0)
+    total_interest = models.DecimalField(
+        _("Total Interest"), decimal_places=2, max_digits=20, default=0
+    )
+
+    def __str__(self) -> str:
+        return f"Interest accrual for {self.accrual_date} - {self.status}"
+
+    class Meta:
+        verbose_name = _("Interest Accrual Run")
+        verbose_name_plural = _("Interest Accrual Runs")
+
+
+class InterestAccrualChunk(TimeStampedModel):
+    class ChunkStatus(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        COMPLETED = "completed", _("Completed")
+
+    run = models.ForeignKey(
+        InterestAccrualRun, on_delete=models.CASCADE, related_name="chunks"
+    )
+    after_account_id = models.UUIDField(_("After Account ID"), null=True, blank=True)
+    last_account_id = models.UUIDField(_("Last Account ID"))
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=ChunkStatus.choices,
+        default=ChunkStatus.PENDING,
+    )
+    accounts_credited = models.PositiveIntegerField(_("Accounts Credited"), default=0)
+    total_interest = models.DecimalField(
+        _("Total Interest"), decimal_places=2, max_digits=20, default=0
+    )
+
+    def __str__(self) -> str:
+        return f"{self.run} up to {self.last_account_id} - {self.status}"
+
+    class Meta:
+        verbose_name = _("Interest Accrual Chunk")
+        verbose_name_plural = _("Interest Accrual Chunks")
+        unique_together = ["run", "last_account_id"]
+
+
+class BalanceShard(TimeStampedModel):
+    account = models.ForeignKey(
+        BankAccount, on_delete=models.CASCADE, related_name="balance_shards"
+    )
+    shard_index = models.PositiveSmallIntegerField(_("Shard Index"))
+    balance = models.DecimalField(
+        _("Balance"), decimal_places=2, max_digits=20, default=0
+    )
+
+    def __str__(self) -> str:
+        return f"{self.account_id} shard {self.shard_index}: {self.balance}"
+
+    class Meta:
+        verbose_name = _("Balance Shard")
+        verbose_name_plural = _("Balance Shards")
+        unique_together = ["account", "shard_index"]
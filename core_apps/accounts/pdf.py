@@ -0,0 +1,105 @@
+import zlib
+from typing import IO, List
+
+
+class StreamingPDFWriter:
+    """Writes a text-only PDF to a binary file one page at a time.
+
+    Only the current page's lines and the byte offset of each written object
+    are kept in memory, so arbitrarily long documents can be produced with a
+    flat memory profile. Pages use the built-in Courier font, so columns
+    line up without embedding any font data.
+    """
+
+    page_width = 842  # A4 landscape, in points
+    page_height = 595
+    margin = 36
+    font_size = 8
+    leading = 11
+
+    def __init__(self, file: IO[bytes], title: str = "") -> None:
+        self.file = file
+        self.title = title
+        self.position = 0
+        self.offsets = {}
+        self.page_ids: List[int] = []
+        self.lines: List[str] = []
+        # Object 1 is the catalog and 2 the page tree, both written on close.
+        self.next_id = 4
+        self.lines_per_page = (self.page_height - 2 * self.margin) // self.leading - 2
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+
+    def add_line(self, text: str) -> None:
+        self.lines.append(text)
+        if len(self.lines) >= self.lines_per_page:
+            self._write_page()
+
+    def close(self) -> None:
+        if self.lines or not self.page_ids:
+            self._write_page()
+
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._write_object(
+            2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids))
+        )
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = self.position
+        size = self.next_id
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for object_id in range(1, size):
+            self._write(b"%010d 00000 n \n" % self.offsets[object_id])
+        self._write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (size, xref_offset)
+        )
+
+    def _write_page(self) -> None:
+        header = f"{self.title}    Page {len(self.page_ids) + 1}"
+        top = self.page_height - self.margin - self.font_size
+        commands = [
+            b"BT",
+            b"/F1 %d Tf" % self.font_size,
+            b"%d TL" % self.leading,
+            b"%d %d Td" % (self.margin, top),
+            b"(%s) Tj T* T*" % self._escape(header),
+        ]
+        commands.extend(b"(%s) Tj T*" % self._escape(line) for line in self.lines)
+        commands.append(b"ET")
+        stream = zlib.compress(b"\n".join(commands))
+        self.lines = []
+
+        content_id = self._allocate_id()
+        self._write_object(
+            content_id,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream"
+            % (len(stream), stream),
+        )
+        page_id = self._allocate_id()
+        self._write_object(
+            page_id,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (self.page_width, self.page_height, content_id),
+        )
+        self.page_ids.append(page_id)
+
+    def _allocate_id(self) -> int:
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def _write_object(self, object_id: int, body: bytes) -> None:
+        self.offsets[object_id] = self.position
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (object_id, body))
+
+    def _write(self, data: bytes) -> None:
+        self.file.write(data)
+        self.position += len(data)
+
+    @staticmethod
+    def _escape(text: str) -> bytes:
+        text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        return text.encode("latin-1", "replace")
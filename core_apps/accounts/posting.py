@@ -0,0 +1,289 @@
+"""Posting engine: applies deposits, withdrawals and transfers to accounts.
+
+Every posting runs in one database transaction that locks the accounts it
+touches, moves the balances with ``F()`` expressions and records a
+completed ``Transaction`` with its two ledger entries. Accounts are always
+locked in primary-key order, so two postings over the same pair of
+accounts queue behind each other instead of deadlocking.
+
+Sharded accounts (see ``shards.py``) are not locked at all: their balance
+lives in ``BalanceShard`` rows, and a posting only holds the one shard it
+credits or debits, so postings to a hot account run side by side.
+"""
+
+import random
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+
+from .ledger import record_entries
+from .models import BalanceShard, BankAccount, Transaction
+
+TWO_PLACES = Decimal("0.01")
+
+
+class PostingError(Exception):
+    """A posting was rejected; nothing has been written."""
+
+
+class InsufficientFundsError(PostingError):
+    pass
+
+
+def normalize_amount(amount: Any) -> Decimal:
+    try:
+        amount = Decimal(str(amount)).quantize(TWO_PLACES)
+    except InvalidOperation:
+        raise PostingError(_("Amount must be a number."))
+    if amount <= 0:
+        raise PostingError(_("Amount must be greater than zero."))
+    return amount
+
+
+def lock_accounts(*account_ids: Any) -> Dict[Any, BankAccount]:
+    """Lock the given accounts, in primary-key order, for this transaction.
+
+    ``FOR NO KEY UPDATE`` is enough to serialize balance changes and, unlike
+    ``FOR UPDATE``, does not block the key-share locks taken by inserts of
+    rows referencing the account, such as the ``Transaction`` record.
+
+    Sharded accounts are read without a lock. An account being sharded
+    concurrently is waited for and then re-read as sharded.
+    """
+    accounts = (
+        BankAccount.objects.only(
+            "id",
+            "user",
+            "account_number",
+            "account_balance",
+            "account_status",
+            "currency",
+            "is_sharded",
+            "shard_count",
+        )
+        .filter(pk__in=account_ids)
+        .order_by("pk")
+    )
+    locked = {
+        account.pk: account
+        for account in accounts.select_for_update(no_key=True).filter(
+            is_sharded=False
+        )
+    }
+    unlocked = [account_id for account_id in account_ids if account_id not in locked]
+    if unlocked:
+        locked.update(
+            (account.pk, account)
+            for account in accounts.filter(pk__in=unlocked, is_sharded=True)
+        )
+
+    for account_id in account_ids:
+        if account_id not in locked:
+            raise PostingError(_("Bank account not found."))
+        if locked[account_id].account_status != BankAccount.AccountStatus.ACTIVE:
+            raise PostingError(
+                _("Account %(number)s is not active.")
+                % {"number": locked[account_id].account_number}
+            )
+    return locked
+
+
+def credit(account: BankAccount, amount: Decimal) -> None:
+    if account.is_sharded:
+        credit_shard(account, amount)
+        return
+    BankAccount.objects.filter(pk=account.pk).update(
+        account_balance=F("account_balance") + amount
+    )
+    account.account_balance += amount
+
+
+def debit(account: BankAccount, amount: Decimal) -> None:
+    if account.is_sharded:
+        debit_shards(account, amount)
+        return
+    # The row is locked, so the balance read by lock_accounts is current.
+    if account.account_balance < amount:
+        raise InsufficientFundsError(
+            _("Insufficient funds in account %(number)s.")
+            % {"number": account.account_number}
+        )
+    BankAccount.objects.filter(pk=account.pk).update(
+        account_balance=F("account_balance") - amount
+    )
+    account.account_balance -= amount
+
+
+def credit_shard(account: BankAccount, amount: Decimal) -> None:
+    updated = BalanceShard.objects.filter(
+        account_id=account.pk, shard_index=random.randrange(account.shard_count)
+    ).update(balance=F("balance") + amount)
+    if not updated:
+        # Sharding was turned off after lock_accounts read the account.
+        raise PostingError(_("Account balance is being reorganized, try again."))
+
+
+def debit_shards(account: BankAccount, amount: Decimal) -> None:
+    start = random.randrange(account.shard_count)
+    for offset in range(account.shard_count):
+        # A shard that cannot cover the amount is skipped without locking it.
+        if BalanceShard.objects.filter(
+            account_id=account.pk,
+            shard_index=(start + offset) % account.shard_count,
+            balance__gte=amount,
+        ).update(balance=F("balance") - amount):
+            return
+
+    # No single shard covers the amount: lock them all, in index order, and
+    # take it from each in turn.
+    shards = list(
+        BalanceShard.objects.select_for_update()
+        .filter(account_id=account.pk)
+        .order_by("shard_index")
+    )
+    if not shards:
+        raise PostingError(_("Account balance is being reorganized, try again."))
+    if sum(shard.balance for shard in shards) < amount:
+        raise InsufficientFundsError(
+            _("Insufficient funds in account %(number)s.")
+            % {"number": account.account_number}
+        )
+
+    remaining = amount
+    for shard in shards:
+        taken = min(shard.balance, remaining)
+        shard.balance -= taken
+        remaining -= taken
+    BalanceShard.objects.bulk_update(shards, ["balance"])
+
+
+def deposit(
+    account_id: Any,
+    amount: Any,
+    initiated_by: Optional[Any] = None,
+    description: str = "",
+) -> Transaction:
+    amount = normalize_amount(amount)
+    with transaction.atomic():
+        account = lock_accounts(account_id)[account_id]
+        credit(account, amount)
+        posted = Transaction.objects.create(
+            user=initiated_by,
+            amount=amount,
+            description=description,
+            receiver_id=account.user_id,
+            receiver_account=account,
+            status=Transaction.TransactionStatus.COMPLETED,
+            transaction_type=Transaction.TransactionType.DEPOSIT,
+        )
+        record_entries(posted, debit_account=None, credit_account=account)
+        return posted
+
+
+def withdraw(
+    account_id: Any,
+    amount: Any,
+    initiated_by: Optional[Any] = None,
+    description: str = "",
+) -> Transaction:
+    amount = normalize_amount(amount)
+    with transaction.atomic():
+        account = lock_accounts(account_id)[account_id]
+        debit(account, amount)
+        posted = Transaction.objects.create(
+            user=initiated_by,
+            amount=amount,
+            description=description,
+            sender_id=account.user_id,
+            sender_account=account,
+            status=Transaction.TransactionStatus.COMPLETED,
+            transaction_type=Transaction.TransactionType.WITHDRAWAL,
+        )
+        record_entries(posted, debit_account=account, credit_account=None)
+        return posted
+
+
+def adjust(
+    account_id: Any,
+    amount: Any,
+    initiated_by: Optional[Any] = None,
+    description: str = "",
+) -> Transaction:
+    """Correct a balance by a signed ``amount``, recorded in the ledger.
+
+    A positive amount credits the account and a negative one debits it,
+    against the bank's own side like a deposit or withdrawal.
+    """
+    try:
+        signed = Decimal(str(amount))
+    except InvalidOperation:
+        raise PostingError(_("Amount must be a number."))
+    amount = normalize_amount(abs(signed))
+    with transaction.atomic():
+        account = lock_accounts(account_id)[account_id]
+        if signed > 0:
+            credit(account, amount)
+            sides = {"receiver_id": account.user_id, "receiver_account": account}
+        else:
+            debit(account, amount)
+            sides = {"sender_id": account.user_id, "sender_account": account}
+        posted = Transaction.objects.create(
+            user=initiated_by,
+            amount=amount,
+            description=description,
+            status=Transaction.TransactionStatus.COMPLETED,
+            transaction_type=Transaction.TransactionType.ADJUSTMENT,
+            **sides,
+        )
+        record_entries(
+            posted,
+            debit_account=None if signed > 0 else account,
+            credit_account=account if signed > 0 else None,
+        )
+        return posted
+
+
+def transfer(
+    sender_account_id: Any,
+    receiver_account_id: Any,
+    amount: Any,
+    initiated_by: Optional[Any] = None,
+    description: str = "",
+) -> Transaction:
+    amount = normalize_amount(amount)
+    if sender_account_id == receiver_account_id:
+        raise PostingError(_("Cannot transfer to the same account."))
+
+    with transaction.atomic():
+        accounts = lock_accounts(sender_account_id, receiver_account_id)
+        sender_account = accounts[sender_account_id]
+        receiver_account = accounts[receiver_account_id]
+
+        if sender_account.currency != receiver_account.currency:
+            raise PostingError(_("Both accounts must hold the same currency."))
+
+        # Shard rows are not covered by lock_accounts, so touch the two
+        # accounts in primary-key order as well.
+        for account, apply in sorted(
+            [(sender_account, debit), (receiver_account, credit)],
+            key=lambda posting: posting[0].pk,
+        ):
+            apply(account, amount)
+        posted = Transaction.objects.create(
+            user=initiated_by,
+            amount=amount,
+            description=description,
+            sender_id=sender_account.user_id,
+            sender_account=sender_account,
+            receiver_id=receiver_account.user_id,
+            receiver_account=receiver_account,
+            status=Transaction.TransactionStatus.COMPLETED,
+            transaction_type=Transaction.TransactionType.TRANSFER,
+        )
+        record_entries(
+            posted, debit_account=sender_account, credit_account=receiver_account
+        )
+        return posted
@@ -1,6 +1,9 @@
+from decimal import Decimal
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from .models import BankAccount
+from .bulk import FILE_FORMATS
+from .statements import STATEMENT_FORMATS
+from .models import BankAccount, Transaction
 
 
 class AccountVerificationSerializer(serializers.ModelSerializer):
@@ -38,3 +41,117 @@ class AccountVerificationSerializer(serializers.ModelSerializer):
                 )
 
         return data
+
+
+class TransactionSerializer(serializers.ModelSerializer):
+    sender_account = serializers.SlugRelatedField(
+        slug_field="account_number", read_only=True
+    )
+    receiver_account = serializers.SlugRelatedField(
+        slug_field="account_number", read_only=True
+    )
+
+    class Meta:
+        model = Transaction
+        fields = [
+            "id",
+            "amount",
+            "description",
+            "sender_account",
+            "receiver_account",
+            "status",
+            "transaction_type",
+            "created_at",
+        ]
+
+
+class TransactionHistorySerializer(TransactionSerializer):
+    direction = serializers.SerializerMethodField()
+
+    class Meta(TransactionSerializer.Meta):
+        fields = TransactionSerializer.Meta.fields + ["direction"]
+
+    def get_direction(self, obj: Transaction) -> str:
+        if obj.sender_account_id == self.context["account"].pk:
+            return "debit"
+        return "credit"
+
+
+class AccountPostingSerializer(serializers.Serializer):
+    account_number = serializers.CharField(max_length=20)
+    amount = serializers.DecimalField(
+        max_digits=20, decimal_places=2, min_value=Decimal("0.01")
+    )
+    description = serializers.CharField(
+        max_length=500, required=False, allow_blank=True, default=""
+    )
+
+    def validate_account_number(self, value: str) -> BankAccount:
+        try:
+            return BankAccount.objects.only("id").get(account_number=value)
+        except BankAccount.DoesNotExist:
+            raise serializers.ValidationError(_("Bank account not found."))
+
+
+class TransferSerializer(serializers.Serializer):
+    sender_account_number = serializers.CharField(max_length=20)
+    receiver_account_number = serializers.CharField(max_length=20)
+    amount = serializers.DecimalField(
+        max_digits=20, decimal_places=2, min_value=Decimal("0.01")
+    )
+    description = serializers.CharField(
+        max_length=500, required=False, allow_blank=True, default=""
+    )
+
+    def validate_sender_account_number(self, value: str) -> BankAccount:
+        user = self.context["request"].user
+        try:
+            return BankAccount.objects.only("id").get(account_number=value, user=user)
+        except BankAccount.DoesNotExist:
+            raise serializers.ValidationError(
+                _("You do not have a bank account with this number.")
+            )
+
+    def validate_receiver_account_number(self, value: str) -> BankAccount:
+        try:
+            return BankAccount.objects.only("id").get(account_number=value)
+        except BankAccount.DoesNotExist:
+            raise serializers.ValidationError(_("Bank account not found."))
+
+
+class BulkDepositImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=FILE_FORMATS, required=False)
+    all_or_nothing = serializers.BooleanField(default=False)
+    reference = serializers.CharField(max_length=255, required=False)
+
+    def validate(self, attrs: dict) -> dict:
+        if "file_format" not in attrs:
+            extension = attrs["file"].name.rsplit(".", 1)[-1].lower()
+            if extension not in FILE_FORMATS:
+                raise serializers.ValidationError(
+                    {"file_format": _("Could not infer the format from the file name.")}
+                )
+            attrs["file_format"] = extension
+        return attrs
+
+
+class StatementPeriodSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs: dict) -> dict:
+        start, end = attrs.get("start"), attrs.get("end")
+        if start and end and end < start:
+            raise serializers.ValidationError(
+                {"end": _("End date must not be before the start date.")}
+            )
+        return attrs
+
+
+class StatementQuerySerializer(StatementPeriodSerializer):
+    export = serializers.ChoiceField(choices=["csv", "ndjson"], default="csv")
+
+
+class StatementExportSerializer(StatementPeriodSerializer):
+    file_format = serializers.ChoiceField(choices=STATEMENT_FORMATS, default="pdf")
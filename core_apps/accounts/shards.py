@@ -0,0 +1,155 @@
+"""Sharded balances for hot accounts.
+
+Settlement, fee and large merchant accounts take part in so many postings
+that the row lock on ``BankAccount`` becomes a queue. A sharded account
+keeps its money in ``shard_count`` ``BalanceShard`` rows instead, and the
+posting engine leaves its ``BankAccount`` row unlocked: a credit goes to a
+random shard, and a debit takes the whole amount from the first shard, in a
+random rotation, that can cover it. Only when no single shard can does the
+debit lock every shard, in index order, and drain them in turn.
+
+The posting engine applies postings to the shards; this module turns
+sharding on and off and keeps the shards in shape. The balance of a
+sharded account is the sum of its shards. ``rebalance_shards`` evens the
+shards out again, so that debits keep finding a shard that covers them,
+and writes the sum to ``account_balance``, which may lag behind between
+rebalances.
+
+Locks are always taken account rows first and shard rows second, and the
+posting engine touches the accounts of one posting in primary-key order.
+"""
+
+from decimal import ROUND_DOWN, Decimal
+from typing import Any, List, Optional
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    DecimalField,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import BalanceShard, BankAccount
+
+TWO_PLACES = Decimal("0.01")
+
+
+class ShardingError(Exception):
+    pass
+
+
+def live_balance() -> Case:
+    """Annotation for the current balance of sharded and unsharded accounts."""
+    shard_total = (
+        BalanceShard.objects.filter(account=OuterRef("pk"))
+        .values("account")
+        .annotate(total=Sum("balance"))
+        .values("total")
+    )
+    return Case(
+        When(
+            is_sharded=True,
+            then=Coalesce(Subquery(shard_total), Value(Decimal("0.00"))),
+        ),
+        default=F("account_balance"),
+        output_field=DecimalField(max_digits=20, decimal_places=2),
+    )
+
+
+def split_evenly(total: Decimal, shard_count: int) -> List[Decimal]:
+    """``shard_count`` amounts summing to ``total``; the first takes the cents left."""
+    share = (total / shard_count).quantize(TWO_PLACES, rounding=ROUND_DOWN)
+    return [total - share * (shard_count - 1)] + [share] * (shard_count - 1)
+
+
+def enable_sharding(account_id: Any, shard_count: int) -> BankAccount:
+    if shard_count < 2:
+        raise ShardingError(_("A sharded account needs at least two shards."))
+
+    with transaction.atomic():
+        account = BankAccount.objects.select_for_update(no_key=True).get(pk=account_id)
+        if account.is_sharded:
+            raise ShardingError(
+                _("Account %(number)s is already sharded.")
+                % {"number": account.account_number}
+            )
+        BalanceShard.objects.bulk_create(
+            [
+                BalanceShard(account=account, shard_index=index, balance=balance)
+                for index, balance in enumerate(
+                    split_evenly(account.account_balance, shard_count)
+                )
+            ]
+        )
+        account.is_sharded = True
+        account.shard_count = shard_count
+        account.save(update_fields=["is_sharded", "shard_count", "updated_at"])
+    return account
+
+
+def disable_sharding(account_id: Any) -> BankAccount:
+    """Fold the shards back into ``account_balance`` and drop them."""
+    with transaction.atomic():
+        account = BankAccount.objects.select_for_update(no_key=True).get(pk=account_id)
+        if not account.is_sharded:
+            raise ShardingError(
+                _("Account %(number)s is not sharded.")
+                % {"number": account.account_number}
+            )
+        shards = BalanceShard.objects.filter(account=account)
+        balances = shards.select_for_update().order_by("shard_index")
+        account.account_balance = sum(
+            balances.values_list("balance", flat=True), Decimal("0.00")
+        )
+        shards.delete()
+        account.is_sharded = False
+        account.shard_count = 0
+        account.save(
+            update_fields=[
+                "account_balance",
+                "is_sharded",
+                "shard_count",
+                "updated_at",
+            ]
+        )
+    return account
+
+
+def rebalance_shards(account_id: Any) -> Optional[Decimal]:
+    """Spread the account's balance evenly over its shards and return it.
+
+    Returns ``None`` when the account is no longer sharded.
+    """
+    with transaction.atomic():
+        account = (
+            BankAccount.objects.select_for_update(no_key=True)
+            .filter(pk=account_id, is_sharded=True)
+            .only("id")
+            .first()
+        )
+        if account is None:
+            return None
+
+        shards = list(
+            BalanceShard.objects.select_for_update()
+            .filter(account=account)
+            .order_by("shard_index")
+        )
+        total = sum((shard.balance for shard in shards), Decimal("0.00"))
+        now = timezone.now()
+        for shard, balance in zip(shards, split_evenly(total, len(shards))):
+            shard.balance = balance
+            shard.updated_at = now
+        BalanceShard.objects.bulk_update(shards, ["balance", "updated_at"])
+        BankAccount.objects.filter(pk=account_id).update(
+            account_balance=total, updated_at=now
+        )
+    return total
@@ -0,0 +1,140 @@
+import tempfile
+from datetime import date, timedelta
+from typing import Dict, Optional
+from uuid import UUID
+from celery import chord, shared_task
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from loguru import logger
+from .interest import accrue_chunk, finish_run, plan_run
+from .ledger import iter_account_ranges, snapshot_balances
+from .models import BankAccount, InterestAccrualChunk, InterestAccrualRun
+from .shards import rebalance_shards
+from .statements import write_statement
+
+
+@shared_task(
+    bind=True,
+    name="export_account_statement",
+    soft_time_limit=30 * 60,
+    time_limit=35 * 60,
+)
+def export_account_statement(
+    self,
+    account_id: UUID,
+    file_format: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> Dict[str, str]:
+    """Write a statement to storage and return its storage name."""
+    account = BankAccount.objects.get(pk=account_id)
+    start_date = date.fromisoformat(start) if start else None
+    end_date = date.fromisoformat(end) if end else None
+
+    with tempfile.TemporaryFile() as statement_file:
+        write_statement(statement_file, account, file_format, start_date, end_date)
+        statement_file.seek(0)
+        name = default_storage.save(
+            f"statements/{account_id}/{self.request.id}.{file_format}",
+            File(statement_file),
+        )
+
+    logger.info(f"Statement for account {account.account_number} exported to {name}")
+    return {"path": name, "account_id": str(account_id), "file_format": file_format}
+
+
+@shared_task(
+    name="snapshot_account_balances", soft_time_limit=30 * 60, time_limit=35 * 60
+)
+def snapshot_account_balances(
+    as_of: Optional[str] = None, chunk_size: int = 2000
+) -> int:
+    """Snapshot every account's balance at the end of ``as_of`` (default yesterday)."""
+    as_of_date = (
+        date.fromisoformat(as_of) if as_of else timezone.localdate() - timedelta(days=1)
+    )
+    written = 0
+    for after_id, last_id in iter_account_ranges(chunk_size):
+        written += snapshot_balances(as_of_date, after_id, last_id)
+
+    logger.info(f"Wrote {written} balance snapshots for {as_of_date}")
+    return written
+
+
+@shared_task(name="accrue_savings_interest")
+def accrue_savings_interest(accrual_date: Optional[str] = None) -> None:
+    """Accrue one day's interest (default yesterday) on all savings accounts.
+
+    Safe to re-run for the same date: only chunks still pending are queued.
+    The daily run without a date also resumes earlier runs left running.
+    """
+    if accrual_date:
+        run_date = date.fromisoformat(accrual_date)
+    else:
+        run_date = timezone.localdate() - timedelta(days=1)
+        unfinished = InterestAccrualRun.objects.filter(
+            status=InterestAccrualRun.RunStatus.RUNNING, accrual_date__lt=run_date
+        ).order_by("accrual_date")
+        for run in unfinished:
+            logger.warning(f"Resuming the interest accrual for {run.accrual_date}")
+            queue_interest_chunks(run)
+
+    run = plan_run(run_date)
+    if run.status == InterestAccrualRun.RunStatus.COMPLETED:
+        logger.info(f"Interest for {run_date} has already been accrued")
+        return
+    queue_interest_chunks(run)
+
+
+def queue_interest_chunks(run: InterestAccrualRun) -> None:
+    pending = list(
+        run.chunks.filter(status=InterestAccrualChunk.ChunkStatus.PENDING).values_list(
+            "pk", flat=True
+        )
+    )
+    if not pending:
+        finish_interest_accrual.delay(str(run.pk))
+        return
+
+    chord(accrue_interest_chunk.s(str(chunk_id)) for chunk_id in pending)(
+        finish_interest_accrual.si(str(run.pk))
+    )
+
+
+@shared_task(bind=True, name="accrue_interest_chunk", max_retries=5)
+def accrue_interest_chunk(self, chunk_id: UUID) -> int:
+    try:
+        return accrue_chunk(chunk_id)
+    except Exception as e:
+        logger.error(f"Failed to accrue interest for chunk {chunk_id}: {str(e)}")
+        if self.request.retries >= self.max_retries:
+            # Raising would skip the chord callback; the chunk stays pending
+            # and the next daily run resumes it.
+            return 0
+        raise self.retry(exc=e, countdown=60)
+
+
+@shared_task(name="finish_interest_accrual")
+def finish_interest_accrual(run_id: UUID) -> None:
+    run = finish_run(run_id)
+    logger.info(
+        f"Interest accrual for {run.accrual_date} is {run.status}: "
+        f"{run.accounts_credited} accounts credited {run.total_interest}"
+    )
+
+
+@shared_task(name="rebalance_balance_shards")
+def rebalance_balance_shards() -> int:
+    """Even out the shards of every sharded account and refresh its balance."""
+    rebalanced = 0
+    sharded = BankAccount.objects.filter(is_sharded=True).values_list("pk", flat=True)
+    for account_id in sharded:
+        try:
+            if rebalance_shards(account_id) is not None:
+                rebalanced += 1
+        except Exception as e:
+            logger.error(f"Failed to rebalance account {account_id}: {str(e)}")
+
+    logger.info(f"Rebalanced the shards of {rebalanced} accounts")
+    return rebalanced
@@ -1,3 +1,1185 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from loguru import logger
+from rest_framework.test import APIClient
+
+from core_apps.common.models import IdempotencyKey
+from core_apps.common.tasks import purge_expired_idempotency_keys
+from core_apps.user_auth.models import User
+from core_apps.user_auth.tests import (
+    LOCAL_CACHES,
+    PASSWORD,
+    create_user,
+    median_duration,
+)
+from core_apps.user_auth.views import CustomUserViewSet
+from .bulk import DuplicateImportError, import_deposits
+from .closures import delete_or_close_user
+from .interest import accrue_chunk, plan_run
+from .models import (
+    BalanceShard,
+    BalanceSnapshot,
+    BankAccount,
+    DepositImport,
+    InterestAccrualRun,
+    LedgerEntry,
+    Transaction,
+)
+from .posting import (
+    InsufficientFundsError,
+    PostingError,
+    deposit,
+    transfer,
+    withdraw,
+)
+from .shards import (
+    ShardingError,
+    disable_sharding,
+    enable_sharding,
+    live_balance,
+    rebalance_shards,
+)
+from .statements import stream_statement, write_statement
+from .tasks import accrue_interest_chunk, accrue_savings_interest
+from .views import (
+    AccountStatementView,
+    BulkDepositImportView,
+    DepositView,
+    TransactionHistoryView,
+)
+
+
+def create_account(
+    user: Optional[Any] = None,
+    balance: Any = "0.00",
+    index: int = 1,
+    **extra_fields: Any,
+) -> BankAccount:
+    fields = {
+        "currency": BankAccount.AccountCurrency.NAIRA,
+        "account_type": BankAccount.AccountType.CURRENT,
+        "account_status": BankAccount.AccountStatus.ACTIVE,
+        **extra_fields,
+    }
+    return BankAccount.objects.create(
+        user=user or create_user(index),
+        account_number=f"{index:016d}",
+        account_balance=Decimal(balance),
+        **fields,
+    )
+
+
+def create_transfers(
+    sender: BankAccount, receiver: BankAccount, count: int
+) -> List[Transaction]:
+    return Transaction.objects.bulk_create(
+        Transaction(
+            amount=Decimal("1.00") + index,
+            description=f"Transfer {index}",
+            sender_account=sender,
+            receiver_account=receiver,
+            status=Transaction.TransactionStatus.COMPLETED,
+            transaction_type=Transaction.TransactionType.TRANSFER,
+        )
+        for index in range(count)
+    )
+
+
+def total_balance(accounts: List[BankAccount]) -> Decimal:
+    balances = (
+        BankAccount.objects.filter(pk__in=[a.pk for a in accounts])
+        .annotate(balance=live_balance())
+        .values_list("balance", flat=True)
+    )
+    return sum(balances, Decimal("0.00"))
+
+
+class PostingTests(TestCase):
+    def setUp(self) -> None:
+        self.sender = create_account(balance="100.00", index=1)
+        self.receiver = create_account(balance="0.00", index=2)
+
+    def test_transfer_moves_the_amount_and_records_both_sides(self) -> None:
+        posted = transfer(self.sender.pk, self.receiver.pk, "40.00")
+
+        self.sender.refresh_from_db()
+        self.receiver.refresh_from_db()
+        self.assertEqual(self.sender.account_balance, Decimal("60.00"))
+        self.assertEqual(self.receiver.account_balance, Decimal("40.00"))
+        self.assertEqual(posted.status, Transaction.TransactionStatus.COMPLETED)
+        self.assertEqual(
+            set(posted.ledger_entries.values_list("account_id", "entry_type")),
+            {
+                (self.sender.pk, LedgerEntry.EntryType.DEBIT),
+                (self.receiver.pk, LedgerEntry.EntryType.CREDIT),
+            },
+        )
+
+    def test_deposit_and_withdrawal_post_against_the_bank(self) -> None:
+        deposit(self.receiver.pk, "25.50")
+        withdraw(self.receiver.pk, "5.50")
+
+        self.receiver.refresh_from_db()
+        self.assertEqual(self.receiver.account_balance, Decimal("20.00"))
+        self.assertEqual(LedgerEntry.objects.filter(account=None).count(), 2)
+
+    def test_overdraft_is_rejected_without_writing(self) -> None:
+        with self.assertRaisesMessage(
+            InsufficientFundsError,
+            f"Insufficient funds in account {self.sender.account_number}.",
+        ):
+            transfer(self.sender.pk, self.receiver.pk, "100.01")
+
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(total_balance([self.sender]), Decimal("100.00"))
+
+    def test_inactive_account_is_rejected(self) -> None:
+        BankAccount.objects.filter(pk=self.receiver.pk).update(
+            account_status=BankAccount.AccountStatus.INACTIVE
+        )
+
+        with self.assertRaisesMessage(
+            PostingError, f"Account {self.receiver.account_number} is not active."
+        ):
+            deposit(self.receiver.pk, "10.00")
+
+    def test_invalid_transfers_are_rejected(self) -> None:
+        dollars = create_account(index=3, currency=BankAccount.AccountCurrency.DOLLAR)
+        for receiver_id, amount in [
+            (self.sender.pk, "10.00"),
+            (dollars.pk, "10.00"),
+            (self.receiver.pk, "0"),
+            (self.receiver.pk, "ten"),
+        ]:
+            with self.subTest(receiver_id=receiver_id, amount=amount):
+                with self.assertRaises(PostingError):
+                    transfer(self.sender.pk, receiver_id, amount)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+@mock.patch.object(DepositView, "throttle_classes", [])
+@mock.patch.object(BulkDepositImportView, "throttle_classes", [])
+class IdempotentPostingTests(TestCase):
+    def setUp(self) -> None:
+        self.account = create_account(index=1)
+        self.teller = create_user(100, role=User.RoleChoices.TELLER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teller)
+
+    def post_deposit(self, key: str, amount: str = "10.00") -> Any:
+        return self.client.post(
+            reverse("account_deposit"),
+            {"account_number": self.account.account_number, "amount": amount},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def age_keys(self) -> None:
+        IdempotencyKey.objects.update(
+            updated_at=timezone.now() - timedelta(minutes=10)
+        )
+
+    def test_retry_replays_the_stored_response(self) -> None:
+        first = self.post_deposit("deposit-1")
+        retry = self.post_deposit("deposit-1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(total_balance([self.account]), Decimal("10.00"))
+
+    def test_reused_key_with_another_body_is_rejected(self) -> None:
+        self.post_deposit("deposit-1")
+
+        self.assertEqual(self.post_deposit("deposit-1", "20.00").status_code, 422)
+
+    def test_key_is_completed_with_the_posting(self) -> None:
+        self.post_deposit("deposit-1")
+
+        record = IdempotencyKey.objects.get()
+        self.assertEqual(record.status, IdempotencyKey.Status.COMPLETED)
+
+        # An error after the posting committed must not free the key again
+        view = DepositView()
+        view.idempotency_record = record
+        view.release_idempotency_key()
+        self.assertTrue(IdempotencyKey.objects.filter(pk=record.pk).exists())
+
+    def test_failed_posting_releases_the_key(self) -> None:
+        self.client.raise_request_exception = False
+        with mock.patch(
+            "core_apps.accounts.views.TransactionSerializer",
+            side_effect=RuntimeError("boom"),
+        ):
+            self.assertEqual(self.post_deposit("deposit-1").status_code, 500)
+
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.post_deposit("deposit-1").status_code, 201)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_stale_in_progress_key_is_taken_over(self) -> None:
+        # The request dies without committing or releasing anything
+        self.client.raise_request_exception = False
+        with mock.patch.object(DepositView, "release_idempotency_key"):
+            with mock.patch.object(
+                DepositView, "posting", side_effect=RuntimeError("boom")
+            ):
+                self.post_deposit("deposit-1")
+
+        self.assertEqual(self.post_deposit("deposit-1").status_code, 409)
+
+        self.age_keys()
+        self.assertEqual(self.post_deposit("deposit-1").status_code, 201)
+        self.assertEqual(self.post_deposit("deposit-1").status_code, 201)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_slow_request_loses_a_key_taken_over_by_a_retry(self) -> None:
+        def slow_deposit(*args: Any, **kwargs: Any) -> Transaction:
+            posted = deposit(*args, **kwargs)
+            # A retry takes the key over while this request is still running
+            IdempotencyKey.objects.update(updated_at=timezone.now())
+            return posted
+
+        with mock.patch.object(DepositView, "posting", side_effect=slow_deposit):
+            self.assertEqual(self.post_deposit("deposit-1").status_code, 409)
+
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(total_balance([self.account]), Decimal("0.00"))
+        self.assertEqual(
+            IdempotencyKey.objects.get().status, IdempotencyKey.Status.IN_PROGRESS
+        )
+
+    def test_purge_removes_stale_in_progress_keys(self) -> None:
+        IdempotencyKey.objects.create(user=self.teller, key="stale", fingerprint="x")
+        self.post_deposit("deposit-1")
+        IdempotencyKey.objects.filter(key="stale").update(
+            updated_at=timezone.now() - timedelta(minutes=10)
+        )
+
+        self.assertEqual(purge_expired_idempotency_keys(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().key, "deposit-1")
+
+    def test_bulk_import_retry_is_replayed(self) -> None:
+        manager = create_user(101, role=User.RoleChoices.BRANCH_MANAGER)
+        self.client.force_authenticate(manager)
+        content = f"account_number,amount\n{self.account.account_number},5.00\n"
+
+        for _ in range(2):
+            response = self.client.post(
+                reverse("deposit_import"),
+                {"file": SimpleUploadedFile("payroll.csv", content.encode())},
+                HTTP_IDEMPOTENCY_KEY="payroll-1",
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_bulk_import_is_fingerprinted_without_reading_the_body(self) -> None:
+        self.client.force_authenticate(
+            create_user(101, role=User.RoleChoices.BRANCH_MANAGER)
+        )
+        rows = f"{self.account.account_number},0.01\n" * 100
+        payroll = f"account_number,amount\n{rows}"
+
+        def post(content: str) -> Any:
+            return self.client.post(
+                reverse("deposit_import"),
+                {"file": SimpleUploadedFile("payroll.csv", content.encode())},
+                HTTP_IDEMPOTENCY_KEY="payroll-1",
+            )
+
+        self.assertEqual(post(payroll).status_code, 200)
+        self.assertEqual(post(payroll)["Idempotent-Replayed"], "true")
+        self.assertEqual(post(payroll + rows).status_code, 422)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+@mock.patch.object(BulkDepositImportView, "throttle_classes", [])
+class BulkDepositImportTests(TransactionTestCase):
+    # The staging table is dropped on commit, so every import needs its own
+    # committed transaction.
+
+    def setUp(self) -> None:
+        self.first = create_account(index=1)
+        self.second = create_account(index=2)
+
+    def import_file(self, content: str, **kwargs: Any) -> Any:
+        return import_deposits(io.BytesIO(content.encode()), "csv", **kwargs)
+
+    def payroll(self, amount: str = "5.00") -> str:
+        return (
+            "account_number,amount\n"
+            f"{self.first.account_number},{amount}\n"
+            f"{self.second.account_number},{amount}\n"
+        )
+
+    def test_import_posts_and_records_the_file(self) -> None:
+        report = self.import_file(self.payroll())
+
+        self.assertEqual(report["posted"], 2)
+        self.assertEqual(total_balance([self.first, self.second]), Decimal("10.00"))
+        batch = DepositImport.objects.get()
+        self.assertEqual(batch.reference, report["reference"])
+        self.assertEqual(batch.reference, batch.file_digest)
+        self.assertEqual(batch.deposits_posted, 2)
+
+    def test_same_file_is_not_posted_twice(self) -> None:
+        self.import_file(self.payroll())
+
+        with self.assertRaises(DuplicateImportError):
+            self.import_file(self.payroll())
+
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(total_balance([self.first, self.second]), Decimal("10.00"))
+
+    def test_reference_identifies_the_batch(self) -> None:
+        self.import_file(self.payroll(), reference="payroll-2026-09")
+        self.import_file(self.payroll(), reference="payroll-2026-10")
+
+        with self.assertRaises(DuplicateImportError):
+            self.import_file(self.payroll("6.00"), reference="payroll-2026-10")
+
+        self.assertEqual(total_balance([self.first, self.second]), Decimal("20.00"))
+
+    def test_rejected_all_or_nothing_file_can_be_fixed_and_reposted(self) -> None:
+        content = self.payroll() + "9999999999999999,5.00\n"
+
+        report = self.import_file(content, all_or_nothing=True, reference="batch")
+
+        self.assertEqual(report["posted"], 0)
+        self.assertFalse(DepositImport.objects.exists())
+        report = self.import_file(self.payroll(), reference="batch")
+        self.assertEqual(report["posted"], 2)
+
+    def test_balance_overflow_is_a_validation_error(self) -> None:
+        BankAccount.objects.filter(pk=self.first.pk).update(
+            account_balance=Decimal("999999999999999999.00")
+        )
+
+        with self.assertRaisesMessage(ValueError, "overflow"):
+            self.import_file(self.payroll())
+
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(DepositImport.objects.exists())
+        self.assertEqual(total_balance([self.second]), Decimal("0.00"))
+
+    def test_view_rejects_a_reupload(self) -> None:
+        client = APIClient()
+        client.force_authenticate(
+            create_user(100, role=User.RoleChoices.BRANCH_MANAGER)
+        )
+
+        def upload() -> Any:
+            return client.post(
+                reverse("deposit_import"),
+                {"file": SimpleUploadedFile("payroll.csv", self.payroll().encode())},
+            )
+
+        self.assertEqual(upload().status_code, 200)
+        self.assertEqual(upload().status_code, 409)
+        self.assertEqual(Transaction.objects.count(), 2)
+
+
+class StatementMemoryMixin:
+    def measure_statement(self, account: BankAccount, file_format: str) -> int:
+        """Return the peak traced memory while streaming the statement."""
+        tracemalloc.start()
+        try:
+            for _ in stream_statement(account, file_format):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+@mock.patch.object(AccountStatementView, "throttle_classes", [])
+class StatementTests(StatementMemoryMixin, TestCase):
+    def setUp(self) -> None:
+        self.account = create_account(index=1)
+        self.other = create_account(index=2)
+
+    def read_csv(self, **kwargs: Any) -> List[Dict[str, str]]:
+        content = "".join(stream_statement(self.account, "csv", **kwargs))
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_csv_lists_both_directions_in_order(self) -> None:
+        sent = create_transfers(self.account, self.other, 2)
+        received = create_transfers(self.other, self.account, 1)
+        ordered = sorted(sent + received, key=lambda t: (t.created_at, t.id))
+
+        rows = self.read_csv()
+
+        self.assertEqual(
+            [row["reference"] for row in rows], [str(t.id) for t in ordered]
+        )
+        directions = {row["reference"]: row["direction"] for row in rows}
+        self.assertEqual(directions[str(sent[0].id)], "debit")
+        self.assertEqual(directions[str(received[0].id)], "credit")
+        self.assertEqual(
+            {row["counterparty_account"] for row in rows}, {self.other.account_number}
+        )
+
+    def test_period_bounds_are_inclusive_days(self) -> None:
+        transfers = create_transfers(self.account, self.other, 3)
+        for transfer_row, day in zip(transfers, [1, 2, 3]):
+            Transaction.objects.filter(pk=transfer_row.pk).update(
+                created_at=timezone.make_aware(datetime(2026, 9, day, 23, 59))
+            )
+
+        rows = self.read_csv(start=date(2026, 9, 2), end=date(2026, 9, 2))
+
+        self.assertEqual([row["reference"] for row in rows], [str(transfers[1].id)])
+
+    def test_ndjson_has_one_object_per_line(self) -> None:
+        create_transfers(self.account, self.other, 3)
+
+        lines = "".join(stream_statement(self.account, "ndjson")).splitlines()
+
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])["direction"], "debit")
+
+    def test_rows_are_not_read_until_the_stream_is_consumed(self) -> None:
+        create_transfers(self.account, self.other, 3)
+
+        with self.assertNumQueries(0):
+            stream = stream_statement(self.account, "ndjson")
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(stream)), 3)
+
+    def test_pdf_statement_is_written_page_by_page(self) -> None:
+        create_transfers(self.account, self.other, 120)
+
+        with io.BytesIO() as file:
+            write_statement(file, self.account, "pdf")
+            content = file.getvalue()
+
+        self.assertTrue(content.startswith(b"%PDF"))
+        self.assertTrue(content.rstrip().endswith(b"%%EOF"))
+        self.assertGreater(content.count(b"/Type /Page /"), 1)
+
+    def test_view_streams_the_owners_statement(self) -> None:
+        create_transfers(self.account, self.other, 2)
+        client = APIClient()
+        client.force_authenticate(self.account.user)
+        url = reverse("account_statement", args=[self.account.pk])
+
+        response = client.get(url, HTTP_ACCEPT="text/csv")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(content.splitlines()), 3)
+
+        other_url = reverse("account_statement", args=[self.other.pk])
+        self.assertEqual(client.get(other_url).status_code, 404)
+
+    @mock.patch("core_apps.accounts.statements.STATEMENT_CHUNK_SIZE", 100)
+    def test_memory_does_not_grow_with_the_history(self) -> None:
+        create_transfers(self.account, self.other, 200)
+        small = self.measure_statement(self.account, "csv")
+
+        create_transfers(self.account, self.other, 2000)
+        large = self.measure_statement(self.account, "csv")
+
+        self.assertLess(large, small * 2)
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+class StatementExportBenchmark(StatementMemoryMixin, TestCase):
+    """Streaming time and peak Python memory for a long statement."""
+
+    rows = int(os.getenv("BENCHMARK_STATEMENT_ROWS", "200000"))
+
+    def test_statement_streaming(self) -> None:
+        account = create_account(index=1)
+        other = create_account(index=2)
+        for start in range(0, self.rows, 10000):
+            create_transfers(account, other, min(10000, self.rows - start))
+
+        for file_format in ["csv", "ndjson"]:
+            started = time.perf_counter()
+            peak = self.measure_statement(account, file_format)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"{file_format} statement of {self.rows} rows: "
+                f"{self.rows / elapsed:.0f} rows/s, peak {peak / 2**20:.1f} MB"
+            )
+
+        started = time.perf_counter()
+        with tempfile.TemporaryFile() as file:
+            write_statement(file, account, "pdf")
+            size = file.tell()
+        logger.info(
+            f"pdf statement of {self.rows} rows: {size / 2**20:.1f} MB "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+
+HISTORY_INDEXES = {
+    "sender_account": "txn_sender_created_idx",
+    "receiver_account": "txn_receiver_created_idx",
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+@mock.patch.object(TransactionHistoryView, "throttle_classes", [])
+class TransactionHistoryTests(TestCase):
+    def setUp(self) -> None:
+        self.account = create_account(index=1)
+        self.other = create_account(index=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.account.user)
+        self.url = reverse("account_transactions", args=[self.account.pk])
+
+    def get_page(self, url: str, **params: Any) -> Dict[str, Any]:
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["transactions"]
+
+    def test_pages_list_both_directions_newest_first(self) -> None:
+        sent = create_transfers(self.account, self.other, 13)
+        received = create_transfers(self.other, self.account, 12)
+        create_transfers(self.other, create_account(index=3), 5)
+        expected = sorted(
+            sent + received, key=lambda t: (t.created_at, t.id), reverse=True
+        )
+
+        results: List[Dict[str, Any]] = []
+        page = self.get_page(self.url, page_size=10)
+        while True:
+            results.extend(page["results"])
+            if not page["next"]:
+                break
+            page = self.get_page(page["next"])
+
+        self.assertEqual([row["id"] for row in results], [str(t.id) for t in expected])
+        directions = {row["id"]: row["direction"] for row in results}
+        self.assertEqual(directions[str(sent[0].id)], "debit")
+        self.assertEqual(directions[str(received[0].id)], "credit")
+
+    def test_previous_link_returns_the_previous_page(self) -> None:
+        create_transfers(self.account, self.other, 25)
+
+        first = self.get_page(self.url, page_size=10)
+        second = self.get_page(first["next"])
+
+        self.assertIsNone(first["previous"])
+        self.assertEqual(self.get_page(second["previous"])["results"], first["results"])
+
+    def test_deep_pages_run_the_same_queries_as_the_first(self) -> None:
+        create_transfers(self.account, self.other, 30)
+        first = self.get_page(self.url, page_size=10)
+
+        with CaptureQueriesContext(connection) as first_page:
+            self.get_page(self.url, page_size=10)
+        with CaptureQueriesContext(connection) as deep_page:
+            self.get_page(self.get_page(first["next"])["next"])
+
+        self.assertEqual(len(first_page), 3)
+        self.assertEqual(len(deep_page), len(first_page))
+        self.assertFalse(any("COUNT(" in q["sql"] for q in first_page.captured_queries))
+
+    def test_approximate_count_is_opt_in(self) -> None:
+        create_transfers(self.account, self.other, 3)
+
+        self.assertIsNone(self.get_page(self.url)["count"])
+        self.assertIsInstance(self.get_page(self.url, count="approx")["count"], int)
+
+    def test_page_heads_are_read_from_the_account_indexes(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for field, index_name in HISTORY_INDEXES.items():
+            with self.subTest(field=field):
+                plan = (
+                    Transaction.objects.filter(**{field: self.account})
+                    .order_by("-created_at", "-pk")
+                    .values_list("pk", "created_at")[:11]
+                    .explain()
+                )
+                self.assertIn(index_name, plan)
+                self.assertNotIn("Sort", plan)
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+@override_settings(CACHES=LOCAL_CACHES)
+@mock.patch.object(TransactionHistoryView, "throttle_classes", [])
+class TransactionHistoryBenchmark(TestCase):
+    """First- and deep-page latency of a busy account's history."""
+
+    transactions = int(os.getenv("BENCHMARK_TRANSACTIONS", "500000"))
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.account = create_account(index=1)
+        cls.other = create_account(index=2)
+        for start in range(0, cls.transactions, 10000):
+            count = min(10000, cls.transactions - start)
+            create_transfers(cls.account, cls.other, count // 2)
+            create_transfers(cls.other, cls.account, count - count // 2)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Transaction._meta.db_table}")
+
+    def test_history_latency(self) -> None:
+        client = APIClient()
+        client.force_authenticate(self.account.user)
+        url = reverse("account_transactions", args=[self.account.pk])
+
+        def get(page_url: str) -> Dict[str, Any]:
+            return client.get(page_url).json()["transactions"]
+
+        deep = get(f"{url}?page_size=100")
+        for _ in range(50):
+            deep = get(deep["next"])
+
+        first_latency = median_duration(lambda: get(f"{url}?page_size=100"), 20)
+        deep_latency = median_duration(lambda: get(deep["next"]), 20)
+        logger.info(
+            f"History of {self.transactions} transactions: first page "
+            f"{first_latency * 1000:.2f} ms, page 52 {deep_latency * 1000:.2f} ms"
+        )
+        self.assertLess(deep_latency, first_latency * 3)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+@mock.patch.object(CustomUserViewSet, "throttle_classes", [])
+class UserClosureTests(TestCase):
+    def setUp(self) -> None:
+        self.account = create_account(index=1)
+        self.user = self.account.user
+
+    def assert_closed(self) -> None:
+        self.user.refresh_from_db()
+        self.account.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(
+            self.account.account_status, BankAccount.AccountStatus.INACTIVE
+        )
+        self.assertEqual(LedgerEntry.objects.count(), 2)
+        with self.assertRaises(PostingError):
+            deposit(self.account.pk, "1.00")
+
+    def test_user_without_history_is_deleted(self) -> None:
+        self.assertTrue(delete_or_close_user(self.user))
+
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(BankAccount.objects.exists())
+
+    def test_user_with_history_is_closed(self) -> None:
+        deposit(self.account.pk, "10.00")
+
+        self.assertFalse(delete_or_close_user(self.user))
+
+        self.assert_closed()
+        self.assertEqual(total_balance([self.account]), Decimal("10.00"))
+
+    def test_deleting_your_own_user_closes_it(self) -> None:
+        deposit(self.account.pk, "10.00")
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.delete(
+            reverse("user-me"), {"current_password": PASSWORD}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assert_closed()
+
+    def test_admin_action_closes_users(self) -> None:
+        deposit(self.account.pk, "10.00")
+        admin_user = create_user(100, is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+
+        response = self.client.post(
+            reverse("admin:user_auth_user_changelist"),
+            {"action": "close_users", "_selected_action": [self.user.pk]},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assert_closed()
+
+
+def backdate(posted: Transaction, day: date) -> None:
+    """Move a posted transaction and its ledger entries to noon on ``day``."""
+    created_at = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    created_at += timedelta(hours=12)
+    Transaction.objects.filter(pk=posted.pk).update(created_at=created_at)
+    LedgerEntry.objects.filter(transaction=posted).update(created_at=created_at)
+
+
+@override_settings(SAVINGS_INTEREST_RATE=Decimal("0.035"))
+class InterestAccrualTests(TestCase):
+    accrual_date = date(2026, 9, 10)
+
+    def setUp(self) -> None:
+        self.account = create_account(
+            index=1, account_type=BankAccount.AccountType.SAVINGS
+        )
+        backdate(deposit(self.account.pk, "365000.00"), date(2026, 9, 9))
+
+    def accrue(self, accrual_date: date) -> InterestAccrualRun:
+        run = plan_run(accrual_date)
+        for chunk in run.chunks.all():
+            accrue_chunk(chunk.pk)
+        return run
+
+    def interest(self) -> List[Decimal]:
+        return list(
+            Transaction.objects.filter(
+                transaction_type=Transaction.TransactionType.INTEREST
+            ).values_list("amount", flat=True)
+        )
+
+    def test_interest_is_paid_on_the_balance_at_the_end_of_the_day(self) -> None:
+        # Money that arrived after the accrual date earns nothing for it
+        deposit(self.account.pk, "1000000.00")
+
+        self.accrue(self.accrual_date)
+
+        self.assertEqual(self.interest(), [Decimal("35.00")])
+        self.assertEqual(total_balance([self.account]), Decimal("1365035.00"))
+
+    def test_snapshot_of_the_day_is_used(self) -> None:
+        BalanceSnapshot.objects.create(
+            account=self.account, as_of=self.accrual_date, balance=Decimal("730000.00")
+        )
+
+        self.accrue(self.accrual_date)
+
+        self.assertEqual(self.interest(), [Decimal("70.00")])
+
+    def test_chunk_is_posted_once(self) -> None:
+        run = self.accrue(self.accrual_date)
+        for chunk in run.chunks.all():
+            self.assertEqual(accrue_chunk(chunk.pk), 0)
+
+        self.assertEqual(len(self.interest()), 1)
+
+    def test_exhausted_chunk_returns_so_the_chord_finishes(self) -> None:
+        run = plan_run(self.accrual_date)
+        chunk = run.chunks.get()
+
+        with mock.patch(
+            "core_apps.accounts.tasks.accrue_chunk", side_effect=RuntimeError("boom")
+        ) as accrue:
+            self.assertEqual(accrue_interest_chunk.apply(args=(chunk.pk,)).get(), 0)
+
+        self.assertEqual(accrue.call_count, accrue_interest_chunk.max_retries + 1)
+        chunk.refresh_from_db()
+        self.assertEqual(chunk.status, chunk.ChunkStatus.PENDING)
+
+    def test_daily_run_resumes_earlier_unfinished_runs(self) -> None:
+        stale = plan_run(self.accrual_date)
+        finished = self.accrue(date(2026, 9, 11))
+        InterestAccrualRun.objects.filter(pk=finished.pk).update(
+            status=InterestAccrualRun.RunStatus.COMPLETED
+        )
+
+        with mock.patch("core_apps.accounts.tasks.timezone.localdate") as localdate:
+            localdate.return_value = date(2026, 9, 13)
+            with mock.patch("core_apps.accounts.tasks.queue_interest_chunks") as queue:
+                accrue_savings_interest()
+
+        queued = [call.args[0].accrual_date for call in queue.call_args_list]
+        self.assertEqual(queued, [stale.accrual_date, date(2026, 9, 12)])
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+class InterestAccrualBenchmark(TestCase):
+    """Interest accrual throughput over many savings accounts."""
+
+    accounts = int(os.getenv("BENCHMARK_SAVINGS_ACCOUNTS", "100000"))
+    accrual_date = date(2026, 9, 10)
+
+    def test_accrual_throughput(self) -> None:
+        user = create_user()
+        accounts = BankAccount.objects.bulk_create(
+            (
+                BankAccount(
+                    user=user,
+                    account_number=f"{index:016d}",
+                    account_balance=Decimal("50000.00"),
+                    account_type=BankAccount.AccountType.SAVINGS,
+                    account_status=BankAccount.AccountStatus.ACTIVE,
+                    currency=BankAccount.AccountCurrency.NAIRA,
+                )
+                for index in range(1, self.accounts + 1)
+            ),
+            batch_size=5000,
+        )
+        BalanceSnapshot.objects.bulk_create(
+            (
+                BalanceSnapshot(
+                    account=account,
+                    as_of=self.accrual_date,
+                    balance=Decimal("50000.00"),
+                )
+                for account in accounts
+            ),
+            batch_size=5000,
+        )
+
+        started = time.perf_counter()
+        run = plan_run(self.accrual_date)
+        credited = sum(accrue_chunk(chunk.pk) for chunk in run.chunks.all())
+        elapsed = time.perf_counter() - started
+
+        logger.info(
+            f"Accrued interest on {credited} savings accounts in {elapsed:.1f}s: "
+            f"{credited / elapsed:.0f} accounts/s"
+        )
+        self.assertEqual(credited, self.accounts)
+
+
+class ConcurrentTransferMixin:
+    """Random transfers among a few accounts from a pool of threads."""
+
+    def run_transfers(
+        self, accounts: List[BankAccount], transfers: int, workers: int
+    ) -> float:
+        def post(_: int) -> None:
+            sender, receiver = random.sample(accounts, 2)
+            try:
+                transfer(sender.pk, receiver.pk, random.randint(1, 500))
+            except InsufficientFundsError:
+                pass
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(post, range(transfers)))
+        return time.perf_counter() - started
+
+
+class ConcurrentTransferTests(ConcurrentTransferMixin, TransactionTestCase):
+    def test_concurrent_transfers_conserve_the_total_balance(self) -> None:
+        accounts = [create_account(balance="1000.00", index=i) for i in range(1, 5)]
+
+        self.run_transfers(accounts, transfers=200, workers=8)
+
+        self.assertEqual(total_balance(accounts), Decimal("4000.00"))
+        self.assertFalse(BankAccount.objects.filter(account_balance__lt=0).exists())
+        debits = LedgerEntry.objects.filter(entry_type=LedgerEntry.EntryType.DEBIT)
+        self.assertEqual(debits.count(), Transaction.objects.count())
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+class TransferLoadBenchmark(ConcurrentTransferMixin, TransactionTestCase):
+    """Transfer throughput among a small set of hot accounts."""
+
+    accounts = int(os.getenv("BENCHMARK_ACCOUNTS", "5"))
+    transfers = int(os.getenv("BENCHMARK_TRANSFERS", "5000"))
+    workers = int(os.getenv("BENCHMARK_WORKERS", "32"))
+
+    def test_transfer_throughput(self) -> None:
+        accounts = [
+            create_account(balance="100000.00", index=i)
+            for i in range(1, self.accounts + 1)
+        ]
+        before = total_balance(accounts)
+
+        elapsed = self.run_transfers(accounts, self.transfers, self.workers)
+
+        logger.info(
+            f"{self.transfers} transfers among {self.accounts} accounts on "
+            f"{self.workers} threads: {self.transfers / elapsed:.0f} TPS"
+        )
+        self.assertEqual(total_balance(accounts), before)
+
+
+class ShardingTests(TestCase):
+    def setUp(self) -> None:
+        self.account = create_account(balance="100.01", index=1)
+
+    def get_live_balance(self) -> Decimal:
+        return (
+            BankAccount.objects.annotate(balance=live_balance())
+            .values_list("balance", flat=True)
+            .get(pk=self.account.pk)
+        )
+
+    def test_sharding_splits_and_folds_the_balance(self) -> None:
+        enable_sharding(self.account.pk, 4)
+
+        shards = BalanceShard.objects.filter(account=self.account)
+        self.assertEqual(
+            list(shards.order_by("shard_index").values_list("balance", flat=True)),
+            [Decimal("25.01"), Decimal("25.00"), Decimal("25.00"), Decimal("25.00")],
+        )
+
+        account = disable_sharding(self.account.pk)
+        self.assertEqual(account.account_balance, Decimal("100.01"))
+        self.assertFalse(shards.exists())
+
+    def test_postings_move_the_live_balance(self) -> None:
+        enable_sharding(self.account.pk, 4)
+
+        deposit(self.account.pk, "50.00")
+        withdraw(self.account.pk, "80.00")
+
+        self.assertEqual(self.get_live_balance(), Decimal("70.01"))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.account_balance, Decimal("100.01"))
+
+        self.assertEqual(rebalance_shards(self.account.pk), Decimal("70.01"))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.account_balance, Decimal("70.01"))
+
+    def test_withdrawal_spanning_shards_is_allowed_up_to_the_total(self) -> None:
+        enable_sharding(self.account.pk, 4)
+
+        withdraw(self.account.pk, "100.01")
+
+        self.assertEqual(self.get_live_balance(), Decimal("0.00"))
+        with self.assertRaises(InsufficientFundsError):
+            withdraw(self.account.pk, "0.01")
+
+    def test_errors_name_the_account(self) -> None:
+        with self.assertRaisesMessage(
+            ShardingError, f"Account {self.account.account_number} is not sharded."
+        ):
+            disable_sharding(self.account.pk)
+
+        enable_sharding(self.account.pk, 2)
+        with self.assertRaisesMessage(
+            ShardingError,
+            f"Account {self.account.account_number} is already sharded.",
+        ):
+            enable_sharding(self.account.pk, 2)
+
+    def test_admin_shows_the_live_balance(self) -> None:
+        enable_sharding(self.account.pk, 2)
+        deposit(self.account.pk, "9.99")
+        self.client.force_login(create_user(100, is_staff=True, is_superuser=True))
+
+        changelist = self.client.get(reverse("admin:accounts_bankaccount_changelist"))
+        change = self.client.get(
+            reverse("admin:accounts_bankaccount_change", args=[self.account.pk])
+        )
+
+        [row] = changelist.context["cl"].result_list
+        self.assertEqual(row.live_balance, Decimal("110.00"))
+        self.assertContains(changelist, "110.00")
+        self.assertContains(change, "110.00")
+        self.assertIn("account_balance", change.context["adminform"].readonly_fields)
+
+
+class BankAccountAdminTests(TestCase):
+    def setUp(self) -> None:
+        self.account = create_account(index=1)
+        create_account(index=2)
+        self.client.force_login(create_user(100, is_staff=True, is_superuser=True))
+        self.url = reverse("admin:accounts_bankaccount_changelist")
+
+    def search(self, term: str) -> List[BankAccount]:
+        response = self.client.get(self.url, {"q": term})
+        return list(response.context["cl"].result_list)
+
+    def test_search_matches_the_account_number(self) -> None:
+        self.assertEqual(self.search(self.account.account_number), [self.account])
+
+    def test_search_matches_the_customer_name_and_email(self) -> None:
+        self.assertEqual(self.search("User1"), [self.account])
+        self.assertEqual(self.search("user1@example.com"), [self.account])
+
+    def change_account(self, follow: bool = False, **data: Any) -> Any:
+        return self.client.post(
+            reverse("admin:accounts_bankaccount_change", args=[self.account.pk]),
+            {
+                "user": self.account.user_id,
+                "currency": self.account.currency,
+                "account_type": self.account.account_type,
+                "account_status": self.account.account_status,
+                "verification_date": "",
+                "verification_notes": "",
+                **data,
+            },
+            follow=follow,
+        )
+
+    def test_balance_cannot_be_edited(self) -> None:
+        deposit(self.account.pk, "10.00")
+
+        response = self.change_account(account_balance="999.00")
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(total_balance([self.account]), Decimal("10.00"))
+
+    def test_adjustment_is_posted_to_the_ledger(self) -> None:
+        self.change_account(balance_adjustment="25.00", adjustment_reason="Refund")
+        self.change_account(balance_adjustment="-5.00", adjustment_reason="Fee")
+
+        adjustments = Transaction.objects.filter(
+            transaction_type=Transaction.TransactionType.ADJUSTMENT
+        )
+        self.assertEqual(adjustments.count(), 2)
+        self.assertEqual(total_balance([self.account]), Decimal("20.00"))
+        self.assertEqual(LedgerEntry.objects.filter(account=self.account).count(), 2)
+
+    def test_adjustment_needs_a_reason_and_funds(self) -> None:
+        response = self.change_account(balance_adjustment="25.00")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.change_account(
+            balance_adjustment="-5.00", adjustment_reason="Fee", follow=True
+        )
+        self.assertContains(response, "Insufficient funds")
+        self.assertFalse(Transaction.objects.exists())
+
+
+class ShardedPostingMixin:
+    """Concurrent deposits and withdrawals against one hot account."""
+
+    def run_postings(self, account: BankAccount, postings: int, workers: int) -> float:
+        def post(index: int) -> None:
+            try:
+                if index % 2:
+                    withdraw(account.pk, "1.00")
+                else:
+                    deposit(account.pk, "1.00")
+            except InsufficientFundsError:
+                pass
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(post, range(postings)))
+        return time.perf_counter() - started
+
+    def ledger_balance(self, account: BankAccount) -> Decimal:
+        entries = LedgerEntry.objects.filter(account=account)
+        credits = entries.filter(entry_type=LedgerEntry.EntryType.CREDIT)
+        debits = entries.filter(entry_type=LedgerEntry.EntryType.DEBIT)
+        return (credits.aggregate(total=Sum("amount"))["total"] or 0) - (
+            debits.aggregate(total=Sum("amount"))["total"] or 0
+        )
+
+
+class ShardedConcurrencyTests(ShardedPostingMixin, TransactionTestCase):
+    def test_concurrent_postings_match_the_ledger(self) -> None:
+        account = create_account(index=1)
+        deposit(account.pk, "20.00")
+        enable_sharding(account.pk, 4)
+
+        self.run_postings(account, postings=200, workers=8)
+
+        self.assertEqual(total_balance([account]), self.ledger_balance(account))
+        self.assertFalse(BalanceShard.objects.filter(balance__lt=0).exists())
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+class ShardContentionBenchmark(ShardedPostingMixin, TransactionTestCase):
+    """Transfers from many accounts into one hot account, unsharded and sharded.
+
+    Each source account is only debited by its own transfers, so the hot
+    account is the one point of contention. Unsharded, every transfer waits
+    for its row lock and adding workers should not help; sharded, the
+    credits spread over the shards and throughput should grow with workers.
+    """
+
+    sources = int(os.getenv("BENCHMARK_SOURCE_ACCOUNTS", "64"))
+    transfers = int(os.getenv("BENCHMARK_TRANSFERS", "4000"))
+    worker_counts = [
+        int(count) for count in os.getenv("BENCHMARK_WORKER_COUNTS", "1,4,8").split(",")
+    ]
+    shards = int(os.getenv("BENCHMARK_SHARDS", "16"))
+    min_speedup = float(os.getenv("BENCHMARK_MIN_SHARD_SPEEDUP", "1.5"))
+    source_balance = Decimal("1000000.00")
+
+    def setUp(self) -> None:
+        self.next_index = 1
+
+    def create_accounts(self, count: int) -> List[BankAccount]:
+        accounts = [
+            create_account(balance=self.source_balance, index=index)
+            for index in range(self.next_index, self.next_index + count)
+        ]
+        self.next_index += count
+        return accounts
+
+    def run_hot_transfers(
+        self, sources: List[BankAccount], hot: BankAccount, workers: int
+    ) -> float:
+        def post(index: int) -> None:
+            try:
+                transfer(sources[index % len(sources)].pk, hot.pk, "1.00")
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(post, range(self.transfers)))
+        return time.perf_counter() - started
+
+    def assert_reconciled(self, sources: List[BankAccount], hot: BankAccount) -> None:
+        moved = Decimal(self.transfers)
+        self.assertEqual(total_balance([hot]), self.source_balance + moved)
+        self.assertEqual(self.ledger_balance(hot), moved)
+        self.assertEqual(
+            total_balance(sources), self.source_balance * len(sources) - moved
+        )
+        for source in sources:
+            self.assertEqual(
+                total_balance([source]) - self.source_balance,
+                self.ledger_balance(source),
+            )
+
+    def test_hot_account_throughput_scales_with_shards(self) -> None:
+        throughput: Dict[bool, Dict[int, float]] = {False: {}, True: {}}
+        for sharded in (False, True):
+            for workers in self.worker_counts:
+                sources = self.create_accounts(self.sources)
+                [hot] = self.create_accounts(1)
+                if sharded:
+                    enable_sharding(hot.pk, self.shards)
+
+                elapsed = self.run_hot_transfers(sources, hot, workers)
+
+                throughput[sharded][workers] = self.transfers / elapsed
+                self.assert_reconciled(sources, hot)
+
+        for workers in self.worker_counts:
+            logger.info(
+                f"{self.transfers} transfers from {self.sources} accounts into one "
+                f"on {workers} threads: {throughput[False][workers]:.0f} TPS "
+                f"unsharded, {throughput[True][workers]:.0f} TPS with "
+                f"{self.shards} shards"
+            )
+
+        fewest, most = min(self.worker_counts), max(self.worker_counts)
+        self.assertGreater(
+            throughput[True][most], throughput[True][fewest] * self.min_speedup
+        )
+        self.assertGreater(throughput[True][most], throughput[False][most])
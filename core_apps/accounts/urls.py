@@ -1,10 +1,46 @@
 from django.urls import path
-from .views import AccountVerificationView
+from .views import (
+    AccountStatementExportView,
+    AccountStatementView,
+    AccountVerificationView,
+    BulkDepositImportView,
+    DepositView,
+    StatementExportDownloadView,
+    TransactionHistoryView,
+    TransferView,
+    WithdrawalView,
+)
 
 urlpatterns = [
     path(
         "verify/<uuid:pk>/",
         AccountVerificationView.as_view(),
         name="account_verification",
-    )
+    ),
+    path("deposit/", DepositView.as_view(), name="account_deposit"),
+    path("withdraw/", WithdrawalView.as_view(), name="account_withdrawal"),
+    path("transfer/", TransferView.as_view(), name="account_transfer"),
+    path(
+        "deposits/import/", BulkDepositImportView.as_view(), name="deposit_import"
+    ),
+    path(
+        "<uuid:pk>/statement/",
+        AccountStatementView.as_view(),
+        name="account_statement",
+    ),
+    path(
+        "<uuid:pk>/statement/exports/",
+        AccountStatementExportView.as_view(),
+        name="account_statement_export",
+    ),
+    path(
+        "<uuid:pk>/transactions/",
+        TransactionHistoryView.as_view(),
+        name="account_transactions",
+    ),
+    path(
+        "statement-exports/<uuid:task_id>/",
+        StatementExportDownloadView.as_view(),
+        name="statement_export_download",
+    ),
 ]
@@ -1,17 +1,40 @@
 from typing import Any
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models import Q
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import generics, status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from core_apps.common.permissions import IsAccountExecutive
+from core_apps.common.idempotency import IdempotentMixin
+from core_apps.common.pagination import KeysetPagination
+from core_apps.common.permissions import IsAccountExecutive, IsBranchManager, IsTeller
 from core_apps.common.renderers import GenericJSONRenderer
+from .bulk import DuplicateImportError, import_deposits
 from .emails import send_full_activation_email
-from .models import BankAccount
-from .serializers import AccountVerificationSerializer
+from .filters import TransactionHistoryFilter
+from .models import BankAccount, Transaction
+from .posting import PostingError, deposit, transfer, withdraw
+from .serializers import (
+    AccountPostingSerializer,
+    AccountVerificationSerializer,
+    BulkDepositImportSerializer,
+    StatementExportSerializer,
+    StatementQuerySerializer,
+    TransactionHistorySerializer,
+    TransactionSerializer,
+    TransferSerializer,
+)
+from .statements import CONTENT_TYPES, stream_statement
+from .tasks import export_account_statement
 
 
-class AccountVerificationView(generics.UpdateAPIView):
+class AccountVerificationView(IdempotentMixin, generics.UpdateAPIView):
     queryset = BankAccount.objects.all()
     serializer_class = AccountVerificationSerializer
     renderer_classes = [GenericJSONRenderer]
@@ -62,11 +85,238 @@ class AccountVerificationView(generics.UpdateAPIView):
 
             send_full_activation_email(instance)
 
-        instance.save()
+        with transaction.atomic():
+            instance.save()
+            return self.store_idempotent_response(
+                Response(
+                    {
+                        "message": "Account verification status updated successfully.",
+                        "data": self.get_serializer(instance).data,
+                    }
+                )
+            )
+
+
+class DepositView(IdempotentMixin, generics.CreateAPIView):
+    serializer_class = AccountPostingSerializer
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "transaction"
+    permission_classes = [IsTeller]
+    posting = staticmethod(deposit)
+
+    def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            with transaction.atomic():
+                posted = self.posting(
+                    serializer.validated_data["account_number"].pk,
+                    serializer.validated_data["amount"],
+                    initiated_by=request.user,
+                    description=serializer.validated_data["description"],
+                )
+                return self.store_idempotent_response(
+                    Response(
+                        TransactionSerializer(posted).data,
+                        status=status.HTTP_201_CREATED,
+                    )
+                )
+        except PostingError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class WithdrawalView(DepositView):
+    posting = staticmethod(withdraw)
+
+
+class TransferView(IdempotentMixin, generics.CreateAPIView):
+    serializer_class = TransferSerializer
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "transaction"
+
+    def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            with transaction.atomic():
+                posted = transfer(
+                    serializer.validated_data["sender_account_number"].pk,
+                    serializer.validated_data["receiver_account_number"].pk,
+                    serializer.validated_data["amount"],
+                    initiated_by=request.user,
+                    description=serializer.validated_data["description"],
+                )
+                return self.store_idempotent_response(
+                    Response(
+                        TransactionSerializer(posted).data,
+                        status=status.HTTP_201_CREATED,
+                    )
+                )
+        except PostingError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BulkDepositImportView(IdempotentMixin, generics.GenericAPIView):
+    serializer_class = BulkDepositImportSerializer
+    renderer_classes = [GenericJSONRenderer]
+    parser_classes = [MultiPartParser]
+    object_label = "import"
+    permission_classes = [IsBranchManager]
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            with transaction.atomic():
+                report = import_deposits(
+                    serializer.validated_data["file"],
+                    serializer.validated_data["file_format"],
+                    initiated_by=request.user,
+                    all_or_nothing=serializer.validated_data["all_or_nothing"],
+                    reference=serializer.validated_data.get("reference"),
+                )
+                return self.store_idempotent_response(
+                    Response(report, status=status.HTTP_200_OK)
+                )
+        except DuplicateImportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AccountAccessMixin:
+    """Customers reach their own accounts, bank staff reach every account."""
+
+    staff_roles = ["account_executive", "teller", "branch_manager"]
+
+    def get_account_queryset(self) -> QuerySet:
+        queryset = BankAccount.objects.only("id", "user", "account_number")
+        if getattr(self.request.user, "role", None) in self.staff_roles:
+            return queryset
+        return queryset.filter(user=self.request.user)
+
+    def get_account(self) -> BankAccount:
+        if not hasattr(self, "_account"):
+            self._account = get_object_or_404(
+                self.get_account_queryset(), pk=self.kwargs["pk"]
+            )
+        return self._account
+
+
+class AccountStatementView(AccountAccessMixin, generics.GenericAPIView):
+    serializer_class = StatementQuerySerializer
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "statement"
+
+    def perform_content_negotiation(self, request: Request, force: bool = False):
+        # The statement itself bypasses the renderers, so a client asking for
+        # text/csv must not be turned away with a 406.
+        return super().perform_content_negotiation(request, force=True)
 
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> StreamingHttpResponse:
+        account = self.get_account()
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        file_format = serializer.validated_data["export"]
+
+        response = StreamingHttpResponse(
+            stream_statement(
+                account,
+                file_format,
+                serializer.validated_data.get("start"),
+                serializer.validated_data.get("end"),
+            ),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="statement-{account.account_number}.{file_format}"'
+        )
+        return response
+
+
+class AccountStatementExportView(AccountAccessMixin, generics.GenericAPIView):
+    serializer_class = StatementExportSerializer
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "statement_export"
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        account = self.get_account()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        start = serializer.validated_data.get("start")
+        end = serializer.validated_data.get("end")
+
+        task = export_account_statement.delay(
+            str(account.pk),
+            serializer.validated_data["file_format"],
+            start.isoformat() if start else None,
+            end.isoformat() if end else None,
+        )
         return Response(
-            {
-                "message": "Account verification status updated successfully.",
-                "data": self.get_serializer(instance).data,
-            }
+            {"task_id": task.id, "status": "pending"}, status=status.HTTP_202_ACCEPTED
+        )
+
+
+class StatementExportDownloadView(AccountAccessMixin, generics.GenericAPIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "statement_export"
+
+    def perform_content_negotiation(self, request: Request, force: bool = False):
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request: Request, task_id: Any, *args: Any, **kwargs: Any) -> Any:
+        result = export_account_statement.AsyncResult(str(task_id))
+        if not result.ready():
+            return Response(
+                {"task_id": str(task_id), "status": result.status.lower()},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        if not result.successful():
+            return Response(
+                {"error": "The statement export failed, please request a new one."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        export = result.result
+        account = self.get_account_queryset().filter(pk=export["account_id"]).first()
+        if account is None or not default_storage.exists(export["path"]):
+            raise Http404
+
+        return FileResponse(
+            default_storage.open(export["path"], "rb"),
+            as_attachment=True,
+            filename=f"statement-{account.account_number}.{export['file_format']}",
+            content_type=CONTENT_TYPES[export["file_format"]],
         )
+
+
+class TransactionHistoryView(AccountAccessMixin, generics.ListAPIView):
+    serializer_class = TransactionHistorySerializer
+    renderer_classes = [GenericJSONRenderer]
+    pagination_class = KeysetPagination
+    filterset_class = TransactionHistoryFilter
+    object_label = "transactions"
+
+    def get_queryset(self) -> QuerySet:
+        if getattr(self, "swagger_fake_view", False):
+            return Transaction.objects.none()
+        account = self.get_account()
+        return Transaction.objects.filter(
+            Q(sender_account=account) | Q(receiver_account=account)
+        ).select_related("sender_account", "receiver_account")
+
+    def get_keyset_branches(self) -> list:
+        # Sent and received rows are read from their own
+        # (account, created_at, id) index and merged page by page.
+        return [
+            Q(sender_account=self.get_account()),
+            Q(receiver_account=self.get_account()),
+        ]
+
+    def get_serializer_context(self) -> dict:
+        context = super().get_serializer_context()
+        context["account"] = self.get_account()
+        return context
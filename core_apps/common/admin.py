@@ -3,7 +3,7 @@ from typing import Any
 from django.contrib.contenttypes.admin import GenericTabularInline
 from django.http import HttpRequest
 from django.utils.translation import gettext_lazy as _
-from .models import ContentView
+from .models import ContentView, ContentViewCount, IdempotencyKey
 
 
 # Register your models here.
@@ -44,6 +44,41 @@ class ContentViewAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(ContentViewCount)
+class ContentViewCountAdmin(admin.ModelAdmin):
+    list_display = ["content_type", "object_id", "view_count", "updated_at"]
+    list_filter = ["content_type"]
+    readonly_fields = ["content_type", "object_id", "view_count", "updated_at"]
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def has_change_permission(self, request: HttpRequest, obj: Any = None) -> bool:
+        return False
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ["key", "user", "status", "response_status", "created_at"]
+    list_filter = ["status"]
+    search_fields = ["key"]
+    readonly_fields = [
+        "user",
+        "key",
+        "fingerprint",
+        "status",
+        "response_status",
+        "response_body",
+        "created_at",
+    ]
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def has_change_permission(self, request: HttpRequest, obj: Any = None) -> bool:
+        return False
+
+
 class ContentViewInLine(GenericTabularInline):
     model = ContentView
     extra = 0
@@ -4,8 +4,13 @@ from loguru import logger
 from rest_framework.request import Request
 from rest_framework_simplejwt.authentication import AuthUser, JWTAuthentication
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import Token
 
+from .token_cache import validated_token_cache
+from .user_cache import cache_user, get_cached_user
+
 
 class CookieAuthentication(JWTAuthentication):
     def authenticate(self, request: Request) -> Optional[Tuple[object, Token]]:
@@ -24,3 +29,36 @@ class CookieAuthentication(JWTAuthentication):
             except TokenError as e:
                 logger.error(f"Token validation error: {str(e)}")
         return None
+
+    def get_validated_token(self, raw_token: bytes) -> Token:
+        if not settings.JWT_CACHE_ENABLED:
+            return super().get_validated_token(raw_token)
+
+        validated_token = validated_token_cache.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            validated_token_cache.set(raw_token, validated_token)
+        return validated_token
+
+    def get_user(self, validated_token: Token) -> AuthUser:
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        user = get_cached_user(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache_user(user)
+        return user
+
+
+class StatelessCookieAuthentication(CookieAuthentication):
+    """Builds the user from the token claims without touching the database.
+
+    Only suitable for views whose permission checks rely on the claims added
+    at login (``role``, ``account_status``); those claims are as fresh as the
+    access token itself.
+    """
+
+    def get_user(self, validated_token: Token) -> AuthUser:
+        return TokenUser(validated_token)
@@ -0,0 +1,100 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils.translation import gettext_lazy as _
+from loguru import logger
+
+# Each template id maps to its subject, HTML and plain-text templates and the
+# context keys that hold primary keys of model instances to load when rendering.
+EMAIL_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    "otp": {
+        "subject": _("Your OTP code for LOGIN"),
+        "html_template": "email/otp_email.html",
+        "text_template": "email/otp_email.txt",
+        "models": {},
+    },
+    "account_locked": {
+        "subject": _("Your account has been locked"),
+        "html_template": "email/account_locked.html",
+        "text_template": "email/account_locked.txt",
+        "models": {"user": settings.AUTH_USER_MODEL},
+    },
+    "account_created": {
+        "subject": _("Your New Bank Account has been Created."),
+        "html_template": "email/account_created.html",
+        "text_template": "email/account_created.txt",
+        "models": {"user": settings.AUTH_USER_MODEL, "account": "accounts.BankAccount"},
+    },
+    "account_activated": {
+        "subject": _("Your Bank Account is now fully activated"),
+        "html_template": "email/bank_account_activated.html",
+        "text_template": "email/bank_account_activated.txt",
+        "models": {"account": "accounts.BankAccount"},
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def get_email_templates(template_id: str) -> Tuple[Any, Any]:
+    """Return the compiled HTML and plain-text templates, loaded once per process."""
+    template = EMAIL_TEMPLATES[template_id]
+    return get_template(template["html_template"]), get_template(
+        template["text_template"]
+    )
+
+
+def build_email_context(template_id: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    context = {**context, "site_name": settings.SITE_NAME}
+    for name, model_label in EMAIL_TEMPLATES[template_id]["models"].items():
+        model = apps.get_model(model_label)
+        context[name] = model.objects.get(pk=context[name])
+    return context
+
+
+def render_email(template_id: str, context: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Render a queued email into its subject, plain text and HTML bodies."""
+    html_template, text_template = get_email_templates(template_id)
+    context = build_email_context(template_id, context)
+    return (
+        str(EMAIL_TEMPLATES[template_id]["subject"]),
+        text_template.render(context),
+        html_template.render(context),
+    )
+
+
+def build_email_message(
+    template_id: str, recipient_list: List[str], context: Dict[str, Any]
+) -> EmailMultiAlternatives:
+    subject, plain_email, html_email = render_email(template_id, context)
+    message = EmailMultiAlternatives(
+        subject, plain_email, settings.DEFAULT_FROM_EMAIL, recipient_list
+    )
+    message.attach_alternative(html_email, "text/html")
+    return message
+
+
+def queue_email(
+    template_id: str,
+    recipient_list: List[str],
+    context: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Send a templated email from a worker once the current transaction commits.
+
+    ``context`` must be JSON serializable: model instances are passed as
+    primary keys under the names declared in ``EMAIL_TEMPLATES``.
+    """
+    from .tasks import send_templated_email
+
+    if template_id not in EMAIL_TEMPLATES:
+        raise ValueError(f"Unknown email template: {template_id}")
+
+    context = context or {}
+    transaction.on_commit(
+        lambda: send_templated_email.delay(template_id, recipient_list, context)
+    )
+    logger.info(f"Queued {template_id} email for: {', '.join(recipient_list)}")
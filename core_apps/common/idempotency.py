@@ -0,0 +1,278 @@
+"""Idempotency-Key support for endpoints that move money.
+
+A client sends an ``Idempotency-Key`` header with a request it may retry.
+The first request reserves the key in Postgres (the unique constraint on
+user and key is what makes the reservation safe) and the response is
+stored there and cached in Redis. A retry with the same key and body gets
+the stored response back before the view runs, so it never locks or reads
+account rows.
+
+Views that write should store their response with
+``store_idempotent_response`` inside the transaction that writes, so the
+key is completed exactly when the writes commit. Otherwise it is completed
+once the view has responded.
+
+- Same key, different body: 422.
+- Same key while the first request is still running: 409.
+- A 5xx or unhandled error releases the key so the client can retry,
+  unless its response was already committed with the writes.
+- A key left in progress for ``IDEMPOTENCY_IN_PROGRESS_TIMEOUT`` is taken
+  over by a retry. If the original request was only slow, completing the
+  key fails for it and its transaction rolls back, so only one of them
+  writes.
+
+Multipart uploads are fingerprinted from their form fields and the
+streamed SHA-256 of each file, never from the raw body.
+
+Keys are kept for ``IDEMPOTENCY_KEY_TTL``.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENT_METHODS = ("POST", "PUT", "PATCH")
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = _("A request with this idempotency key is still in progress.")
+    default_code = "idempotency_conflict"
+
+
+class IdempotencyKeyMismatch(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = _(
+        "This idempotency key was already used with a different request."
+    )
+    default_code = "idempotency_key_mismatch"
+
+
+class IdempotentReplay(Exception):
+    """Raised from ``initial`` to short-circuit the view with a stored response."""
+
+    def __init__(self, response_status: int, response_body: Any) -> None:
+        self.response_status = response_status
+        self.response_body = response_body
+
+
+def get_request_fingerprint(request: Request) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{request.method}:{request.path}:".encode())
+    if not (request.content_type or "").startswith("multipart/form-data"):
+        digest.update(request.body)
+        return digest.hexdigest()
+
+    # Reading the body of an upload would hold the whole file in memory
+    fields = {
+        name: values
+        for name, values in request.data.lists()
+        if name not in request.FILES
+    }
+    files = {
+        name: [get_upload_digest(upload) for upload in uploads]
+        for name, uploads in request.FILES.lists()
+    }
+    digest.update(json.dumps([fields, files], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def get_upload_digest(upload: UploadedFile) -> str:
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def get_idempotency_cache_key(user_id: Any, key: str) -> str:
+    return f"idempotency:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def check_stored_request(stored: Dict[str, Any], fingerprint: str) -> None:
+    if stored["fingerprint"] != fingerprint:
+        raise IdempotencyKeyMismatch()
+    if stored["status"] != IdempotencyKey.Status.COMPLETED:
+        raise IdempotencyConflict()
+    raise IdempotentReplay(stored["response_status"], stored["response_body"])
+
+
+def reserve_idempotency_key(request: Request, key: str) -> IdempotencyKey:
+    """Reserve ``key`` for this request, or raise to replay or reject it."""
+    fingerprint = get_request_fingerprint(request)
+
+    stored = cache.get(get_idempotency_cache_key(request.user.pk, key))
+    if stored is not None:
+        check_stored_request(stored, fingerprint)
+
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user_id=request.user.pk, key=key, fingerprint=fingerprint
+            )
+    except IntegrityError:
+        record = IdempotencyKey.objects.get(user_id=request.user.pk, key=key)
+        stored = record_to_dict(record)
+        if record.status == IdempotencyKey.Status.COMPLETED:
+            cache_record(record)
+        elif record.fingerprint == fingerprint and take_over_stale_key(record):
+            return record
+        check_stored_request(stored, fingerprint)
+
+
+def take_over_stale_key(record: IdempotencyKey) -> bool:
+    """Claim an in-progress key whose request has stopped responding.
+
+    Writes and the key's completion commit together, so nothing was written
+    under a key that is still in progress.
+    """
+    cutoff = timezone.now() - settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT
+    if record.updated_at >= cutoff:
+        return False
+    now = timezone.now()
+    claimed = IdempotencyKey.objects.filter(
+        pk=record.pk,
+        status=IdempotencyKey.Status.IN_PROGRESS,
+        updated_at=record.updated_at,
+    ).update(updated_at=now)
+    record.updated_at = now
+    return bool(claimed)
+
+
+def record_to_dict(record: IdempotencyKey) -> Dict[str, Any]:
+    return {
+        "fingerprint": record.fingerprint,
+        "status": record.status,
+        "response_status": record.response_status,
+        "response_body": record.response_body,
+    }
+
+
+def cache_record(record: IdempotencyKey) -> None:
+    cache.set(
+        get_idempotency_cache_key(record.user_id, record.key),
+        record_to_dict(record),
+        int(settings.IDEMPOTENCY_KEY_TTL.total_seconds()),
+    )
+
+
+def complete_idempotency_key(record: IdempotencyKey, response: Response) -> bool:
+    """Store ``response`` under the key, unless a retry has taken it over.
+
+    Returns False when the key is no longer held by this request.
+    """
+    response_body = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+    now = timezone.now()
+    completed = IdempotencyKey.objects.filter(
+        pk=record.pk,
+        status=IdempotencyKey.Status.IN_PROGRESS,
+        updated_at=record.updated_at,
+    ).update(
+        status=IdempotencyKey.Status.COMPLETED,
+        response_status=response.status_code,
+        response_body=response_body,
+        updated_at=now,
+    )
+    if not completed:
+        return False
+
+    def mark_completed() -> None:
+        # Until the writes commit, the key may still be released or taken over
+        record.status = IdempotencyKey.Status.COMPLETED
+        record.response_status = response.status_code
+        record.response_body = response_body
+        record.updated_at = now
+        cache_record(record)
+
+    transaction.on_commit(mark_completed)
+    return True
+
+
+class IdempotentMixin:
+    """Makes an APIView honour the ``Idempotency-Key`` header.
+
+    Must come before the DRF view class in the bases, so its ``initial``
+    runs after authentication and permission checks.
+    """
+
+    idempotency_record: Optional[IdempotencyKey] = None
+
+    def initial(self, request: Request, *args: Any, **kwargs: Any) -> None:
+        super().initial(request, *args, **kwargs)
+        self.idempotency_record = None
+
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or request.method not in IDEMPOTENT_METHODS:
+            return
+        if len(key) > 255:
+            raise ValidationError(
+                {IDEMPOTENCY_HEADER: _("Must be at most 255 characters.")}
+            )
+
+        self.idempotency_record = reserve_idempotency_key(request, key)
+
+    def store_idempotent_response(self, response: Response) -> Response:
+        """Complete the key with ``response`` in the current transaction.
+
+        Raises ``IdempotencyConflict`` if a retry took the key over, which
+        rolls back the writes of the surrounding transaction.
+        """
+        record = self.idempotency_record
+        if record is not None and not complete_idempotency_key(record, response):
+            raise IdempotencyConflict()
+        return response
+
+    def handle_exception(self, exc: Exception) -> Response:
+        if isinstance(exc, IdempotentReplay):
+            return Response(
+                exc.response_body,
+                status=exc.response_status,
+                headers={"Idempotent-Replayed": "true"},
+            )
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            self.release_idempotency_key()
+            raise
+
+    def finalize_response(
+        self, request: Request, response: Response, *args: Any, **kwargs: Any
+    ) -> Response:
+        response = super().finalize_response(request, response, *args, **kwargs)
+        record = self.idempotency_record
+        if record is None:
+            return response
+        if response.status_code >= 500:
+            self.release_idempotency_key()
+        else:
+            if record.status != IdempotencyKey.Status.COMPLETED:
+                complete_idempotency_key(record, response)
+            self.idempotency_record = None
+        return response
+
+    def release_idempotency_key(self) -> None:
+        # A key completed in a transaction that committed keeps its response,
+        # since the writes it describes happened, and a key taken over by a
+        # retry belongs to that retry.
+        if self.idempotency_record is not None:
+            IdempotencyKey.objects.filter(
+                pk=self.idempotency_record.pk,
+                status=IdempotencyKey.Status.IN_PROGRESS,
+                updated_at=self.idempotency_record.updated_at,
+            ).delete()
+            self.idempotency_record = None
@@ -0,0 +1,155 @@
+import json
+from typing import Any, Dict, List, Sequence
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from djcelery_email.utils import dict_to_email, email_to_dict
+from loguru import logger
+
+from .redis_client import get_redis_client, renew_lock
+
+EMAIL_QUEUE_KEY = "email:queue"
+EMAIL_PROCESSING_KEY = "email:processing"
+EMAIL_FAILED_KEY = "email:failed"
+EMAIL_FLUSH_SCHEDULED_KEY = "email:flush_scheduled"
+EMAIL_FLUSH_LOCK_KEY = "email:flush_lock"
+# Id of the last flush to hold the lock, whose processing list may need recovery
+EMAIL_FLUSH_OWNER_KEY = "email:flush_owner"
+
+
+class BatchedEmailBackend(BaseEmailBackend):
+    """Queues outgoing messages in Redis for batched delivery by a worker.
+
+    A flush is scheduled ``EMAIL_BATCH_WINDOW`` seconds after the first
+    message lands in an empty window, or immediately once the queue holds
+    ``EMAIL_BATCH_SIZE`` messages. The flush task sends them over one
+    connection of ``BATCHED_EMAIL_BACKEND``.
+    """
+
+    def send_messages(self, email_messages: Sequence[EmailMessage]) -> int:
+        from .tasks import flush_email_queue
+
+        if not email_messages:
+            return 0
+
+        client = get_redis_client()
+        payloads = [json.dumps(email_to_dict(message)) for message in email_messages]
+        queued = client.rpush(EMAIL_QUEUE_KEY, *payloads)
+
+        if queued >= settings.EMAIL_BATCH_SIZE:
+            flush_email_queue.delay()
+        elif client.set(
+            EMAIL_FLUSH_SCHEDULED_KEY, 1, ex=settings.EMAIL_BATCH_WINDOW, nx=True
+        ):
+            flush_email_queue.apply_async(countdown=settings.EMAIL_BATCH_WINDOW)
+
+        return len(payloads)
+
+
+def get_processing_key(flush_id: str) -> str:
+    return f"{EMAIL_PROCESSING_KEY}:{flush_id}"
+
+
+def claim_email_batch(client: Any, processing_key: str) -> List[bytes]:
+    """Move up to ``EMAIL_BATCH_SIZE`` messages from the queue to processing.
+
+    Claimed messages stay in the flush's own processing list until each one
+    has been handled, so a worker that dies mid-batch loses nothing: the
+    next flush to take the lock requeues whatever is left.
+    """
+    payloads: List[bytes] = []
+    while len(payloads) < settings.EMAIL_BATCH_SIZE:
+        payload = client.lmove(EMAIL_QUEUE_KEY, processing_key, "LEFT", "RIGHT")
+        if payload is None:
+            break
+        payloads.append(payload)
+    return payloads
+
+
+def requeue_claimed_emails(client: Any, processing_key: str) -> int:
+    """Put messages left in a processing list back at the head of the queue."""
+    requeued = 0
+    while client.lmove(processing_key, EMAIL_QUEUE_KEY, "RIGHT", "LEFT"):
+        requeued += 1
+    return requeued
+
+
+def requeue_failed_emails(client: Any) -> int:
+    """Move messages that failed to send back onto the queue for another try."""
+    requeued = 0
+    for _ in range(client.llen(EMAIL_FAILED_KEY)):
+        if not client.lmove(EMAIL_FAILED_KEY, EMAIL_QUEUE_KEY, "LEFT", "RIGHT"):
+            break
+        requeued += 1
+    return requeued
+
+
+def deliver_email_batch(
+    payloads: List[bytes], lock: Any, processing_key: str
+) -> Dict[str, Any]:
+    """Send claimed messages over one connection, reporting each failure.
+
+    A message that fails goes to ``EMAIL_FAILED_KEY`` until it has been tried
+    ``EMAIL_MAX_SEND_ATTEMPTS`` times. When the connection cannot be opened,
+    the messages not yet tried go back to the head of the queue and are
+    reported as ``requeued``.
+
+    The flush lock is renewed before every message and each handled message
+    is popped from ``processing_key``. If the lock has expired, the batch
+    stops: the next flush owns the rest of the processing list.
+    """
+    client = get_redis_client()
+    report: Dict[str, Any] = {"sent": 0, "failed": [], "requeued": 0}
+    connection = get_connection(settings.BATCHED_EMAIL_BACKEND)
+
+    try:
+        connection.open()
+        for payload in payloads:
+            if not renew_lock(lock):
+                logger.warning("Email flush lost its lock, leaving the batch")
+                break
+            message_data = json.loads(payload)
+            attempts = message_data.pop("attempts", 0) + 1
+            message = dict_to_email(message_data)
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                logger.error(
+                    f"Failed to send email to {', '.join(message.to)}: Error: {str(e)}"
+                )
+                report["failed"].append(
+                    {
+                        "to": message.to,
+                        "subject": message.subject,
+                        "attempts": attempts,
+                        "error": str(e),
+                    }
+                )
+                if attempts < settings.EMAIL_MAX_SEND_ATTEMPTS:
+                    client.rpush(
+                        EMAIL_FAILED_KEY,
+                        json.dumps({**message_data, "attempts": attempts}),
+                    )
+                else:
+                    logger.error(
+                        f"Dropped email to {', '.join(message.to)} "
+                        f"after {attempts} attempts"
+                    )
+                client.lpop(processing_key)
+                # The connection may be unusable after an SMTP error
+                connection.close()
+                connection.open()
+            else:
+                client.lpop(processing_key)
+                report["sent"] += 1
+    except Exception as e:
+        report["requeued"] = requeue_claimed_emails(client, processing_key)
+        logger.error(
+            f"Email batch aborted, requeued {report['requeued']} messages: "
+            f"Error: {str(e)}"
+        )
+    finally:
+        connection.close()
+
+    return report
@@ -0,0 +1,21 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from core_apps.common.view_tracking import rebuild_view_counts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized content view counters from common_contentview."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of viewed objects to count per query.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        written = rebuild_view_counts(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} view counters."))
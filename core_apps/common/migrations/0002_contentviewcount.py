@@ -0,0 +1,50 @@
+# Generated by Django 4.2.15 on 2026-10-16 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("common", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentViewCount",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("object_id", models.UUIDField(verbose_name="Object ID")),
+                (
+                    "view_count",
+                    models.PositiveIntegerField(default=0, verbose_name="View Count"),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                        verbose_name="Content Type",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Content View Count",
+                "verbose_name_plural": "Content View Counts",
+                "unique_together": {("content_type", "object_id")},
+            },
+        ),
+    ]
@@ -68,3 +68,63 @@ class ContentView(TimeStampedModel):
         if not created:
             view.last_viewed = timezone.now()
             view.save()
+
+
+class ContentViewCount(TimeStampedModel):
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, verbose_name=_("Content Type")
+    )
+    object_id = models.UUIDField(verbose_name=_("Object ID"))
+    view_count = models.PositiveIntegerField(_("View Count"), default=0)
+
+    class Meta:
+        verbose_name = _("Content View Count")
+        verbose_name_plural = _("Content View Counts")
+        unique_together = ["content_type", "object_id"]
+
+    def __str__(self) -> str:
+        return f"{self.content_type} {self.object_id}: {self.view_count} views"
+
+    @classmethod
+    def get_count(cls, model: Any, object_id: Any) -> int:
+        content_type = ContentType.objects.get_for_model(model)
+        view_count = (
+            cls.objects.filter(content_type=content_type, object_id=object_id)
+            .values_list("view_count", flat=True)
+            .first()
+        )
+        return view_count or 0
+
+
+class IdempotencyKey(TimeStampedModel):
+    class Status(models.TextChoices):
+        IN_PROGRESS = "in_progress", _("In Progress")
+        COMPLETED = "completed", _("Completed")
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+        verbose_name=_("User"),
+    )
+    key = models.CharField(_("Key"), max_length=255)
+    fingerprint = models.CharField(_("Request Fingerprint"), max_length=64)
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.IN_PROGRESS,
+    )
+    response_status = models.PositiveSmallIntegerField(
+        _("Response Status"), null=True, blank=True
+    )
+    response_body = models.JSONField(_("Response Body"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Idempotency Key")
+        verbose_name_plural = _("Idempotency Keys")
+        unique_together = ["user", "key"]
+        indexes = [models.Index(fields=["created_at"], name="idempotency_created_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.key} ({self.status})"
@@ -0,0 +1,239 @@
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from redis.exceptions import LockError, LockNotOwnedError
+
+
+class LocalRedis:
+    """In-process stand-in for the subset of the Redis API used by the apps.
+
+    Values are stored as bytes and expire like native Redis keys, so code
+    written against ``redis-py`` behaves the same when Redis is unavailable
+    (tests, offline development).
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    def _get_entry(self, name: str) -> Optional[Any]:
+        entry = self._data.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[name]
+            return None
+        return value
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            return self._get_entry(name)
+
+    def set(
+        self, name: str, value: Any, ex: Optional[int] = None, nx: bool = False
+    ) -> Optional[bool]:
+        with self._lock:
+            if nx and self._get_entry(name) is not None:
+                return None
+            expires_at = time.monotonic() + ex if ex else None
+            self._data[name] = (self._encode(value), expires_at)
+            return True
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            value = int(self._get_entry(name) or 0) + amount
+            expires_at = self._data[name][1] if name in self._data else None
+            self._data[name] = (self._encode(value), expires_at)
+            return value
+
+    def expire(self, name: str, time_: int) -> bool:
+        with self._lock:
+            value = self._get_entry(name)
+            if value is None:
+                return False
+            self._data[name] = (value, time.monotonic() + time_)
+            return True
+
+    def getdel(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._get_entry(name)
+            self._data.pop(name, None)
+            return value
+
+    def hset(self, name: str, key: str, value: Any) -> int:
+        with self._lock:
+            mapping = self._get_entry(name)
+            if mapping is None:
+                mapping = {}
+                self._data[name] = (mapping, None)
+            field = self._encode(key)
+            added = int(field not in mapping)
+            mapping[field] = self._encode(value)
+            return added
+
+    def hgetall(self, name: str) -> Dict[bytes, bytes]:
+        with self._lock:
+            return dict(self._get_entry(name) or {})
+
+    def exists(self, *names: str) -> int:
+        with self._lock:
+            return sum(1 for name in names if self._get_entry(name) is not None)
+
+    def rename(self, src: str, dst: str) -> bool:
+        with self._lock:
+            if self._get_entry(src) is None:
+                raise KeyError(src)
+            self._data[dst] = self._data.pop(src)
+            return True
+
+    def rpush(self, name: str, *values: Any) -> int:
+        with self._lock:
+            items = self._get_entry(name)
+            if items is None:
+                items = []
+                self._data[name] = (items, None)
+            items.extend(self._encode(value) for value in values)
+            return len(items)
+
+    def lpush(self, name: str, *values: Any) -> int:
+        with self._lock:
+            items = self._get_entry(name)
+            if items is None:
+                items = []
+                self._data[name] = (items, None)
+            for value in values:
+                items.insert(0, self._encode(value))
+            return len(items)
+
+    def lpop(self, name: str, count: Optional[int] = None) -> Optional[Any]:
+        with self._lock:
+            items = self._get_entry(name)
+            if not items:
+                return None
+            popped = items[: count or 1]
+            del items[: count or 1]
+            if not items:
+                del self._data[name]
+            return popped if count is not None else popped[0]
+
+    def lmove(
+        self, first_list: str, second_list: str, src: str = "LEFT", dest: str = "RIGHT"
+    ) -> Optional[bytes]:
+        with self._lock:
+            items = self._get_entry(first_list)
+            if not items:
+                return None
+            value = items.pop(0 if src == "LEFT" else -1)
+            if not items:
+                del self._data[first_list]
+            target = self._get_entry(second_list)
+            if target is None:
+                target = []
+                self._data[second_list] = (target, None)
+            if dest == "LEFT":
+                target.insert(0, value)
+            else:
+                target.append(value)
+            return value
+
+    def llen(self, name: str) -> int:
+        with self._lock:
+            return len(self._get_entry(name) or [])
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            deleted = 0
+            for name in names:
+                if self._get_entry(name) is not None:
+                    del self._data[name]
+                    deleted += 1
+            return deleted
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._data.clear()
+            return True
+
+    def lock(
+        self, name: str, timeout: Optional[float] = None, blocking: bool = True
+    ) -> "LocalLock":
+        return LocalLock(self, name, timeout, blocking)
+
+
+class LocalLock:
+    """The non-blocking subset of ``redis.lock.Lock`` on top of ``LocalRedis``."""
+
+    def __init__(
+        self, redis: LocalRedis, name: str, timeout: Optional[float], blocking: bool
+    ) -> None:
+        self.redis = redis
+        self.name = name
+        self.timeout = timeout
+        self.blocking = blocking
+        self.token: Optional[bytes] = None
+
+    def acquire(self, blocking: Optional[bool] = None) -> bool:
+        token = uuid.uuid4().hex.encode()
+        if self.redis.set(self.name, token, ex=self.timeout, nx=True):
+            self.token = token
+            return True
+        return False
+
+    def owned(self) -> bool:
+        return self.token is not None and self.redis.get(self.name) == self.token
+
+    def reacquire(self) -> bool:
+        with self.redis._lock:
+            if not self.owned():
+                raise LockNotOwnedError("Cannot reacquire a lock that's not owned")
+            self.redis.expire(self.name, self.timeout)
+            return True
+
+    def release(self) -> None:
+        with self.redis._lock:
+            if self.token is None:
+                raise LockError("Cannot release an unlocked lock")
+            token, self.token = self.token, None
+            if self.redis.get(self.name) != token:
+                raise LockNotOwnedError("Cannot release a lock that's no longer owned")
+            self.redis.delete(self.name)
+
+
+local_redis = LocalRedis()
+
+
+def renew_lock(lock: Any) -> bool:
+    """Reset ``lock``'s TTL; False once it expired and may belong to someone else."""
+    try:
+        lock.reacquire()
+    except LockError:
+        return False
+    return True
+
+
+def release_lock(lock: Any) -> None:
+    # Only deletes the key while it still holds this lock's token
+    try:
+        lock.release()
+    except LockError:
+        pass
+
+
+def get_redis_client(alias: str = "default") -> Any:
+    """Return the raw Redis client behind a django-redis cache alias."""
+    if getattr(settings, "REDIS_USE_LOCAL_STANDIN", False):
+        return local_redis
+
+    from django_redis import get_redis_connection
+
+    return get_redis_connection(alias)
@@ -0,0 +1,126 @@
+import uuid
+from typing import Any, Dict, List
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from loguru import logger
+from .emails import build_email_message
+from .mail import (
+    EMAIL_FLUSH_LOCK_KEY,
+    EMAIL_FLUSH_OWNER_KEY,
+    EMAIL_FLUSH_SCHEDULED_KEY,
+    claim_email_batch,
+    deliver_email_batch,
+    get_processing_key,
+    requeue_claimed_emails,
+    requeue_failed_emails,
+)
+from .redis_client import get_redis_client, release_lock, renew_lock
+
+
+@shared_task(bind=True, name="send_templated_email", max_retries=3)
+def send_templated_email(
+    self, template_id: str, recipient_list: List[str], context: Dict[str, Any]
+) -> None:
+    try:
+        # EMAIL_BACKEND queues the message for the batched flush worker
+        build_email_message(template_id, recipient_list, context).send()
+        logger.info(f"{template_id} email sent to: {', '.join(recipient_list)}")
+    except Exception as e:
+        logger.error(
+            f"Failed to send {template_id} email to {', '.join(recipient_list)}: "
+            f"Error: {str(e)}"
+        )
+        raise self.retry(exc=e, countdown=60)
+
+
+@shared_task(name="flush_email_queue")
+def flush_email_queue() -> Dict[str, Any]:
+    client = get_redis_client()
+    report: Dict[str, Any] = {"sent": 0, "failed": [], "requeued": 0}
+    lock = client.lock(
+        EMAIL_FLUSH_LOCK_KEY, timeout=settings.EMAIL_FLUSH_LOCK_TIMEOUT, blocking=False
+    )
+    if not lock.acquire():
+        # The running flush keeps claiming batches until the queue is empty
+        return report
+
+    processing_key = get_processing_key(uuid.uuid4().hex)
+    try:
+        client.delete(EMAIL_FLUSH_SCHEDULED_KEY)
+        # Only the lock holder writes the owner key, so the previous owner
+        # has lost the lock and stops before sending anything else it claimed.
+        previous_owner = client.get(EMAIL_FLUSH_OWNER_KEY)
+        if previous_owner:
+            recovered = requeue_claimed_emails(client, previous_owner.decode())
+            if recovered:
+                logger.warning(
+                    f"Requeued {recovered} emails from an interrupted flush"
+                )
+        client.set(EMAIL_FLUSH_OWNER_KEY, processing_key)
+
+        # Stop once a batch is requeued: the mail server is unreachable
+        while not report["requeued"] and renew_lock(lock):
+            payloads = claim_email_batch(client, processing_key)
+            if not payloads:
+                break
+            batch_report = deliver_email_batch(payloads, lock, processing_key)
+            report["sent"] += batch_report["sent"]
+            report["failed"].extend(batch_report["failed"])
+            report["requeued"] += batch_report["requeued"]
+    finally:
+        release_lock(lock)
+
+    if report["sent"] or report["failed"] or report["requeued"]:
+        logger.info(
+            f"Email queue flushed: {report['sent']} sent, "
+            f"{len(report['failed'])} failed, {report['requeued']} requeued"
+        )
+    return report
+
+
+@shared_task(name="retry_failed_emails")
+def retry_failed_emails() -> Dict[str, Any]:
+    """Requeue failed messages and flush whatever is waiting in the queue."""
+    requeued = requeue_failed_emails(get_redis_client())
+    if requeued:
+        logger.info(f"Retrying {requeued} failed emails")
+    return flush_email_queue()
+
+
+@shared_task(name="flush_buffered_content_views")
+def flush_buffered_content_views() -> int:
+    from .view_tracking import flush_buffered_views
+
+    flushed = flush_buffered_views()
+    if flushed:
+        logger.info(f"Flushed {flushed} buffered content views")
+    return flushed
+
+
+@shared_task(name="reconcile_content_view_counts")
+def reconcile_content_view_counts() -> int:
+    from .view_tracking import rebuild_view_counts
+
+    written = rebuild_view_counts()
+    logger.info(f"Reconciled {written} content view counters")
+    return written
+
+
+@shared_task(name="purge_expired_idempotency_keys")
+def purge_expired_idempotency_keys() -> int:
+    from .models import IdempotencyKey
+
+    now = timezone.now()
+    # Abandoned in-progress keys never had anything committed under them.
+    deleted, _ = IdempotencyKey.objects.filter(
+        Q(created_at__lt=now - settings.IDEMPOTENCY_KEY_TTL)
+        | Q(
+            status=IdempotencyKey.Status.IN_PROGRESS,
+            updated_at__lt=now - settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT,
+        )
+    ).delete()
+    if deleted:
+        logger.info(f"Purged {deleted} expired idempotency keys")
+    return deleted
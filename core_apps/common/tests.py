@@ -0,0 +1,424 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings, tag
+from django.utils import timezone
+from loguru import logger
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core_apps.user_auth.tests import LOCAL_CACHES, create_user
+from . import emails, tasks, view_tracking
+from .cookie_auth import CookieAuthentication
+from .mail import (
+    EMAIL_FAILED_KEY,
+    EMAIL_FLUSH_LOCK_KEY,
+    EMAIL_FLUSH_OWNER_KEY,
+    EMAIL_QUEUE_KEY,
+    BatchedEmailBackend,
+    claim_email_batch,
+    get_processing_key,
+)
+from .models import ContentView, ContentViewCount
+from .redis_client import local_redis
+from .tasks import flush_email_queue, retry_failed_emails
+from .view_tracking import (
+    FLUSH_LOCK_KEY,
+    buffer_view,
+    flush_buffered_views,
+    get_existing_view_keys,
+    rebuild_view_counts,
+)
+
+User = get_user_model()
+from .token_cache import ValidatedTokenCache, validated_token_cache
+
+
+LOCMEM_EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+OTP_CONTEXT = {"otp": "123456", "expiry_time": 5}
+
+
+def make_request(raw_token: str) -> Request:
+    return Request(
+        APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {raw_token}")
+    )
+
+
+class ValidatedTokenCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.cache = ValidatedTokenCache(maxsize=2)
+        self.token = AccessToken()
+
+    def test_counts_hits_and_misses(self) -> None:
+        self.assertIsNone(self.cache.get("raw"))
+        self.cache.set("raw", self.token)
+        self.assertIs(self.cache.get("raw"), self.token)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_entries_expire_with_the_token(self) -> None:
+        self.cache.set("raw", self.token)
+        with mock.patch("core_apps.common.token_cache.time.time") as now:
+            now.return_value = self.token["exp"]
+            self.assertIsNone(self.cache.get("raw"))
+
+    def test_least_recently_used_entry_is_dropped(self) -> None:
+        for raw in ("a", "b"):
+            self.cache.set(raw, self.token)
+        self.cache.get("a")
+        self.cache.set("c", self.token)
+
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["size"], 2)
+
+
+@override_settings(CACHES=LOCAL_CACHES, JWT_CACHE_ENABLED=True)
+class CookieAuthenticationCacheTests(TestCase):
+    def setUp(self) -> None:
+        validated_token_cache.clear()
+        self.user = create_user()
+        self.raw_token = str(AccessToken.for_user(self.user))
+
+    def test_repeated_token_is_validated_once(self) -> None:
+        with mock.patch.object(
+            JWTAuthentication,
+            "get_validated_token",
+            autospec=True,
+            side_effect=JWTAuthentication.get_validated_token,
+        ) as validate:
+            for _ in range(3):
+                user, token = CookieAuthentication().authenticate(
+                    make_request(self.raw_token)
+                )
+                self.assertEqual(user.pk, self.user.pk)
+
+        self.assertEqual(validate.call_count, 1)
+        self.assertEqual(validated_token_cache.stats()["hits"], 2)
+
+    def test_invalid_token_is_not_cached(self) -> None:
+        with self.assertRaises(InvalidToken):
+            CookieAuthentication().authenticate(make_request(self.raw_token + "x"))
+        self.assertEqual(validated_token_cache.stats()["size"], 0)
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+@override_settings(CACHES=LOCAL_CACHES)
+class CookieAuthenticationBenchmark(TestCase):
+    """authenticate() throughput with the validated-token cache on and off."""
+
+    iterations = int(os.getenv("BENCHMARK_AUTH_ITERATIONS", "20000"))
+
+    def measure(self, raw_token: str) -> float:
+        authentication = CookieAuthentication()
+        request = make_request(raw_token)
+        started = time.perf_counter()
+        for _ in range(self.iterations):
+            authentication.authenticate(request)
+        return self.iterations / (time.perf_counter() - started)
+
+    def test_authenticate_throughput(self) -> None:
+        raw_token = str(AccessToken.for_user(create_user()))
+        throughput: Dict[bool, float] = {}
+        for enabled in (False, True):
+            validated_token_cache.clear()
+            with self.settings(JWT_CACHE_ENABLED=enabled):
+                throughput[enabled] = self.measure(raw_token)
+            logger.info(
+                f"authenticate() with the token cache "
+                f"{'on' if enabled else 'off'}: {throughput[enabled]:.0f}/s"
+            )
+
+        self.assertGreater(throughput[True], throughput[False])
+
+
+class EmailRenderingTests(TestCase):
+    def setUp(self) -> None:
+        emails.get_email_templates.cache_clear()
+
+    def test_templates_are_compiled_once(self) -> None:
+        with mock.patch.object(
+            emails, "get_template", wraps=emails.get_template
+        ) as get_template:
+            for _ in range(3):
+                emails.render_email("otp", OTP_CONTEXT)
+
+        self.assertEqual(get_template.call_count, 2)
+
+    def test_plain_text_comes_from_the_text_template(self) -> None:
+        subject, text, html = emails.render_email("otp", OTP_CONTEXT)
+
+        self.assertIn("Your OTP is 123456", text)
+        self.assertNotIn("<", text)
+        self.assertIn("123456", html)
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+class EmailRenderingBenchmark(TestCase):
+    """Render and send OTP emails over one connection of the in-memory backend."""
+
+    messages = int(os.getenv("BENCHMARK_EMAIL_MESSAGES", "10000"))
+
+    def test_otp_email_throughput(self) -> None:
+        started = time.perf_counter()
+        with get_connection(LOCMEM_EMAIL_BACKEND) as connection:
+            sent = connection.send_messages(
+                [
+                    emails.build_email_message(
+                        "otp", [f"user{index}@example.com"], OTP_CONTEXT
+                    )
+                    for index in range(self.messages)
+                ]
+            )
+        elapsed = time.perf_counter() - started
+
+        logger.info(
+            f"Rendered and sent {sent} OTP emails: {sent / elapsed:.0f} messages/s"
+        )
+        self.assertEqual(sent, self.messages)
+
+
+class RecordingEmailBackend(BaseEmailBackend):
+    """Mail server stand-in that records deliveries and fails on demand."""
+
+    unreachable = False
+    refused: Set[str] = set()
+    connections_opened = 0
+    delivered: List[EmailMessage] = []
+    on_send: Optional[Callable[[], None]] = None
+
+    def open(self) -> bool:
+        if RecordingEmailBackend.unreachable:
+            raise ConnectionRefusedError("mail server is down")
+        RecordingEmailBackend.connections_opened += 1
+        return True
+
+    def send_messages(self, email_messages: Sequence[EmailMessage]) -> int:
+        for message in email_messages:
+            if self.refused.intersection(message.to):
+                raise ValueError(f"recipient refused: {', '.join(message.to)}")
+            RecordingEmailBackend.delivered.append(message)
+            if RecordingEmailBackend.on_send:
+                RecordingEmailBackend.on_send()
+        return len(email_messages)
+
+
+@override_settings(
+    REDIS_USE_LOCAL_STANDIN=True,
+    BATCHED_EMAIL_BACKEND="core_apps.common.tests.RecordingEmailBackend",
+    EMAIL_BATCH_SIZE=10,
+    EMAIL_MAX_SEND_ATTEMPTS=3,
+)
+class EmailQueueTests(TestCase):
+    def setUp(self) -> None:
+        local_redis.flushdb()
+        RecordingEmailBackend.unreachable = False
+        RecordingEmailBackend.refused = set()
+        RecordingEmailBackend.connections_opened = 0
+        RecordingEmailBackend.delivered = []
+        RecordingEmailBackend.on_send = None
+
+    def queue(self, *recipients: str) -> None:
+        with mock.patch.object(tasks.flush_email_queue, "delay"), mock.patch.object(
+            tasks.flush_email_queue, "apply_async"
+        ):
+            BatchedEmailBackend().send_messages(
+                [EmailMessage("Subject", "Body", to=[to]) for to in recipients]
+            )
+
+    def delivered_to(self) -> List[str]:
+        return [message.to[0] for message in RecordingEmailBackend.delivered]
+
+    def claimed_by_last_flush(self) -> int:
+        return local_redis.llen(local_redis.get(EMAIL_FLUSH_OWNER_KEY).decode())
+
+    def test_batch_is_sent_over_one_connection(self) -> None:
+        self.queue("a@example.com", "b@example.com", "c@example.com")
+
+        report = flush_email_queue()
+
+        self.assertEqual(report["sent"], 3)
+        self.assertEqual(RecordingEmailBackend.connections_opened, 1)
+        self.assertEqual(local_redis.llen(EMAIL_QUEUE_KEY), 0)
+        self.assertEqual(self.claimed_by_last_flush(), 0)
+
+    def test_failed_message_is_reported_and_kept_for_retry(self) -> None:
+        RecordingEmailBackend.refused = {"b@example.com"}
+        self.queue("a@example.com", "b@example.com", "c@example.com")
+
+        report = flush_email_queue()
+
+        self.assertEqual(report["sent"], 2)
+        self.assertEqual(report["failed"][0]["to"], ["b@example.com"])
+        self.assertEqual(local_redis.llen(EMAIL_FAILED_KEY), 1)
+        self.assertEqual(self.delivered_to(), ["a@example.com", "c@example.com"])
+
+    def test_unreachable_server_puts_the_batch_back(self) -> None:
+        RecordingEmailBackend.unreachable = True
+        self.queue("a@example.com", "b@example.com")
+
+        report = flush_email_queue()
+
+        self.assertEqual(report["requeued"], 2)
+        self.assertEqual(local_redis.llen(EMAIL_QUEUE_KEY), 2)
+        self.assertEqual(self.claimed_by_last_flush(), 0)
+
+        RecordingEmailBackend.unreachable = False
+        self.assertEqual(retry_failed_emails()["sent"], 2)
+        self.assertEqual(self.delivered_to(), ["a@example.com", "b@example.com"])
+
+    def test_batch_claimed_by_an_interrupted_flush_is_delivered(self) -> None:
+        self.queue("a@example.com", "b@example.com", "c@example.com")
+        processing_key = get_processing_key("interrupted")
+        claim_email_batch(local_redis, processing_key)
+        local_redis.set(EMAIL_FLUSH_OWNER_KEY, processing_key)
+
+        flush_email_queue()
+
+        self.assertEqual(
+            self.delivered_to(), ["a@example.com", "b@example.com", "c@example.com"]
+        )
+
+    def test_failed_message_is_dropped_after_max_attempts(self) -> None:
+        RecordingEmailBackend.refused = {"b@example.com"}
+        self.queue("b@example.com")
+
+        flush_email_queue()
+        retry_failed_emails()
+        self.assertEqual(local_redis.llen(EMAIL_FAILED_KEY), 1)
+        report = retry_failed_emails()
+
+        self.assertEqual(report["failed"][0]["attempts"], 3)
+        self.assertEqual(local_redis.llen(EMAIL_FAILED_KEY), 0)
+        self.assertEqual(local_redis.llen(EMAIL_QUEUE_KEY), 0)
+
+    def test_overlapping_flush_leaves_the_queue_alone(self) -> None:
+        self.queue("a@example.com")
+        local_redis.lock(EMAIL_FLUSH_LOCK_KEY, timeout=300).acquire()
+
+        report = flush_email_queue()
+
+        self.assertEqual(report["sent"], 0)
+        self.assertEqual(local_redis.llen(EMAIL_QUEUE_KEY), 1)
+
+    def test_flush_that_lost_its_lock_stops_sending(self) -> None:
+        def expire_lock() -> None:
+            # The lock expires mid-send and another flush takes it over
+            local_redis.set(EMAIL_FLUSH_LOCK_KEY, "other-flush")
+
+        RecordingEmailBackend.on_send = expire_lock
+        self.queue("a@example.com", "b@example.com", "c@example.com")
+
+        report = flush_email_queue()
+
+        self.assertEqual(report["sent"], 1)
+        self.assertEqual(local_redis.get(EMAIL_FLUSH_LOCK_KEY), b"other-flush")
+        self.assertEqual(self.claimed_by_last_flush(), 2)
+
+        RecordingEmailBackend.on_send = None
+        local_redis.delete(EMAIL_FLUSH_LOCK_KEY)
+        flush_email_queue()
+
+        self.assertEqual(
+            self.delivered_to(), ["a@example.com", "b@example.com", "c@example.com"]
+        )
+
+
+@override_settings(REDIS_USE_LOCAL_STANDIN=True)
+class ViewTrackingTests(TestCase):
+    def setUp(self) -> None:
+        local_redis.flushdb()
+        self.viewer = create_user()
+        self.object_id = create_user(2).pk
+        ContentType.objects.get_for_model(User)
+
+    def test_buffering_a_view_does_not_touch_the_database(self) -> None:
+        with self.assertNumQueries(0):
+            buffer_view(User, self.object_id, self.viewer, "10.0.0.1")
+
+    def test_flush_upserts_views_and_counts_new_viewers(self) -> None:
+        buffer_view(User, self.object_id, self.viewer, "10.0.0.1")
+        buffer_view(User, self.object_id, self.viewer, "10.0.0.1")
+        buffer_view(User, self.object_id, None, "10.0.0.2")
+        self.assertEqual(flush_buffered_views(), 2)
+
+        buffer_view(User, self.object_id, self.viewer, "10.0.0.1")
+        self.assertEqual(flush_buffered_views(), 1)
+
+        self.assertEqual(ContentView.objects.count(), 2)
+        self.assertEqual(ContentViewCount.get_count(User, self.object_id), 2)
+
+    def test_overlapping_flush_is_skipped(self) -> None:
+        buffer_view(User, self.object_id, self.viewer, "10.0.0.1")
+        local_redis.lock(FLUSH_LOCK_KEY, timeout=300).acquire()
+        self.assertEqual(flush_buffered_views(), 0)
+        self.assertEqual(ContentView.objects.count(), 0)
+
+        local_redis.delete(FLUSH_LOCK_KEY)
+        self.assertEqual(flush_buffered_views(), 1)
+        self.assertEqual(ContentViewCount.get_count(User, self.object_id), 1)
+
+    def test_existing_keys_are_looked_up_for_the_batch_only(self) -> None:
+        content_type = ContentType.objects.get_for_model(User)
+        ContentView.objects.bulk_create(
+            ContentView(
+                content_type=content_type,
+                object_id=self.object_id,
+                viewer_ip=f"10.0.0.{index}",
+                last_viewed=timezone.now(),
+            )
+            for index in range(1, 6)
+        )
+        seen = (content_type.id, str(self.object_id), None, "10.0.0.1")
+        new = (content_type.id, str(self.object_id), None, "10.0.0.9")
+
+        self.assertEqual(set(get_existing_view_keys({seen, new})), {seen})
+
+    def test_flush_that_lost_its_lock_is_rolled_back(self) -> None:
+        buffer_view(User, self.object_id, self.viewer, "10.0.0.1")
+        with mock.patch.object(view_tracking, "renew_lock", return_value=False):
+            self.assertEqual(flush_buffered_views(), 0)
+        self.assertEqual(ContentView.objects.count(), 0)
+
+        self.assertEqual(flush_buffered_views(), 1)
+        self.assertEqual(ContentViewCount.get_count(User, self.object_id), 1)
+
+    def test_repeat_views_without_a_user_or_ip_are_stored_once(self) -> None:
+        for _ in range(2):
+            buffer_view(User, self.object_id, None, None)
+            buffer_view(User, self.object_id, None, "10.0.0.2")
+            flush_buffered_views()
+
+        self.assertEqual(ContentView.objects.count(), 2)
+        self.assertEqual(ContentViewCount.get_count(User, self.object_id), 2)
+        self.assertEqual(rebuild_view_counts(), 1)
+        self.assertEqual(ContentViewCount.get_count(User, self.object_id), 2)
+
+    def test_rebuild_corrects_drifted_counters(self) -> None:
+        buffer_view(User, self.object_id, self.viewer, "10.0.0.1")
+        buffer_view(User, self.object_id, None, "10.0.0.2")
+        flush_buffered_views()
+        ContentViewCount.objects.update(view_count=7)
+
+        self.assertEqual(rebuild_view_counts(chunk_size=1), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(ContentViewCount.get_count(User, self.object_id), 2)
+
+    def test_rebuild_resets_counters_of_objects_without_views(self) -> None:
+        buffer_view(User, self.object_id, self.viewer, "10.0.0.1")
+        flush_buffered_views()
+        ContentView.objects.all().delete()
+
+        self.assertEqual(rebuild_view_counts(), 1)
+        self.assertEqual(ContentViewCount.get_count(User, self.object_id), 0)
@@ -0,0 +1,80 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+from django.conf import settings
+from rest_framework_simplejwt.tokens import Token
+
+
+class ValidatedTokenCache:
+    """Bounded, process-local LRU of tokens that already passed validation.
+
+    Entries are keyed by a SHA-256 digest of the raw token, so the tokens
+    themselves are never kept as keys, and they expire with the token's
+    ``exp`` claim. simplejwt only blacklists refresh tokens, never access
+    tokens, so a cached access token is accepted for exactly as long as an
+    uncached validation would accept it.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Token, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(raw_token: Union[str, bytes]) -> str:
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return hashlib.sha256(raw_token).hexdigest()
+
+    def get(self, raw_token: Union[str, bytes]) -> Optional[Token]:
+        digest = self._digest(raw_token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            token, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[digest]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return token
+
+    def set(self, raw_token: Union[str, bytes], token: Token) -> None:
+        expires_at = token.get("exp")
+        if expires_at is None:
+            return
+
+        digest = self._digest(raw_token)
+        with self._lock:
+            self._entries[digest] = (token, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+validated_token_cache = ValidatedTokenCache(maxsize=settings.JWT_CACHE_MAX_SIZE)
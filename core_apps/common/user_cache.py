@@ -0,0 +1,43 @@
+from typing import Any, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+
+def get_user_cache_key(user_id: Any) -> str:
+    return f"auth_user:{user_id}"
+
+
+def get_cached_user(user_id: Any) -> Optional[Any]:
+    """Rebuild the cached user; fields left out of the cache load lazily."""
+    values = cache.get(
+        get_user_cache_key(user_id), version=settings.AUTH_USER_CACHE_VERSION
+    )
+    if values is None:
+        return None
+
+    User = get_user_model()
+    field_names = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname in values
+    ]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names]
+    )
+
+
+def cache_user(user: Any) -> None:
+    """Cache the user's ``AUTH_CACHE_FIELDS`` only, never the whole instance."""
+    cache.set(
+        get_user_cache_key(user.pk),
+        {name: getattr(user, name) for name in user.AUTH_CACHE_FIELDS},
+        timeout=settings.AUTH_USER_CACHE_TIMEOUT,
+        version=settings.AUTH_USER_CACHE_VERSION,
+    )
+
+
+def invalidate_cached_user(user_id: Any) -> None:
+    cache.delete(get_user_cache_key(user_id), version=settings.AUTH_USER_CACHE_VERSION)
@@ -0,0 +1,234 @@
+"""Write-behind buffering for ``ContentView`` tracking.
+
+Requests only record a view in a Redis hash, keyed by the ``ContentView``
+unique fields, with the latest view time as the value; repeat views by the
+same viewer collapse into one field. A periodic task swaps the hash out and
+writes it to ``common_contentview`` in bulk, incrementing the denormalized
+``ContentViewCount`` of each object by the number of new viewer/IP pairs in
+the same transaction. A daily job rebuilds the counters from
+``common_contentview`` to correct any drift.
+
+Durability bound: buffered views live in Redis, so web or worker crashes
+lose nothing, and a flush that fails part way leaves its hash in place to be
+retried. Only a Redis crash loses views: at most those recorded since the
+last flush (``CONTENT_VIEW_FLUSH_INTERVAL``) that were not yet persisted by
+Redis itself.
+"""
+
+import operator
+import uuid
+from collections import Counter
+from datetime import datetime
+from functools import reduce
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import ContentView, ContentViewCount
+from .redis_client import get_redis_client, release_lock, renew_lock
+
+PENDING_VIEWS_KEY = "content_views:pending"
+FLUSHING_VIEWS_KEY = "content_views:flushing"
+FLUSH_LOCK_KEY = "content_views:flush_lock"
+# Longer than any flush takes, so the lock only expires if its worker died
+FLUSH_LOCK_TIMEOUT = 300
+FLUSH_BATCH_SIZE = 1000
+
+
+def buffer_view(
+    model: Any, object_id: Any, user: Optional[Any], viewer_ip: Optional[str]
+) -> None:
+    """Record a view of the ``model`` (class or instance) row with ``object_id``."""
+    content_type = ContentType.objects.get_for_model(model)
+    field = ":".join(
+        [
+            str(content_type.id),
+            str(object_id),
+            str(user.pk) if user else "",
+            viewer_ip or "",
+        ]
+    )
+    get_redis_client().hset(PENDING_VIEWS_KEY, field, timezone.now().isoformat())
+
+
+def flush_buffered_views() -> int:
+    """Write buffered views to ``ContentView``; returns the number flushed.
+
+    Only one flush runs at a time: an overlapping run returns 0 at once, as
+    two flushes of the same hash would both count its new views.
+    """
+    client = get_redis_client()
+    lock = client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT, blocking=False)
+    if not lock.acquire():
+        return 0
+
+    try:
+        return flush_views(client, lock)
+    finally:
+        release_lock(lock)
+
+
+def flush_views(client: Any, lock: Any) -> int:
+    # A hash left over from a failed flush is retried before taking new views
+    if not client.exists(FLUSHING_VIEWS_KEY):
+        if not client.exists(PENDING_VIEWS_KEY):
+            return 0
+        client.rename(PENDING_VIEWS_KEY, FLUSHING_VIEWS_KEY)
+
+    views: List[ContentView] = []
+    for field, last_viewed in client.hgetall(FLUSHING_VIEWS_KEY).items():
+        content_type_id, object_id, user_id, viewer_ip = field.decode().split(":", 3)
+        views.append(
+            ContentView(
+                content_type_id=int(content_type_id),
+                object_id=object_id,
+                user_id=user_id or None,
+                viewer_ip=viewer_ip or None,
+                last_viewed=datetime.fromisoformat(last_viewed.decode()),
+            )
+        )
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = get_existing_view_keys(get_view_keys(views))
+        new_views: List[ContentView] = []
+        seen_views: List[ContentView] = []
+        for view in views:
+            pk = existing.get(get_view_key(view))
+            if pk is None:
+                new_views.append(view)
+            else:
+                view.pk, view.updated_at = pk, now
+                seen_views.append(view)
+
+        # NULL users and IPs never conflict on the unique constraint, so
+        # existing rows are updated by primary key rather than upserted.
+        ContentView.objects.bulk_update(
+            seen_views, ["last_viewed", "updated_at"], batch_size=FLUSH_BATCH_SIZE
+        )
+        ContentView.objects.bulk_create(
+            new_views,
+            batch_size=FLUSH_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["content_type", "object_id", "user", "viewer_ip"],
+            update_fields=["last_viewed", "updated_at"],
+        )
+        increment_view_counts(Counter(get_view_key(view)[:2] for view in new_views))
+
+        # A flush that took over an expired lock would count this hash again
+        if not renew_lock(lock):
+            transaction.set_rollback(True)
+            return 0
+
+    client.delete(FLUSHING_VIEWS_KEY)
+    return len(views)
+
+
+ViewKey = Tuple[int, str, Optional[str], Optional[str]]
+
+
+def get_view_key(view: ContentView) -> ViewKey:
+    return (
+        view.content_type_id,
+        str(view.object_id),
+        str(view.user_id) if view.user_id else None,
+        view.viewer_ip,
+    )
+
+
+def get_view_keys(views: List[ContentView]) -> Set[ViewKey]:
+    return {get_view_key(view) for view in views}
+
+
+def get_existing_view_keys(keys: Set[ViewKey]) -> Dict[ViewKey, Any]:
+    """Map each of the ``keys`` that already has a ``ContentView`` row to its pk.
+
+    Each chunk is one lookup per key on the unique index; a missing user or
+    IP matches rows where it is NULL.
+    """
+    lookups = [
+        Q(
+            content_type_id=content_type_id,
+            object_id=object_id,
+            user_id=user_id,
+            viewer_ip=viewer_ip,
+        )
+        for content_type_id, object_id, user_id, viewer_ip in keys
+    ]
+    existing: Dict[ViewKey, Any] = {}
+    for start in range(0, len(lookups), FLUSH_BATCH_SIZE):
+        rows = ContentView.objects.filter(
+            reduce(operator.or_, lookups[start : start + FLUSH_BATCH_SIZE])
+        ).values_list("content_type_id", "object_id", "user_id", "viewer_ip", "pk")
+        for content_type_id, object_id, user_id, viewer_ip, pk in rows:
+            user_id = str(user_id) if user_id else None
+            existing[(content_type_id, str(object_id), user_id, viewer_ip)] = pk
+    return existing
+
+
+def increment_view_counts(increments: Dict[Tuple[int, str], int]) -> None:
+    if not increments:
+        return
+
+    table = connection.ops.quote_name(ContentViewCount._meta.db_table)
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} "
+            "(id, created_at, updated_at, content_type_id, object_id, view_count) "
+            "VALUES (%s, %s, %s, %s, %s, %s) "
+            "ON CONFLICT (content_type_id, object_id) DO UPDATE SET "
+            f"view_count = {table}.view_count + EXCLUDED.view_count, "
+            "updated_at = EXCLUDED.updated_at",
+            [
+                (uuid.uuid4(), now, now, content_type_id, object_id, count)
+                for (content_type_id, object_id), count in increments.items()
+            ],
+        )
+
+
+def rebuild_view_counts(chunk_size: int = FLUSH_BATCH_SIZE) -> int:
+    """Recompute every ``ContentViewCount`` from ``ContentView``, chunk by chunk.
+
+    Objects are walked in ``(content_type, object_id)`` order using the
+    unique index on ``ContentView``, so each chunk is an index range scan.
+    Counters of objects left without any views are reset to zero. Returns the
+    number of counters written.
+    """
+    written = ContentViewCount.objects.filter(
+        ~Exists(
+            ContentView.objects.filter(
+                content_type_id=OuterRef("content_type_id"),
+                object_id=OuterRef("object_id"),
+            )
+        ),
+        view_count__gt=0,
+    ).update(view_count=0, updated_at=timezone.now())
+    last_key: Optional[Tuple[int, Any]] = None
+
+    while True:
+        views = ContentView.objects.all()
+        if last_key is not None:
+            views = views.filter(
+                Q(content_type_id__gt=last_key[0])
+                | Q(content_type_id=last_key[0], object_id__gt=last_key[1])
+            )
+        chunk = list(
+            views.values("content_type_id", "object_id")
+            .annotate(view_count=Count("id"))
+            .order_by("content_type_id", "object_id")[:chunk_size]
+        )
+        if not chunk:
+            return written
+
+        ContentViewCount.objects.bulk_create(
+            [ContentViewCount(**row) for row in chunk],
+            update_conflicts=True,
+            unique_fields=["content_type", "object_id"],
+            update_fields=["view_count", "updated_at"],
+        )
+        written += len(chunk)
+        last_key = (chunk[-1]["content_type_id"], chunk[-1]["object_id"])
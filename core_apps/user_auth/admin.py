@@ -1,12 +1,14 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
+from core_apps.accounts.closures import close_user
+from core_apps.common.search import TrigramSearchMixin
 from .models import User
 from .forms import UserChangeForm, UserCreationForm
 
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(TrigramSearchMixin, UserAdmin):
     form = UserChangeForm
     add_form = UserCreationForm
     model = User
@@ -86,6 +88,8 @@ class CustomUserAdmin(UserAdmin):
     )
     search_fields = ["email", "username", "first_name", "last_name"]
     ordering = ["email"]
+    # Customers with ledger history cannot be deleted; close them instead
+    actions = ["close_users"]
     add_fieldsets = (
         (
             None,
@@ -106,3 +110,16 @@ class CustomUserAdmin(UserAdmin):
             },
         ),
     )
+
+    @admin.action(
+        description=_("Close selected users and their bank accounts"),
+        permissions=["change"],
+    )
+    def close_users(self, request, queryset):
+        for user in queryset:
+            close_user(user)
+        self.message_user(
+            request,
+            _("Closed %(count)d users.") % {"count": len(queryset)},
+            messages.SUCCESS,
+        )
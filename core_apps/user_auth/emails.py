@@ -1,48 +1,18 @@
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from django.utils.translation import gettext_lazy as _
-from loguru import logger
+from core_apps.common.emails import queue_email
 
 
 def send_otp_email(email, otp):
-    subject = _("Your OTP code for LOGIN")
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [email]
     context = {
         "otp": otp,
-        "expiry_time": settings.OTP_EXPIRATION,
-        "site_name": settings.SITE_NAME,
+        "expiry_time": int(settings.OTP_EXPIRATION.total_seconds() // 60),
     }
-    html_email = render_to_string("email/otp_email.html", context)
-    plain_email = strip_tags(html_email)
-    message = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-    message.attach_alternative(html_email, "text/html")
-    try:
-        message.send()
-        logger.info(f"OTP email sent successfully to: {email}")
-    except Exception as e:
-        logger.error(f"Failed to send OTP email to {email}: Error: {str(e)}")
+    queue_email("otp", [email], context)
 
 
 def send_account_locked_email(self):
-    subject = _("Your account has been locked")
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [self.email]
     context = {
-        "user": self,
+        "user": str(self.pk),
         "lockout_duration": int(settings.LOCKOUT_DURATION.total_seconds() // 60),
-        "site_name": settings.SITE_NAME,
     }
-    html_email = render_to_string("email/account_locked.html", context)
-    plain_email = strip_tags(html_email)
-    message = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-    message.attach_alternative(html_email, "text/html")
-    try:
-        message.send()
-        logger.info(f"Account locked email sent to: {self.email}")
-    except Exception as e:
-        logger.error(
-            f"Failed to send account locked email to {self.email}: Error: {str(e)}"
-        )
+    queue_email("account_locked", [self.email], context)
@@ -1,14 +1,19 @@
 import random
 import string
 from os import getenv
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
 
+from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import UserManager as DjangoUserManager
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
+from django.db import connections
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from core_apps.common.user_cache import invalidate_cached_user
+
 
 def generate_username() -> str:
     bank_name = getenv("BANK_NAME", "").strip()
@@ -69,3 +74,50 @@ class UserManager(DjangoUserManager):
             raise ValueError(_("Superuser must have is_superuser=True."))
 
         return self._create_user(email, password, **extra_fields)
+
+    def record_failed_login(self, email: str) -> Optional[Tuple[int, bool]]:
+        """Count a failed login for ``email`` in a single atomic UPDATE.
+
+        An expired lock restarts the count, and the account is locked once
+        the count reaches ``LOGIN_ATTEMPTS``. Returns the new attempt count
+        and whether this attempt is the one that locked the account, or
+        None when no user has that email.
+        """
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        now = timezone.now()
+        locked = self.model.AccountStatus.LOCKED
+        attempts_sql = (
+            "CASE WHEN account_status = %s AND last_failed_login < %s "
+            "THEN 1 ELSE LEAST(failed_login_attempt + 1, %s) END"
+        )
+        # Capped so a long burst against a locked account cannot overflow the column
+        attempts_params = [locked, now - settings.LOCKOUT_DURATION, 32767]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(self.model._meta.db_table)} SET "
+                f"failed_login_attempt = {attempts_sql}, "
+                f"account_status = CASE WHEN {attempts_sql} >= %s "
+                "THEN %s ELSE %s END, "
+                "last_failed_login = %s "
+                "WHERE email = %s "
+                "RETURNING id, failed_login_attempt",
+                [
+                    *attempts_params,
+                    *attempts_params,
+                    settings.LOGIN_ATTEMPTS,
+                    locked,
+                    self.model.AccountStatus.ACTIVE,
+                    now,
+                    email,
+                ],
+            )
+            row = cursor.fetchone()
+
+        if row is None:
+            return None
+        user_id, attempts = row
+        # The raw UPDATE bypasses post_save, so evict the cached user here
+        invalidate_cached_user(user_id)
+        return attempts, attempts == settings.LOGIN_ATTEMPTS
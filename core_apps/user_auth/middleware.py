@@ -4,6 +4,8 @@ class CustomerHeaderMiddleware:
 
     def __call__(self, request):
         response = self.get_response(request)
-        if request.user.is_authenticated:
-            response["X-Django-User"] = request.user.email
+        # Stateless token users carry no email claim
+        email = getattr(request.user, "email", None)
+        if request.user.is_authenticated and email:
+            response["X-Django-User"] = email
         return response
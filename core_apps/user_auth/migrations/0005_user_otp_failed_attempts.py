@@ -0,0 +1,20 @@
+# Generated by Django 4.2.15 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_auth", "0004_user_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="otp_failed_attempts",
+            field=models.PositiveSmallIntegerField(
+                default=0, verbose_name="OTP Failed Attempts"
+            ),
+        ),
+    ]
@@ -1,13 +1,14 @@
 import uuid
+from typing import Any
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from .emails import send_account_locked_email
+from core_apps.common.indexes import trigram_index
 from .managers import UserManager
-from django.contrib.auth.hashers import make_password, check_password
+from .otp_store import get_otp_store
 
 
 class User(AbstractUser):
@@ -68,6 +69,9 @@ class User(AbstractUser):
     last_failed_login = models.DateTimeField(null=True, blank=True)
     otp = models.CharField(_("OTP"), max_length=128, blank=True)
     otp_expiry_time = models.DateTimeField(_("OTP Expiry Time"), null=True, blank=True)
+    otp_failed_attempts = models.PositiveSmallIntegerField(
+        _("OTP Failed Attempts"), default=0
+    )
 
     objects = UserManager()
     USERNAME_FIELD = "email"
@@ -79,40 +83,83 @@ class User(AbstractUser):
         "security_answer",
     ]
 
+    # User fields surfaced through the profile; changing one of them touches it
+    PROFILE_FIELDS = (
+        "username",
+        "first_name",
+        "middle_name",
+        "last_name",
+        "email",
+        "id_no",
+    )
+    # Fields kept in the authenticated-user cache. Secrets such as the
+    # password hash and OTP stay out and load from the database on access.
+    AUTH_CACHE_FIELDS = (
+        "id",
+        "username",
+        "email",
+        "first_name",
+        "middle_name",
+        "last_name",
+        "role",
+        "account_status",
+        "is_active",
+        "is_staff",
+        "is_superuser",
+    )
+    # Changing one of these evicts the cached user
+    AUTH_CACHE_EVICT_FIELDS = AUTH_CACHE_FIELDS + ("password",)
+    LOGIN_STATE_FIELDS = ["failed_login_attempt", "last_failed_login", "account_status"]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def get_changed_fields(self) -> set[str]:
+        """Return the names of fields changed since the row was loaded or saved."""
+        loaded_values = getattr(self, "_loaded_values", None)
+        if loaded_values is None:
+            return {field.attname for field in self._meta.concrete_fields}
+        return {
+            name
+            for name, value in loaded_values.items()
+            if name in self.__dict__ and getattr(self, name) != value
+        }
+
     def set_otp(self, otp: str) -> None:
-        self.otp = make_password(otp)
-        self.otp_expiry_time = timezone.now() + settings.OTP_EXPIRATION
-        self.save()
+        get_otp_store().issue(self, otp)
 
     def verify_otp(self, otp: str) -> bool:
-        if self.otp and self.otp_expiry_time and self.otp_expiry_time > timezone.now():
-            if check_password(otp, self.otp):
-                self.otp = ""
-                self.otp_expiry_time = None
-                self.save()
-                return True
-        return False
-
-    def handle_failed_login_attempts(self) -> None:
-        self.failed_login_attempt += 1
-        self.last_failed_login = timezone.now()
-        if self.failed_login_attempt >= settings.LOGIN_ATTEMPTS:
-            self.account_status = self.AccountStatus.LOCKED
-            send_account_locked_email(self)
-        self.save()
+        return get_otp_store().redeem(self, otp)
 
     def reset_failed_login_attempts(self) -> None:
+        if (
+            self.failed_login_attempt == 0
+            and self.last_failed_login is None
+            and self.account_status == self.AccountStatus.ACTIVE
+        ):
+            return
         self.failed_login_attempt = 0
         self.last_failed_login = None
         self.account_status = self.AccountStatus.ACTIVE
-        self.save()
+        self.save(update_fields=self.LOGIN_STATE_FIELDS)
 
     def unlock_account(self) -> None:
         if self.account_status == self.AccountStatus.LOCKED:
             self.account_status = self.AccountStatus.ACTIVE
             self.failed_login_attempt = 0
             self.last_failed_login = None
-            self.save()
+            self.save(update_fields=self.LOGIN_STATE_FIELDS)
 
     # @property
     # def is_locked_out(self) -> bool:
@@ -157,6 +204,13 @@ class User(AbstractUser):
         verbose_name = _("User")
         verbose_name_plural = _("Users")
         ordering = ["-date_joined"]
+        indexes = [
+            trigram_index("email", "user_email_trgm_idx"),
+            trigram_index("username", "user_username_trgm_idx"),
+            trigram_index("first_name", "user_first_name_trgm_idx"),
+            trigram_index("last_name", "user_last_name_trgm_idx"),
+            trigram_index("id_no", "user_id_no_trgm_idx"),
+        ]
 
     def has_role(self, role_name: str) -> bool:
         return hasattr(self, "role") and self.role == role_name
@@ -0,0 +1,132 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+from core_apps.common.redis_client import get_redis_client
+from .utils import hash_otp
+
+
+class BaseOTPStore:
+    """Issues and redeems single-use login OTPs for a user."""
+
+    def issue(self, user: Any, otp: str) -> None:
+        raise NotImplementedError
+
+    def redeem(self, user: Any, otp: str) -> bool:
+        raise NotImplementedError
+
+
+class DatabaseOTPStore(BaseOTPStore):
+    """Keeps the OTP digest, expiry time and failed guesses on the user row.
+
+    Every wrong guess is counted, and the OTP is discarded once
+    ``OTP_MAX_ATTEMPTS`` guesses have failed.
+    """
+
+    OTP_FIELDS = ["otp", "otp_expiry_time", "otp_failed_attempts"]
+
+    def issue(self, user: Any, otp: str) -> None:
+        user.otp = hash_otp(user.pk, otp)
+        user.otp_expiry_time = timezone.now() + settings.OTP_EXPIRATION
+        user.otp_failed_attempts = 0
+        user.save(update_fields=self.OTP_FIELDS)
+
+    def redeem(self, user: Any, otp: str) -> bool:
+        with transaction.atomic():
+            # Concurrent guesses for the same user are counted one at a time.
+            digest, expiry_time, failed_attempts = (
+                type(user)
+                .objects.select_for_update()
+                .filter(pk=user.pk)
+                .values_list(*self.OTP_FIELDS)
+                .get()
+            )
+            if not digest or not expiry_time or expiry_time <= timezone.now():
+                return False
+
+            verified = constant_time_compare(hash_otp(user.pk, otp), digest)
+            if verified:
+                failed_attempts = 0
+            else:
+                failed_attempts += 1
+            if verified or failed_attempts >= settings.OTP_MAX_ATTEMPTS:
+                user.otp = ""
+                user.otp_expiry_time = None
+            else:
+                user.otp = digest
+                user.otp_expiry_time = expiry_time
+            user.otp_failed_attempts = failed_attempts
+            user.save(update_fields=self.OTP_FIELDS)
+        return verified
+
+
+class RedisOTPStore(BaseOTPStore):
+    """Keeps the OTP digest in Redis under a key that expires with the OTP.
+
+    Every redeem takes one attempt from an INCR counter next to the digest,
+    so like the database store an OTP allows ``OTP_MAX_ATTEMPTS`` tries and
+    is discarded after the last wrong one. A correct OTP is only accepted by
+    the request that deletes its key, which keeps it single-use.
+    """
+
+    key_prefix = "otp"
+
+    def __init__(self, client: Optional[Any] = None) -> None:
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = get_redis_client()
+        return self._client
+
+    def get_key(self, user: Any) -> str:
+        return f"{self.key_prefix}:{user.pk}"
+
+    def get_attempts_key(self, user: Any) -> str:
+        return f"{self.key_prefix}:{user.pk}:attempts"
+
+    def issue(self, user: Any, otp: str) -> None:
+        self.client.delete(self.get_attempts_key(user))
+        self.client.set(
+            self.get_key(user),
+            hash_otp(user.pk, otp),
+            ex=int(settings.OTP_EXPIRATION.total_seconds()),
+        )
+
+    def redeem(self, user: Any, otp: str) -> bool:
+        key = self.get_key(user)
+        attempts_key = self.get_attempts_key(user)
+        stored = self.client.get(key)
+        if stored is None:
+            return False
+
+        attempts = self.client.incr(attempts_key)
+        if attempts == 1:
+            self.client.expire(
+                attempts_key, int(settings.OTP_EXPIRATION.total_seconds())
+            )
+        if attempts <= settings.OTP_MAX_ATTEMPTS and constant_time_compare(
+            hash_otp(user.pk, otp), stored.decode()
+        ):
+            verified = bool(self.client.delete(key))
+            self.client.delete(attempts_key)
+            return verified
+        if attempts >= settings.OTP_MAX_ATTEMPTS:
+            self.client.delete(key, attempts_key)
+        return False
+
+
+@lru_cache(maxsize=None)
+def get_otp_store() -> BaseOTPStore:
+    backend = getattr(
+        settings,
+        "OTP_STORE_BACKEND",
+        "core_apps.user_auth.otp_store.DatabaseOTPStore",
+    )
+    return import_string(backend)()
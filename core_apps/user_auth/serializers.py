@@ -1,7 +1,15 @@
+from typing import Any, Dict
+
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from djoser.serializers import (
     UserCreateSerializer as DjoserUserCreateSerializer,
 )
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import UserRefreshToken
 
 User = get_user_model()
 
@@ -27,3 +35,27 @@ class UserCreateSerializer(DjoserUserCreateSerializer):
     def create(self, validated_data):
         user = User.objects.create_user(**validated_data)
         return user
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refreshes tokens with the user's current role and account status.
+
+    The claims are re-read from the database on every refresh, so a demoted
+    or locked user loses the old claims once their access token expires,
+    and a locked or deactivated user cannot refresh at all.
+    """
+
+    token_class = UserRefreshToken
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, str]:
+        refresh = self.token_class(attrs["refresh"])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not user.is_active or user.is_locked_out():
+            raise AuthenticationFailed(
+                _("No active account found for this token."), "no_active_account"
+            )
+
+        refresh.set_user_claims(user)
+        return super().validate({**attrs, "refresh": str(refresh)})
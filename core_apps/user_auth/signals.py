@@ -0,0 +1,29 @@
+from typing import Any
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from config.settings.base import AUTH_USER_MODEL
+from core_apps.common.user_cache import invalidate_cached_user
+
+
+@receiver(post_save, sender=AUTH_USER_MODEL)
+def invalidate_cached_auth_user(
+    sender: type[Model], instance: Model, created: bool, **kwargs: Any
+) -> None:
+    if created:
+        return
+
+    changed_fields = instance.get_changed_fields()
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None:
+        changed_fields &= set(update_fields)
+
+    if changed_fields.intersection(instance.AUTH_CACHE_EVICT_FIELDS):
+        invalidate_cached_user(instance.pk)
+
+
+@receiver(post_delete, sender=AUTH_USER_MODEL)
+def invalidate_deleted_auth_user(
+    sender: type[Model], instance: Model, **kwargs: Any
+) -> None:
+    invalidate_cached_user(instance.pk)
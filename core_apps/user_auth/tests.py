@@ -0,0 +1,511 @@
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Optional
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from loguru import logger
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core_apps.common.cookie_auth import CookieAuthentication
+from core_apps.common.redis_client import local_redis
+from core_apps.common.user_cache import (
+    cache_user,
+    get_cached_user,
+    get_user_cache_key,
+)
+from .otp_store import BaseOTPStore, DatabaseOTPStore, RedisOTPStore
+from .utils import hash_otp, make_otp_challenge, read_otp_challenge
+from .tokens import UserRefreshToken
+from .views import CustomTokenCreateView, CustomTokenRefreshView, OTPVerifyView
+
+User = get_user_model()
+
+LOCAL_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+PASSWORD = "Str0ng-pass!"
+
+
+def create_user(index: int = 1, **extra_fields: Any) -> Any:
+    with mock.patch.dict(os.environ, {"BANK_NAME": "OneGen Bank"}):
+        return User.objects.create_user(
+            email=f"user{index}@example.com",
+            password=PASSWORD,
+            first_name="Test",
+            last_name=f"User{index}",
+            id_no=index,
+            security_question=User.SecurityQuestion.BIRTH_CITY,
+            security_answer="Lagos",
+            **extra_fields,
+        )
+
+
+def median_duration(
+    func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None
+) -> float:
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+class OTPChallengeTests(TestCase):
+    def test_challenge_round_trips_user_id(self) -> None:
+        user = create_user()
+        self.assertEqual(read_otp_challenge(make_otp_challenge(user.pk)), str(user.pk))
+
+    def test_tampered_challenge_is_rejected(self) -> None:
+        user = create_user()
+        self.assertIsNone(read_otp_challenge(make_otp_challenge(user.pk) + "x"))
+
+    def test_digest_is_bound_to_user(self) -> None:
+        self.assertNotEqual(hash_otp("a", "123456"), hash_otp("b", "123456"))
+
+
+class OTPStoreTestsMixin:
+    """Behaviour every OTP store must share."""
+
+    def get_store(self) -> BaseOTPStore:
+        raise NotImplementedError
+
+    def expire_otp(self) -> None:
+        raise NotImplementedError
+
+    def setUp(self) -> None:
+        self.store = self.get_store()
+        self.user = create_user()
+
+    def test_otp_is_single_use(self) -> None:
+        self.store.issue(self.user, "123456")
+        self.assertTrue(self.store.redeem(self.user, "123456"))
+        self.assertFalse(self.store.redeem(self.user, "123456"))
+
+    def test_expired_otp_is_rejected(self) -> None:
+        self.store.issue(self.user, "123456")
+        self.expire_otp()
+        self.assertFalse(self.store.redeem(self.user, "123456"))
+
+    def test_wrong_guess_leaves_otp_usable_below_limit(self) -> None:
+        self.store.issue(self.user, "123456")
+        with self.settings(OTP_MAX_ATTEMPTS=3):
+            self.assertFalse(self.store.redeem(self.user, "000000"))
+            self.assertTrue(self.store.redeem(self.user, "123456"))
+
+    def test_otp_is_discarded_after_max_failed_attempts(self) -> None:
+        self.store.issue(self.user, "123456")
+        with self.settings(OTP_MAX_ATTEMPTS=3):
+            for guess in ("000000", "111111", "222222"):
+                self.assertFalse(self.store.redeem(self.user, guess))
+            self.assertFalse(self.store.redeem(self.user, "123456"))
+
+    def test_issuing_resets_failed_attempts(self) -> None:
+        self.store.issue(self.user, "123456")
+        with self.settings(OTP_MAX_ATTEMPTS=2):
+            self.store.redeem(self.user, "000000")
+            self.store.issue(self.user, "654321")
+            self.store.redeem(self.user, "000000")
+            self.assertTrue(self.store.redeem(self.user, "654321"))
+
+
+class DatabaseOTPStoreTests(OTPStoreTestsMixin, TestCase):
+    def get_store(self) -> BaseOTPStore:
+        return DatabaseOTPStore()
+
+    def expire_otp(self) -> None:
+        User.objects.filter(pk=self.user.pk).update(
+            otp_expiry_time=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_discarded_otp_is_cleared_from_the_row(self) -> None:
+        self.store.issue(self.user, "123456")
+        with self.settings(OTP_MAX_ATTEMPTS=1):
+            self.store.redeem(self.user, "000000")
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.otp, "")
+        self.assertEqual(self.user.otp_failed_attempts, 1)
+
+
+@override_settings(REDIS_USE_LOCAL_STANDIN=True)
+class RedisOTPStoreTests(OTPStoreTestsMixin, TestCase):
+    """Runs offline against the in-process Redis stand-in."""
+
+    def get_store(self) -> BaseOTPStore:
+        local_redis.flushdb()
+        return RedisOTPStore()
+
+    def expire_otp(self) -> None:
+        local_redis.delete(self.store.get_key(self.user))
+
+    def test_otp_expires_with_its_key(self) -> None:
+        with mock.patch("core_apps.common.redis_client.time.monotonic") as monotonic:
+            monotonic.return_value = 1000.0
+            self.store.issue(self.user, "123456")
+            monotonic.return_value += 3600
+            self.assertFalse(self.store.redeem(self.user, "123456"))
+
+    def test_issue_and_redeem_do_not_touch_the_database(self) -> None:
+        with self.assertNumQueries(0):
+            self.store.issue(self.user, "123456")
+            self.store.redeem(self.user, "000000")
+            self.assertTrue(self.store.redeem(self.user, "123456"))
+
+
+@mock.patch.object(OTPVerifyView, "throttle_classes", [])
+@mock.patch("core_apps.user_auth.models.get_otp_store", DatabaseOTPStore)
+class OTPVerifyViewTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = create_user()
+
+    def verify(self, otp: str, challenge: str) -> Any:
+        return self.client.post(
+            reverse("verify_otp"), {"otp": otp, "challenge": challenge}
+        )
+
+    def test_verify_with_challenge_sets_auth_cookies(self) -> None:
+        self.user.set_otp("123456")
+        response = self.verify("123456", make_otp_challenge(self.user.pk))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.cookies)
+        self.assertIn("refresh", response.cookies)
+
+    def test_otp_of_another_user_is_rejected(self) -> None:
+        other = create_user(2)
+        other.set_otp("123456")
+        self.user.set_otp("654321")
+
+        response = self.verify("123456", make_otp_challenge(self.user.pk))
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_challenge_is_rejected(self) -> None:
+        self.user.set_otp("123456")
+        self.assertEqual(self.verify("123456", "not-a-challenge").status_code, 400)
+
+    def test_verify_query_count_ignores_pending_otps(self) -> None:
+        expiry_time = timezone.now() + timedelta(minutes=1)
+        User.objects.bulk_create(
+            User(
+                username=f"P-{index:010d}",
+                email=f"pending{index}@example.com",
+                id_no=100 + index,
+                otp=hash_otp("x", "123456"),
+                otp_expiry_time=expiry_time,
+            )
+            for index in range(50)
+        )
+        self.user.set_otp("123456")
+        challenge = make_otp_challenge(self.user.pk)
+
+        # User lookup; savepoint, row lock, update and release for the redeem;
+        # the outstanding refresh token insert.
+        with self.assertNumQueries(6):
+            self.verify("123456", challenge)
+
+
+@mock.patch.object(CustomTokenCreateView, "throttle_classes", [])
+@mock.patch.object(OTPVerifyView, "throttle_classes", [])
+@mock.patch("core_apps.user_auth.models.get_otp_store", DatabaseOTPStore)
+@mock.patch("core_apps.user_auth.views.generate_otp", return_value="123456")
+class LoginFlowQueryCountTests(TestCase):
+    """Auth-state saves on the user must not cascade into the profile."""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = create_user()
+
+    def test_login_and_verify_query_count(self, generate_otp: mock.Mock) -> None:
+        with CaptureQueriesContext(connection) as login_queries:
+            response = self.client.post(
+                reverse("login"), {"email": self.user.email, "password": PASSWORD}
+            )
+        self.assertEqual(response.status_code, 200)
+
+        with CaptureQueriesContext(connection) as verify_queries:
+            response = self.client.post(
+                reverse("verify_otp"),
+                {"otp": "123456", "challenge": response.data["challenge"]},
+            )
+        self.assertEqual(response.status_code, 200)
+
+        queries = login_queries.captured_queries + verify_queries.captured_queries
+        self.assertFalse([q["sql"] for q in queries if "user_profile" in q["sql"]])
+        # Login: user lookup and the OTP update. Verify: user lookup, the
+        # locked redeem (savepoint, SELECT, UPDATE, release) and the
+        # outstanding refresh token.
+        self.assertEqual(len(login_queries), 2)
+        self.assertEqual(len(verify_queries), 6)
+
+    def test_auth_state_saves_use_one_update(self, generate_otp: mock.Mock) -> None:
+        User.objects.record_failed_login(self.user.email)
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            user.reset_failed_login_attempts()
+
+    def test_profile_field_change_touches_profile(
+        self, generate_otp: mock.Mock
+    ) -> None:
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = "Renamed"
+        with CaptureQueriesContext(connection) as queries:
+            user.save(update_fields=["first_name"])
+        self.assertTrue(
+            [q["sql"] for q in queries.captured_queries if "user_profile" in q["sql"]]
+        )
+
+
+class FailedLoginConcurrencyTests(TransactionTestCase):
+    def test_parallel_failed_logins_lock_at_the_exact_threshold(self) -> None:
+        user = create_user()
+
+        def fail_login(_: int) -> Any:
+            try:
+                return User.objects.record_failed_login(user.email)
+            finally:
+                connection.close()
+
+        with self.settings(LOGIN_ATTEMPTS=5):
+            with ThreadPoolExecutor(max_workers=10) as pool:
+                results = list(pool.map(fail_login, range(40)))
+
+        # No increment is lost, and only the fifth attempt reports the lock.
+        attempts = sorted(attempts for attempts, _ in results)
+        self.assertEqual(attempts, list(range(1, 41)))
+        self.assertEqual(
+            [attempts for attempts, locked_now in results if locked_now], [5]
+        )
+        user.refresh_from_db()
+        self.assertEqual(user.account_status, User.AccountStatus.LOCKED)
+        self.assertEqual(user.failed_login_attempt, 40)
+
+
+@mock.patch.object(CustomTokenCreateView, "throttle_classes", [])
+class FailedLoginViewTests(TestCase):
+    @mock.patch("core_apps.user_auth.views.send_account_locked_email")
+    def test_lock_email_is_sent_once_per_lock(self, send_email: mock.Mock) -> None:
+        user = create_user()
+        client = APIClient()
+        with self.settings(LOGIN_ATTEMPTS=3):
+            statuses = [
+                client.post(
+                    reverse("login"), {"email": user.email, "password": "wrong"}
+                ).status_code
+                for _ in range(5)
+            ]
+
+        self.assertEqual(statuses, [400, 400, 403, 403, 403])
+        send_email.assert_called_once()
+
+
+@mock.patch.object(CustomTokenRefreshView, "throttle_classes", [])
+class TokenRefreshClaimsTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = create_user(role=User.RoleChoices.BRANCH_MANAGER)
+        self.refresh = str(UserRefreshToken.for_user(self.user))
+
+    def refresh_tokens(self) -> Any:
+        return self.client.post(reverse("refresh"), {"refresh": self.refresh})
+
+    def test_refresh_reads_the_current_role(self) -> None:
+        self.user.role = User.RoleChoices.CUSTOMER
+        self.user.save(update_fields=["role"])
+
+        response = self.refresh_tokens()
+        self.assertEqual(response.status_code, 200)
+        access = AccessToken(response.cookies["access"].value)
+        self.assertEqual(access["role"], User.RoleChoices.CUSTOMER)
+
+    def test_locked_user_cannot_refresh(self) -> None:
+        self.user.account_status = User.AccountStatus.LOCKED
+        self.user.last_failed_login = timezone.now()
+        self.user.save(update_fields=["account_status", "last_failed_login"])
+        self.assertEqual(self.refresh_tokens().status_code, 401)
+
+    def test_inactive_user_cannot_refresh(self) -> None:
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(self.refresh_tokens().status_code, 401)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class UserCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.user = create_user()
+        cache_user(self.user)
+
+    def test_only_auth_cache_fields_are_cached(self) -> None:
+        cached = cache.get(
+            get_user_cache_key(self.user.pk),
+            version=settings.AUTH_USER_CACHE_VERSION,
+        )
+        self.assertEqual(set(cached), set(User.AUTH_CACHE_FIELDS))
+        self.assertNotIn("password", cached)
+
+    def test_cached_user_loads_secrets_lazily(self) -> None:
+        user = get_cached_user(self.user.pk)
+        self.assertEqual(user.email, self.user.email)
+        self.assertNotIn("password", user.__dict__)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password(PASSWORD))
+
+    def test_name_change_evicts_cached_user(self) -> None:
+        self.user.first_name = "Renamed"
+        self.user.save(update_fields=["first_name"])
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    def test_role_change_evicts_cached_user(self) -> None:
+        self.user.role = User.RoleChoices.TELLER
+        self.user.save(update_fields=["role"])
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    def test_cached_user_skips_the_user_query(self) -> None:
+        token = AccessToken.for_user(self.user)
+        with self.assertNumQueries(0):
+            user = CookieAuthentication().get_user(token)
+        self.assertEqual(user.pk, self.user.pk)
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+@mock.patch.object(OTPVerifyView, "throttle_classes", [])
+@mock.patch("core_apps.user_auth.models.get_otp_store", DatabaseOTPStore)
+class OTPVerifyBenchmark(TestCase):
+    """Verify latency should not depend on how many OTPs are pending."""
+
+    sizes = (10, int(os.getenv("BENCHMARK_PENDING_OTPS", "100000")))
+
+    def add_pending_otps(self, start: int, stop: int) -> None:
+        expiry_time = timezone.now() + timedelta(minutes=10)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f"P-{index:010d}",
+                    email=f"pending{index}@example.com",
+                    id_no=100 + index,
+                    otp=hash_otp(index, "123456"),
+                    otp_expiry_time=expiry_time,
+                )
+                for index in range(start, stop)
+            ),
+            batch_size=5000,
+        )
+
+    def test_verify_latency_is_flat(self) -> None:
+        client = APIClient()
+        user = create_user()
+        challenge = make_otp_challenge(user.pk)
+
+        def issue() -> None:
+            user.set_otp("123456")
+
+        def verify() -> None:
+            client.post(
+                reverse("verify_otp"), {"otp": "123456", "challenge": challenge}
+            )
+
+        latencies = []
+        pending = 0
+        for size in self.sizes:
+            self.add_pending_otps(pending, size)
+            pending = size
+            latencies.append(median_duration(verify, repeat=50, setup=issue))
+            logger.info(
+                f"OTP verify with {size} pending OTPs: {latencies[-1] * 1000:.2f} ms"
+            )
+
+        self.assertLess(latencies[-1], latencies[0] * 3 + 0.005)
+
+
+TRIGRAM_INDEXES = {
+    "email": "user_email_trgm_idx",
+    "username": "user_username_trgm_idx",
+    "first_name": "user_first_name_trgm_idx",
+    "last_name": "user_last_name_trgm_idx",
+    "id_no": "user_id_no_trgm_idx",
+}
+
+
+class TrigramSearchTests(TestCase):
+    def setUp(self) -> None:
+        for index in range(1, 4):
+            create_user(index)
+        admin_user = create_user(99, is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+        self.url = reverse("admin:user_auth_user_changelist")
+
+    def test_admin_search_matches_long_terms(self) -> None:
+        response = self.client.get(self.url, {"q": "user2"})
+
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+    def test_admin_ignores_short_terms_with_a_warning(self) -> None:
+        response = self.client.get(self.url, {"q": "us"})
+
+        self.assertEqual(response.context["cl"].result_count, 4)
+        self.assertIn(
+            "Ignored search terms shorter than 3 characters: us",
+            [str(message) for message in response.context["messages"]],
+        )
+
+    def test_icontains_lookups_can_use_the_trigram_indexes(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for field, index_name in TRIGRAM_INDEXES.items():
+            with self.subTest(field=field):
+                plan = User.objects.filter(**{f"{field}__icontains": "123"}).explain()
+                self.assertIn(index_name, plan)
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+class UserSearchBenchmark(TestCase):
+    """Substring search latency over the trigram-indexed user columns."""
+
+    users = int(os.getenv("BENCHMARK_USERS", "1000000"))
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f"S-{index:010d}",
+                    email=f"search{index}@example.com",
+                    first_name=f"First{index}",
+                    last_name=f"Last{index}",
+                    id_no=100 + index,
+                )
+                for index in range(cls.users)
+            ),
+            batch_size=5000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE user_auth_user")
+
+    def test_search_latency(self) -> None:
+        term = str(self.users // 2)
+        search = (
+            User.objects.filter(email__icontains=term)
+            | User.objects.filter(first_name__icontains=term)
+            | User.objects.filter(last_name__icontains=term)
+        )
+
+        latency = median_duration(lambda: list(search[:20]), repeat=20)
+        logger.info(f"User search over {self.users} users: {latency * 1000:.2f} ms")
+        self.assertNotIn("Seq Scan", search.explain())
@@ -0,0 +1,17 @@
+from typing import Any
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class UserRefreshToken(RefreshToken):
+    """Refresh token carrying the claims used by stateless permission checks."""
+
+    @classmethod
+    def for_user(cls, user: Any) -> "UserRefreshToken":
+        token = super().for_user(user)
+        token.set_user_claims(user)
+        return token
+
+    def set_user_claims(self, user: Any) -> None:
+        self["role"] = user.role
+        self["account_status"] = user.account_status
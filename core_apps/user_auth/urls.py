@@ -1,14 +1,21 @@
 from django.urls import path
+from rest_framework.routers import SimpleRouter
 from .views import (
     CustomTokenCreateView,
     CustomTokenRefreshView,
+    CustomUserViewSet,
     LogoutAPIView,
     OTPVerifyView,
 )
 
+# Takes the place of djoser's own users routes, which are included after
+# these, so that deleting a customer with ledger history closes them.
+router = SimpleRouter()
+router.register("users", CustomUserViewSet, basename="user")
+
 urlpatterns = [
     path("login/", CustomTokenCreateView.as_view(), name="login"),
     path("verify-otp/", OTPVerifyView.as_view(), name="verify_otp"),
     path("refresh/", CustomTokenRefreshView.as_view(), name="refresh"),
     path("logout/", LogoutAPIView.as_view(), name="logout"),
-]
+] + router.urls
@@ -1,6 +1,37 @@
 import random
 import string
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import salted_hmac
+
+OTP_CHALLENGE_SALT = "core_apps.user_auth.otp_challenge"
+OTP_DIGEST_SALT = "core_apps.user_auth.otp_digest"
 
 
 def generate_otp(length=6) -> str:
     return "".join(random.choices(string.digits, k=length))
+
+
+def hash_otp(user_id: str, otp: str) -> str:
+    """Keyed digest of an OTP, bound to the user it was issued for."""
+    return salted_hmac(
+        OTP_DIGEST_SALT, f"{user_id}:{otp}", algorithm="sha256"
+    ).hexdigest()
+
+
+def make_otp_challenge(user_id: str) -> str:
+    return signing.dumps(str(user_id), salt=OTP_CHALLENGE_SALT)
+
+
+def read_otp_challenge(challenge: str) -> Optional[str]:
+    """Return the user id carried by a login challenge, or None if it is invalid."""
+    try:
+        return signing.loads(
+            challenge,
+            salt=OTP_CHALLENGE_SALT,
+            max_age=settings.OTP_EXPIRATION,
+        )
+    except signing.BadSignature:
+        return None
@@ -1,18 +1,19 @@
 from typing import Any, Optional
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.utils import timezone
-from djoser.views import TokenCreateView
+from djoser import utils as djoser_utils
+from djoser.views import TokenCreateView, UserViewSet
 from loguru import logger
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
-from .emails import send_otp_email
-from .utils import generate_otp
-from django.contrib.auth.hashers import make_password, check_password
+from core_apps.accounts.closures import delete_or_close_user
+from .emails import send_account_locked_email, send_otp_email
+from .serializers import UserTokenRefreshSerializer
+from .tokens import UserRefreshToken
+from .utils import generate_otp, make_otp_challenge, read_otp_challenge
 
 
 User = get_user_model()
@@ -67,6 +68,7 @@ class CustomTokenCreateView(TokenCreateView):
             {
                 "success": "OTP sent to your email",
                 "email": user.email,
+                "challenge": make_otp_challenge(user.pk),
             },
             status=status.HTTP_200_OK,
         )
@@ -78,14 +80,16 @@ class CustomTokenCreateView(TokenCreateView):
             return self._action(serializer)
 
         email = request.data.get("email")
-        user = User.objects.filter(email=email).first()
+        result = User.objects.record_failed_login(email) if email else None
 
-        if user:
-            user.maybe_unlock_account()
-            user.handle_failed_login_attempts()
-            failed_attempts = user.failed_login_attempt
+        if result:
+            failed_attempts, locked_now = result
             logger.error(f"Failed login attempts: {failed_attempts} for user: {email}")
 
+            # Only the attempt that crossed the threshold sends the email
+            if locked_now:
+                send_account_locked_email(User.objects.get(email=email))
+
             if failed_attempts >= settings.LOGIN_ATTEMPTS:
                 return Response(
                     {
@@ -106,6 +110,8 @@ class CustomTokenCreateView(TokenCreateView):
 
 
 class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = UserTokenRefreshSerializer
+
     def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         refresh_token = request.COOKIES.get("refresh")
 
@@ -147,26 +153,20 @@ class OTPVerifyView(APIView):
 
     def post(self, request):
         otp = request.data.get("otp")
+        challenge = request.data.get("challenge")
 
-        if not otp:
+        if not otp or not challenge:
             return Response(
-                {"error": "OTP is required"}, status=status.HTTP_400_BAD_REQUEST
+                {"error": "OTP and login challenge are required"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        logger.info(f"Received OTP: {otp}")
-
-        # Find users with non-expired OTPs
-        now = timezone.now()
-        users = User.objects.filter(otp_expiry_time__gt=now)
-
-        user = None
-        for u in users:
-            if check_password(otp, u.otp):
-                user = u
-                break
+        # The challenge issued at login names the user, so only their OTP is checked
+        user_id = read_otp_challenge(challenge)
+        user = User.objects.filter(pk=user_id).first() if user_id else None
 
         if not user:
-            logger.info("No user found with provided OTP")
+            logger.info("No user found for the provided login challenge")
             return Response(
                 {"error": "Invalid or expired OTP"}, status=status.HTTP_400_BAD_REQUEST
             )
@@ -182,13 +182,15 @@ class OTPVerifyView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Mark OTP as used
-        user.otp = ""
-        user.otp_expiry_time = None
-        user.save()
+        # Verifying marks the OTP as used
+        if not user.verify_otp(otp):
+            logger.info(f"Invalid or expired OTP for user: {user.email}")
+            return Response(
+                {"error": "Invalid or expired OTP"}, status=status.HTTP_400_BAD_REQUEST
+            )
 
         # Create JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         access_token = str(refresh.access_token)
         refresh_token = str(refresh)
 
@@ -210,3 +212,11 @@ class LogoutAPIView(APIView):
         response.delete_cookie("refresh")
         response.delete_cookie("logged_in")
         return response
+
+
+class CustomUserViewSet(UserViewSet):
+    def perform_destroy(self, instance):
+        if instance == self.request.user:
+            djoser_utils.logout_user(self.request)
+        if not delete_or_close_user(instance):
+            logger.info(f"Closed {instance.email} instead of deleting: ledger history")
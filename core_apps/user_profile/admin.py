@@ -3,6 +3,7 @@ from cloudinary.forms import CloudinaryFileField
 from django import forms
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
+from core_apps.common.search import TrigramSearchMixin
 from .models import NextOfKin, Profile
 
 
@@ -25,7 +26,7 @@ class NextOfKinInLine(admin.TabularInline):
 
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(TrigramSearchMixin, admin.ModelAdmin):
     form = ProfileAdminForm
     inlines = [NextOfKinInLine]
     list_display = [
@@ -41,12 +42,9 @@ class ProfileAdmin(admin.ModelAdmin):
     ]
     list_display_links = ["user"]
     list_filter = ["gender", "marital_status", "employment_status", "country"]
-    search_fields = [
-        "user__email",
-        "user__first_name",
-        "user__last_name",
-        "phone_number",
-    ]
+    search_fields = ["phone_number"]
+    user_search_fields = ["first_name", "last_name", "email"]
+    search_help_text = _("Search by phone number, customer name or email.")
     readonly_fields = ["user"]
     fieldsets = (
         (
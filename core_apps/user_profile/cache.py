@@ -0,0 +1,26 @@
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_profile_cache_key(user_id: Any) -> str:
+    return f"profile_detail:{user_id}"
+
+
+def get_cached_profile(user_id: Any) -> Optional[dict]:
+    return cache.get(get_profile_cache_key(user_id))
+
+
+def cache_profile(user_id: Any, data: dict) -> None:
+    cache.set(
+        get_profile_cache_key(user_id), data, timeout=settings.PROFILE_CACHE_TIMEOUT
+    )
+
+
+def invalidate_cached_profile(user_id: Any) -> None:
+    key = get_profile_cache_key(user_id)
+    cache.delete(key)
+    # Drop it again at commit, in case a concurrent read re-cached the old row
+    transaction.on_commit(lambda: cache.delete(key))
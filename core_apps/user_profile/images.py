@@ -0,0 +1,63 @@
+import os
+from io import BytesIO
+from typing import IO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg"}
+
+
+def normalize_image(
+    file: IO[bytes], max_dimension: int, quality: int | None = None
+) -> ContentFile:
+    """Re-encode an image so its longest side is at most ``max_dimension``.
+
+    The EXIF orientation is applied to the pixels and the metadata itself is
+    dropped (it can carry GPS coordinates and camera details). The output
+    format is ``PROFILE_IMAGE_FORMAT``, WEBP or JPEG.
+    """
+    image_format = settings.PROFILE_IMAGE_FORMAT
+    quality = quality or settings.PROFILE_IMAGE_QUALITY
+
+    with Image.open(file) as image:
+        # For JPEG sources, decode at a reduced scale straight away instead
+        # of decoding the full resolution and resizing afterwards.
+        image.draft("RGB", (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        if image_format == "JPEG" or image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("RGBA", "LA") or (
+                image.mode == "P" and "transparency" in image.info
+            )
+            if has_alpha and image_format == "WEBP":
+                image = image.convert("RGBA")
+            elif has_alpha:
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.convert("RGBA").split()[-1])
+                image = background
+            else:
+                image = image.convert("RGB")
+
+        output = BytesIO()
+        if image_format == "WEBP":
+            image.save(output, "WEBP", quality=quality, method=4)
+        else:
+            image.save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+
+    name = os.path.splitext(os.path.basename(getattr(file, "name", "") or "image"))[0]
+    return ContentFile(output.getvalue(), name=f"{name}{EXTENSIONS[image_format]}")
+
+
+def make_profile_image(file: IO[bytes]) -> ContentFile:
+    return normalize_image(file, settings.PROFILE_IMAGE_MAX_DIMENSION)
+
+
+def make_profile_thumbnail(file: IO[bytes]) -> ContentFile:
+    return normalize_image(
+        file,
+        settings.PROFILE_THUMBNAIL_DIMENSION,
+        quality=settings.PROFILE_THUMBNAIL_QUALITY,
+    )
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.15 on 2026-10-16 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_profile", "0002_profile_account_currency_profile_account_type"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(
+                fields=["created_at", "id"], name="profile_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.15 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_profile", "0004_profile_phone_trgm_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="photo_thumbnail_url",
+            field=models.URLField(
+                blank=True, null=True, verbose_name="Photo Thumbnail URL"
+            ),
+        ),
+    ]
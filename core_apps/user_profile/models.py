@@ -7,6 +7,7 @@ from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
 from phonenumber_field.modelfields import PhoneNumberField
+from core_apps.common.indexes import trigram_index
 from core_apps.common.models import TimeStampedModel
 from core_apps.accounts.models import BankAccount
 
@@ -207,6 +208,9 @@ class Profile(TimeStampedModel):
         null=True,
     )
     photo_url = models.URLField(_("Photo URL"), blank=True, null=True)
+    photo_thumbnail_url = models.URLField(
+        _("Photo Thumbnail URL"), blank=True, null=True
+    )
 
     id_photo = CloudinaryField(
         _("ID Photo"),
@@ -262,6 +266,12 @@ class Profile(TimeStampedModel):
     def __str__(self) -> str:
         return f"{self.title} {self.user.first_name}'s Profile"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="profile_created_id_idx"),
+            trigram_index("phone_number", "profile_phone_trgm_idx"),
+        ]
+
 
 class NextOfKin(TimeStampedModel):
     class Salutation(models.TextChoices):
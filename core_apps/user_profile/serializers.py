@@ -1,16 +1,13 @@
-import base64
 from typing import Any, Dict
-from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.contenttypes.models import ContentType
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
+from django.db import transaction
 from django_countries.serializer_fields import CountryField
 from phonenumber_field.serializerfields import PhoneNumberField
 from rest_framework import serializers
-from core_apps.common.models import ContentView
+from core_apps.common.models import ContentViewCount
 from core_apps.accounts.models import BankAccount
 from .models import Profile, NextOfKin
+from .staging import stage_upload
 from .tasks import upload_photos_to_cloudinary
 
 User = get_user_model()
@@ -127,15 +124,6 @@ class ProfileSerializer(serializers.ModelSerializer):
             )
         return attrs
 
-    def to_representation(self, instance: Profile) -> dict:
-        representation = super().to_representation(instance)
-
-        representation["next_of_kin"] = NextOfKinSerializer(
-            instance.next_of_kin.all(), many=True
-        ).data
-
-        return representation
-
     def update(self, instance: Profile, validated_data: dict) -> Profile:
         user_data = validated_data.pop("user", {})
 
@@ -150,16 +138,7 @@ class ProfileSerializer(serializers.ModelSerializer):
         for field in ["photo", "id_photo", "signature_photo"]:
             if field in validated_data:
                 photo = validated_data.pop(field)
-                if photo.size > settings.MAX_UPLOAD_SIZE:
-                    temp_file = default_storage.save(
-                        f"temp_{instance.id}_{field}.jpg", ContentFile(photo.read())
-                    )
-                    temp_file_path = default_storage.path(temp_file)
-                    photos_to_upload[field] = {"type": "file", "path": temp_file_path}
-                else:
-                    image_content = photo.read()
-                    encoded_image = base64.b64encode(image_content).decode("utf-8")
-                    photos_to_upload[field] = {"type": "base64", "data": encoded_image}
+                photos_to_upload[field] = stage_upload(photo, instance.id, field)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -167,15 +146,16 @@ class ProfileSerializer(serializers.ModelSerializer):
         instance.save()
 
         if photos_to_upload:
-            upload_photos_to_cloudinary.delay(str(instance.id), photos_to_upload)
+            transaction.on_commit(
+                lambda: upload_photos_to_cloudinary.delay(
+                    str(instance.id), photos_to_upload
+                )
+            )
 
         return instance
 
     def get_view_count(self, obj: Profile) -> int:
-        content_type = ContentType.objects.get_for_model(obj)
-        return ContentView.objects.filter(
-            content_type=content_type, object_id=obj.id
-        ).count()
+        return ContentViewCount.get_count(Profile, obj.id)
 
 
 class ProfileListSerializer(serializers.ModelSerializer):
@@ -198,6 +178,8 @@ class ProfileListSerializer(serializers.ModelSerializer):
         ]
 
     def get_photo(self, obj: Profile) -> str | None:
+        if obj.photo_thumbnail_url:
+            return obj.photo_thumbnail_url
         try:
             return obj.photo.url
         except AttributeError:
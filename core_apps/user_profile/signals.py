@@ -1,9 +1,11 @@
 from typing import Any
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 from loguru import logger
 from config.settings.base import AUTH_USER_MODEL
-from core_apps.user_profile.models import Profile
+from core_apps.user_profile.models import NextOfKin, Profile
+from .cache import invalidate_cached_profile
 from django.db.models import Model
 
 
@@ -15,5 +17,28 @@ def create_or_update_user_profile(
         Profile.objects.create(user=instance)
         logger.info(f"Profile created for {instance.first_name} {instance.last_name}")
     else:
-        if hasattr(instance, "profile"):
-            instance.profile.save()
+        changed_fields = instance.get_changed_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            changed_fields &= set(update_fields)
+
+        # Auth-state saves (OTP, failed logins, unlocks) leave the profile alone
+        if changed_fields.intersection(instance.PROFILE_FIELDS):
+            Profile.objects.filter(user=instance).update(updated_at=timezone.now())
+            invalidate_cached_profile(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_on_change(
+    sender: type[Model], instance: Profile, **kwargs: Any
+) -> None:
+    invalidate_cached_profile(instance.user_id)
+
+
+@receiver(post_save, sender=NextOfKin)
+@receiver(post_delete, sender=NextOfKin)
+def invalidate_profile_on_next_of_kin_change(
+    sender: type[Model], instance: NextOfKin, **kwargs: Any
+) -> None:
+    invalidate_cached_profile(instance.profile.user_id)
@@ -0,0 +1,28 @@
+import os
+import uuid
+from typing import Any
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+
+
+def stage_upload(uploaded_file: UploadedFile, profile_id: Any, field: str) -> str:
+    """Store an uploaded file in shared storage and return its storage name.
+
+    The storage writes the file chunk by chunk (or moves the temporary file
+    the upload handler already wrote), so memory use does not depend on the
+    file size. Workers receive only the returned name.
+    """
+    extension = os.path.splitext(uploaded_file.name or "")[1].lower()
+    name = os.path.join(
+        settings.UPLOAD_STAGING_DIR,
+        str(profile_id),
+        f"{field}-{uuid.uuid4().hex}{extension}",
+    )
+    return default_storage.save(name, uploaded_file)
+
+
+def discard_staged_upload(name: str) -> None:
+    if default_storage.exists(name):
+        default_storage.delete(name)
@@ -1,47 +1,114 @@
-import base64
+import hashlib
+from typing import Any, Dict, List
 from uuid import UUID
-import cloudinary.uploader
-from celery import shared_task
+from celery import chord, shared_task
 from django.apps import apps
+from django.core.cache import cache
 from django.core.files.storage import default_storage
 from loguru import logger
+from .images import make_profile_image, make_profile_thumbnail
+from .staging import discard_staged_upload
+from .uploaders import get_uploader
 
+PHOTO_UPLOAD_RESULT_TIMEOUT = 60 * 60 * 24
+
+# Fields that also get a small rendition for list pages.
+THUMBNAIL_FIELDS = ("photo",)
+
+
+def get_photo_upload_key(staged_name: str) -> str:
+    """Idempotency key of one staged image, shared by every retry of its upload."""
+    return f"photo_upload:{hashlib.sha256(staged_name.encode()).hexdigest()}"
+
+
+def get_photo_public_id(profile_id: str, field_name: str, staged_name: str) -> str:
+    digest = hashlib.sha256(staged_name.encode()).hexdigest()[:16]
+    return f"profiles/{profile_id}/{field_name}-{digest}"
+
+
+@shared_task(name="upload_photos_to_cloudinary")
+def upload_photos_to_cloudinary(profile_id: UUID, photos: Dict[str, str]) -> None:
+    """Upload staged photos, given as ``{field_name: staged storage name}``.
+
+    Each image is uploaded by its own subtask so they run concurrently and
+    retry independently; the chord callback saves all results at once. A
+    subtask that runs out of retries returns ``{"field": ..., "error": ...}``
+    instead of raising, so the callback still records the other images.
+    """
+    chord(
+        upload_profile_photo.s(str(profile_id), field_name, staged_name)
+        for field_name, staged_name in photos.items()
+    )(record_profile_photos.s(str(profile_id)))
+
+
+@shared_task(bind=True, name="upload_profile_photo", max_retries=3)
+def upload_profile_photo(
+    self, profile_id: str, field_name: str, staged_name: str
+) -> Dict[str, Any]:
+    key = get_photo_upload_key(staged_name)
+    result = cache.get(key)
+    if result is not None:
+        logger.info(f"{field_name} for profile {profile_id} already uploaded.")
+        return result
+
+    if not default_storage.exists(staged_name):
+        logger.warning(f"Staged file {staged_name} not found.")
+        return {"field": field_name, "error": "Staged file not found."}
 
-@shared_task(bind=True, name="upload_photos_to_cloudinary", max_retries=3)
-def upload_photos_to_cloudinary(self, profile_id: UUID, photos: dict) -> None:
     try:
-        profile_model = apps.get_model("user_profile", "Profile")
-        profile = profile_model.objects.get(id=profile_id)
-
-        for field_name, photo_data in photos.items():
-            if photo_data["type"] == "base64":
-                image_content = base64.b64decode(photo_data["data"])
-                response = cloudinary.uploader.upload(image_content)
-            else:
-                file_path = photo_data["data"]
-                if default_storage.exists(file_path):
-                    with default_storage.open(file_path, "rb") as image_file:
-                        response = cloudinary.uploader.upload(image_file)
-                    default_storage.delete(file_path)
-                else:
-                    logger.warning(f"File at path {file_path} not found.")
-                    continue  # Skip to the next photo
-
-            setattr(profile, field_name, response["public_id"])
-            setattr(profile, f"{field_name}_url", response["url"])
-
-        profile.save()
-        logger.info(f"Photos for {profile.user.email} uploaded successfully.")
+        with default_storage.open(staged_name, "rb") as image_file:
+            image = make_profile_image(image_file)
+            thumbnail = None
+            if field_name in THUMBNAIL_FIELDS:
+                image_file.seek(0)
+                thumbnail = make_profile_thumbnail(image_file)
 
+        # A deterministic public id keeps a retry after a lost response
+        # from creating a second image.
+        uploader = get_uploader()
+        public_id = get_photo_public_id(profile_id, field_name, staged_name)
+        uploaded = uploader.upload(image, public_id=public_id)
+        if thumbnail is not None:
+            uploaded["thumbnail_url"] = uploader.upload(
+                thumbnail, public_id=f"{public_id}-thumb"
+            )["url"]
     except Exception as e:
-        logger.error(f"Failed to upload photos for profile {profile_id}: {str(e)}")
+        logger.error(
+            f"Failed to upload {field_name} for profile {profile_id}: {str(e)}"
+        )
+        if self.request.retries >= self.max_retries:
+            # Raising would skip the chord callback and lose the other images
+            discard_staged_upload(staged_name)
+            return {"field": field_name, "error": str(e)}
+        raise self.retry(exc=e, countdown=60)
 
-        # Cleanup temp files if task fails
-        for photo_data in photos.values():
-            if photo_data["type"] == "file":
-                file_path = photo_data.get("path")
-                if file_path and default_storage.exists(file_path):
-                    default_storage.delete(file_path)
+    result = {"field": field_name, **uploaded}
+    cache.set(key, result, PHOTO_UPLOAD_RESULT_TIMEOUT)
+    discard_staged_upload(staged_name)
+    return result
 
-        # Retry the task up to 3 times
-        raise self.retry(exc=e, countdown=60)
+
+@shared_task(name="record_profile_photos")
+def record_profile_photos(results: List[Dict[str, Any]], profile_id: str) -> None:
+    profile_model = apps.get_model("user_profile", "Profile")
+    profile = profile_model.objects.select_related("user").get(id=profile_id)
+
+    update_fields = []
+    for result in results:
+        if "error" in result:
+            logger.error(
+                f"{result['field']} for profile {profile_id} was not uploaded: "
+                f"{result['error']}"
+            )
+            continue
+        field_name = result["field"]
+        setattr(profile, field_name, result["public_id"])
+        setattr(profile, f"{field_name}_url", result["url"])
+        update_fields.extend([field_name, f"{field_name}_url"])
+        if "thumbnail_url" in result:
+            setattr(profile, f"{field_name}_thumbnail_url", result["thumbnail_url"])
+            update_fields.append(f"{field_name}_thumbnail_url")
+
+    if update_fields:
+        profile.save(update_fields=update_fields + ["updated_at"])
+        logger.info(f"Photos for {profile.user.email} uploaded successfully.")
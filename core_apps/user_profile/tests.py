@@ -0,0 +1,554 @@
+import base64
+import json
+import os
+import resource
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Dict, List
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+from loguru import logger
+from PIL import Image
+from rest_framework.test import APIClient
+
+from core_apps.common.pagination import KeysetPagination
+from core_apps.common.redis_client import local_redis
+from core_apps.common.view_tracking import PENDING_VIEWS_KEY
+from core_apps.user_auth.tests import LOCAL_CACHES, create_user, median_duration
+from .images import make_profile_image, make_profile_thumbnail
+from .models import NextOfKin, Profile
+from .serializers import ProfileListSerializer, ProfileSerializer
+from .staging import discard_staged_upload, stage_upload
+from .tasks import (
+    get_photo_upload_key,
+    record_profile_photos,
+    upload_profile_photo,
+)
+from .uploaders import LocalUploader, get_uploader
+from .views import ProfileDetailAPIView, ProfileListAPIView
+
+User = get_user_model()
+
+PHOTO_FIELDS = ("photo", "id_photo", "signature_photo")
+
+
+def create_next_of_kin(profile: Profile, index: int = 1, **extra_fields: Any) -> Any:
+    return NextOfKin.objects.create(
+        profile=profile,
+        title=NextOfKin.Salutation.MR,
+        first_name="Kin",
+        last_name=f"Kin{index}",
+        gender=NextOfKin.Gender.MALE,
+        relationship="Brother",
+        email_address=f"kin{index}@example.com",
+        phone_number="+2348031234567",
+        city="Lagos",
+        country="NG",
+        **extra_fields,
+    )
+
+
+def make_image(
+    width: int = 64, height: int = 64, image_format: str = "JPEG", **save_options: Any
+) -> SimpleUploadedFile:
+    output = BytesIO()
+    Image.new("RGB", (width, height), "teal").save(output, image_format, **save_options)
+    extension = ".png" if image_format == "PNG" else ".jpg"
+    return SimpleUploadedFile(f"photo{extension}", output.getvalue())
+
+
+class TemporaryMediaRootMixin:
+    """Keeps staged and locally uploaded files in a throwaway ``MEDIA_ROOT``."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = self.settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+@override_settings(CACHES=LOCAL_CACHES, REDIS_USE_LOCAL_STANDIN=True)
+@mock.patch.object(ProfileDetailAPIView, "throttle_classes", [])
+class ProfileDetailTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        local_redis.flushdb()
+        self.user = create_user()
+        self.profile = self.user.profile
+        create_next_of_kin(self.profile, 1, is_primary=True)
+        create_next_of_kin(self.profile, 2)
+        ContentType.objects.get_for_model(Profile)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("profile_detail")
+
+    def get_profile(self) -> Any:
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["profile"]
+
+    def test_uncached_read_runs_a_fixed_number_of_queries(self) -> None:
+        # The profile joined to its user, the next of kin and the view count
+        with self.assertNumQueries(3):
+            profile = self.get_profile()
+
+        self.assertEqual(len(profile["next_of_kin"]), 2)
+        self.assertEqual(profile["view_count"], 0)
+
+    def test_cached_read_only_reads_the_view_count(self) -> None:
+        self.get_profile()
+
+        with self.assertNumQueries(1):
+            profile = self.get_profile()
+
+        self.assertEqual(profile["first_name"], "Test")
+        self.assertEqual(len(local_redis.hgetall(PENDING_VIEWS_KEY)), 1)
+
+    def test_profile_write_invalidates_the_cache(self) -> None:
+        self.get_profile()
+        self.profile.city = "Abuja"
+        self.profile.save()
+
+        self.assertEqual(self.get_profile()["city"], "Abuja")
+
+    def test_user_name_change_invalidates_the_cache(self) -> None:
+        self.get_profile()
+        self.user.first_name = "Renamed"
+        self.user.save()
+
+        self.assertEqual(self.get_profile()["first_name"], "Renamed")
+
+    def test_username_change_invalidates_the_cache(self) -> None:
+        self.get_profile()
+        self.user.username = "renamed"
+        self.user.save()
+
+        self.assertEqual(self.get_profile()["username"], "renamed")
+
+    def test_next_of_kin_write_invalidates_the_cache(self) -> None:
+        self.get_profile()
+        create_next_of_kin(self.profile, 3)
+
+        self.assertEqual(len(self.get_profile()["next_of_kin"]), 3)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+@mock.patch.object(ProfileListAPIView, "throttle_classes", [])
+class ProfileListPaginationTests(TestCase):
+    def setUp(self) -> None:
+        manager = create_user(100, role=User.RoleChoices.BRANCH_MANAGER)
+        create_user(101, is_staff=True)
+        customers = [create_user(index) for index in range(1, 26)]
+        self.usernames = {user.username for user in [manager, *customers]}
+
+        self.client = APIClient()
+        self.client.force_authenticate(manager)
+        self.url = reverse("all_profiles")
+
+    def get_page(self, url: str) -> Dict[str, Any]:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["profiles"]
+
+    def test_pages_list_every_non_staff_profile_once(self) -> None:
+        usernames: List[str] = []
+        url = f"{self.url}?page_size=10"
+        while url:
+            page = self.get_page(url)
+            usernames.extend(row["username"] for row in page["results"])
+            url = page["next"]
+
+        self.assertEqual(len(usernames), len(self.usernames))
+        self.assertEqual(set(usernames), self.usernames)
+
+    def test_previous_link_returns_the_previous_page(self) -> None:
+        first = self.get_page(f"{self.url}?page_size=10")
+        second = self.get_page(first["next"])
+
+        self.assertEqual(self.get_page(second["previous"]), first)
+
+    def test_deep_pages_run_the_same_single_query(self) -> None:
+        with self.assertNumQueries(1):
+            page = self.get_page(f"{self.url}?page_size=5")
+        for _ in range(3):
+            with self.assertNumQueries(1):
+                page = self.get_page(page["next"])
+
+        self.assertEqual(len(page["results"]), 5)
+
+    def test_count_is_estimated_only_on_request(self) -> None:
+        self.assertIsNone(self.get_page(self.url)["count"])
+        self.assertIsInstance(self.get_page(f"{self.url}?count=approx")["count"], int)
+
+    def test_invalid_cursor_is_rejected(self) -> None:
+        response = self.client.get(f"{self.url}?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_is_rejected(self) -> None:
+        positions = [
+            {"c": "2024-01-01T00:00:00+00:00", "i": "not-a-uuid", "r": False},
+            {"c": "yesterday", "i": str(uuid.uuid4()), "r": False},
+            {"c": 1, "i": 2, "r": False},
+        ]
+        for position in positions:
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+            response = self.client.get(self.url, {"cursor": cursor})
+            self.assertEqual(response.status_code, 404, position)
+
+    def test_search_matches_long_terms(self) -> None:
+        page = self.get_page(f"{self.url}?search=User13")
+
+        self.assertEqual([row["full_name"] for row in page["results"]], ["Test User13"])
+
+    def test_short_search_term_is_rejected(self) -> None:
+        response = self.client.get(f"{self.url}?search=Us")
+        self.assertEqual(response.status_code, 400)
+
+
+class ProfileAdminSearchTests(TestCase):
+    def setUp(self) -> None:
+        for index in range(1, 4):
+            create_user(index)
+        self.client.force_login(create_user(99, is_staff=True, is_superuser=True))
+        self.url = reverse("admin:user_profile_profile_changelist")
+
+    def search(self, term: str) -> List[Profile]:
+        response = self.client.get(self.url, {"q": term})
+        return list(response.context["cl"].result_list)
+
+    def test_search_matches_the_customer_name_and_email(self) -> None:
+        [by_name] = self.search("User2")
+        [by_email] = self.search("user3@example")
+
+        self.assertEqual(by_name.user.email, "user2@example.com")
+        self.assertEqual(by_email.user.email, "user3@example.com")
+
+    def test_every_term_must_match_the_customer(self) -> None:
+        self.assertEqual(len(self.search("Test User1")), 1)
+        self.assertEqual(self.search("User1 User2"), [])
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+@override_settings(CACHES=LOCAL_CACHES)
+@mock.patch.object(ProfileListAPIView, "throttle_classes", [])
+class ProfileListBenchmark(TestCase):
+    """First-page and deep-page latency of the keyset-paginated profile list."""
+
+    profiles = int(os.getenv("BENCHMARK_PROFILES", "100000"))
+    repeat = int(os.getenv("BENCHMARK_REPEAT", "20"))
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        users = User.objects.bulk_create(
+            (
+                User(
+                    username=f"bench{index}",
+                    email=f"bench{index}@example.com",
+                    first_name="Bench",
+                    last_name=f"User{index}",
+                    id_no=1000 + index,
+                    security_question=User.SecurityQuestion.BIRTH_CITY,
+                    security_answer="Lagos",
+                    password="!",
+                )
+                for index in range(cls.profiles)
+            ),
+            batch_size=5000,
+        )
+        Profile.objects.bulk_create(
+            (Profile(user=user) for user in users), batch_size=5000
+        )
+        cls.manager = create_user(role=User.RoleChoices.BRANCH_MANAGER)
+
+    def test_deep_page_latency_matches_the_first_page(self) -> None:
+        client = APIClient()
+        client.force_authenticate(self.manager)
+        url = reverse("all_profiles")
+        deep_row = Profile.objects.order_by("-created_at", "-pk")[self.profiles - 20]
+        cursor = KeysetPagination().encode_cursor(deep_row, reverse=False)
+
+        first = median_duration(lambda: client.get(url), self.repeat)
+        deep = median_duration(
+            lambda: client.get(url, {"cursor": cursor}), self.repeat
+        )
+        logger.info(
+            f"Profile list over {self.profiles} profiles: first page "
+            f"{first * 1000:.1f} ms, deep page {deep * 1000:.1f} ms"
+        )
+
+        self.assertLess(deep, first * 3)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class PhotoStagingTests(TemporaryMediaRootMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.profile = create_user().profile
+
+    def test_staged_upload_is_stored_under_the_profile(self) -> None:
+        name = stage_upload(make_image(), self.profile.id, "photo")
+
+        self.assertTrue(name.startswith(f"uploads/staging/{self.profile.id}/photo-"))
+        self.assertTrue(default_storage.exists(name))
+
+        discard_staged_upload(name)
+        self.assertFalse(default_storage.exists(name))
+
+    @mock.patch("core_apps.user_profile.serializers.upload_photos_to_cloudinary")
+    def test_task_receives_storage_names_only(self, upload_task: mock.Mock) -> None:
+        files = {field: make_image(1600, 1200) for field in PHOTO_FIELDS}
+        serializer = ProfileSerializer(self.profile, data=files, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+
+        profile_id, photos = upload_task.delay.call_args.args
+        self.assertEqual(profile_id, str(self.profile.id))
+        self.assertEqual(set(photos), set(files))
+        self.assertTrue(all(default_storage.exists(name) for name in photos.values()))
+        self.assertLess(len(json.dumps([profile_id, photos])), 1024)
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES,
+    PROFILE_PHOTO_UPLOADER="core_apps.user_profile.uploaders.LocalUploader",
+)
+class PhotoUploadTaskTests(TemporaryMediaRootMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        get_uploader.cache_clear()
+        self.addCleanup(get_uploader.cache_clear)
+        self.profile_id = str(create_user().profile.id)
+
+    def upload(self, field_name: str, staged_name: str) -> Dict[str, Any]:
+        return upload_profile_photo.apply(
+            args=(self.profile_id, field_name, staged_name)
+        ).get()
+
+    def test_upload_result_is_reused_by_a_retry(self) -> None:
+        staged_name = stage_upload(make_image(), self.profile_id, "photo")
+        result = self.upload("photo", staged_name)
+
+        self.assertEqual(result["field"], "photo")
+        self.assertIn("thumbnail_url", result)
+        self.assertFalse(default_storage.exists(staged_name))
+        self.assertEqual(cache.get(get_photo_upload_key(staged_name)), result)
+
+        with mock.patch.object(LocalUploader, "upload") as upload:
+            self.assertEqual(self.upload("photo", staged_name), result)
+        upload.assert_not_called()
+
+    @override_settings(LOCAL_UPLOADER_FAILURE_RATE=1)
+    def test_exhausted_upload_returns_a_failure_marker(self) -> None:
+        staged_name = stage_upload(make_image(), self.profile_id, "id_photo")
+
+        with mock.patch.object(
+            LocalUploader, "upload", autospec=True, side_effect=LocalUploader.upload
+        ) as upload:
+            result = self.upload("id_photo", staged_name)
+
+        self.assertEqual(
+            result, {"field": "id_photo", "error": "Simulated upload failure."}
+        )
+        self.assertEqual(upload.call_count, upload_profile_photo.max_retries + 1)
+        self.assertFalse(default_storage.exists(staged_name))
+
+    def test_callback_records_uploads_next_to_failures(self) -> None:
+        record_profile_photos(
+            [
+                {
+                    "field": "photo",
+                    "public_id": "profiles/photo",
+                    "url": "https://example.com/photo.webp",
+                    "thumbnail_url": "https://example.com/photo-thumb.webp",
+                },
+                {"field": "id_photo", "error": "Simulated upload failure."},
+            ],
+            self.profile_id,
+        )
+
+        profile = Profile.objects.get(id=self.profile_id)
+        self.assertEqual(profile.photo_url, "https://example.com/photo.webp")
+        self.assertEqual(
+            profile.photo_thumbnail_url, "https://example.com/photo-thumb.webp"
+        )
+        self.assertIsNone(profile.id_photo_url)
+
+
+EXIF_ORIENTATION = 0x0112
+EXIF_MAKE = 0x010F
+
+
+@override_settings(PROFILE_IMAGE_MAX_DIMENSION=400, PROFILE_THUMBNAIL_DIMENSION=80)
+class ProfileImageTests(TestCase):
+    def open(self, file: Any) -> Image.Image:
+        image = Image.open(BytesIO(file.read()))
+        self.addCleanup(image.close)
+        return image
+
+    def test_image_is_downscaled_and_stripped_of_exif(self) -> None:
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = 6
+        exif[EXIF_MAKE] = "Camera"
+        source = make_image(1200, 600, exif=exif.tobytes())
+
+        image = self.open(make_profile_image(source))
+
+        self.assertEqual(image.format, "WEBP")
+        # Orientation 6 is a quarter turn, applied to the pixels
+        self.assertEqual(image.size, (200, 400))
+        self.assertEqual(len(image.getexif()), 0)
+
+    def test_thumbnail_fits_the_list_size(self) -> None:
+        thumbnail = self.open(make_profile_thumbnail(make_image(1200, 600)))
+
+        self.assertEqual(thumbnail.size, (80, 40))
+
+    @override_settings(PROFILE_IMAGE_FORMAT="JPEG")
+    def test_transparent_image_is_flattened_for_jpeg(self) -> None:
+        output = BytesIO()
+        Image.new("RGBA", (50, 50), (0, 0, 0, 0)).save(output, "PNG")
+        source = SimpleUploadedFile("clear.png", output.getvalue())
+
+        image = self.open(make_profile_image(source))
+
+        self.assertEqual((image.format, image.mode), ("JPEG", "RGB"))
+        self.assertEqual(image.getpixel((0, 0)), (255, 255, 255))
+
+    def test_list_serializer_prefers_the_thumbnail(self) -> None:
+        profile = create_user().profile
+        profile.photo_thumbnail_url = "https://example.com/photo-thumb.webp"
+
+        data = ProfileListSerializer(profile).data
+
+        self.assertEqual(data["photo"], "https://example.com/photo-thumb.webp")
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+class ProfileImageBenchmark(TestCase):
+    """Size reduction and processing time for camera-sized sample images."""
+
+    sizes = ((4032, 3024), (3000, 4000), (1920, 1080))
+
+    def make_sample(self, width: int, height: int) -> SimpleUploadedFile:
+        # Noise keeps the encoder from compressing the sample unrealistically well
+        noise = Image.effect_noise((width, height), 64).convert("RGB")
+        output = BytesIO()
+        noise.save(output, "JPEG", quality=92)
+        return SimpleUploadedFile("sample.jpg", output.getvalue())
+
+    def test_processed_images_are_smaller(self) -> None:
+        for width, height in self.sizes:
+            sample = self.make_sample(width, height)
+            started = time.perf_counter()
+            image = make_profile_image(sample)
+            sample.seek(0)
+            thumbnail = make_profile_thumbnail(sample)
+            elapsed = time.perf_counter() - started
+
+            logger.info(
+                f"{width}x{height} sample of {sample.size / 1024:.0f} KB: "
+                f"image {image.size / 1024:.0f} KB "
+                f"({sample.size / image.size:.1f}x smaller), "
+                f"thumbnail {thumbnail.size / 1024:.1f} KB "
+                f"({sample.size / thumbnail.size:.0f}x smaller) in "
+                f"{elapsed * 1000:.0f} ms"
+            )
+            self.assertLess(image.size * 3, sample.size)
+            self.assertLess(thumbnail.size * 3, image.size)
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+class PhotoStagingBenchmark(TemporaryMediaRootMixin, TestCase):
+    """Peak RSS while staging concurrent three-photo uploads."""
+
+    uploads = int(os.getenv("BENCHMARK_CONCURRENT_UPLOADS", "10"))
+    photo_size = int(os.getenv("BENCHMARK_PHOTO_MB", "20")) * 1024 * 1024
+
+    def make_upload(self) -> TemporaryUploadedFile:
+        upload = TemporaryUploadedFile("photo.jpg", "image/jpeg", self.photo_size, None)
+        chunk = os.urandom(1024 * 1024)
+        for _ in range(self.photo_size // len(chunk)):
+            upload.write(chunk)
+        upload.seek(0)
+        return upload
+
+    def test_staging_memory_is_bounded(self) -> None:
+        profile_ids = [create_user(index).profile.id for index in range(self.uploads)]
+        uploads = [
+            [self.make_upload() for _ in PHOTO_FIELDS] for _ in range(self.uploads)
+        ]
+
+        def stage_profile_photos(index: int) -> None:
+            for field, upload in zip(PHOTO_FIELDS, uploads[index]):
+                stage_upload(upload, profile_ids[index], field)
+
+        # ru_maxrss is in kilobytes on Linux
+        peak_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        with ThreadPoolExecutor(max_workers=self.uploads) as executor:
+            list(executor.map(stage_profile_photos, range(self.uploads)))
+        growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - peak_before
+
+        total = self.uploads * 3 * self.photo_size
+        logger.info(
+            f"Staged {self.uploads} concurrent three-photo uploads "
+            f"({total / 2**20:.0f} MB): peak RSS grew {growth / 2**20:.1f} MB"
+        )
+        self.assertLess(growth, total / 10)
+
+
+@tag("benchmark")
+@skipUnless(os.getenv("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run benchmarks")
+@override_settings(
+    CACHES=LOCAL_CACHES,
+    PROFILE_PHOTO_UPLOADER="core_apps.user_profile.uploaders.LocalUploader",
+    LOCAL_UPLOADER_LATENCY=float(os.getenv("BENCHMARK_UPLOAD_LATENCY", "0.2")),
+)
+class PhotoUploadBenchmark(TemporaryMediaRootMixin, TestCase):
+    """Three-photo upload time with one subtask per image on parallel workers."""
+
+    profiles = int(os.getenv("BENCHMARK_UPLOAD_PROFILES", "10"))
+
+    def upload_profiles(self, profile_ids: List[str], workers: int) -> float:
+        cache.clear()
+        jobs = [
+            (profile_id, field, stage_upload(make_image(), profile_id, field))
+            for profile_id in profile_ids
+            for field in PHOTO_FIELDS
+        ]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda job: upload_profile_photo.apply(args=job), jobs))
+        return time.perf_counter() - started
+
+    def test_parallel_upload_throughput(self) -> None:
+        get_uploader.cache_clear()
+        self.addCleanup(get_uploader.cache_clear)
+        profile_ids = [
+            str(create_user(index).profile.id) for index in range(self.profiles)
+        ]
+
+        for workers in (1, len(PHOTO_FIELDS)):
+            elapsed = self.upload_profiles(profile_ids, workers)
+            logger.info(
+                f"Uploaded {self.profiles} three-photo profiles on {workers} "
+                f"workers: {self.profiles / elapsed:.1f} profiles/s"
+            )
@@ -0,0 +1,58 @@
+import os
+import random
+import time
+from functools import lru_cache
+from typing import Any, Dict
+
+import cloudinary.uploader
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.module_loading import import_string
+
+
+class BaseUploader:
+    """Uploads a profile image under a caller-chosen public id.
+
+    Uploading twice with the same public id must leave a single image, so a
+    retried upload never creates duplicates.
+    """
+
+    def upload(self, file: Any, public_id: str) -> Dict[str, str]:
+        """Return a dict with the ``public_id`` and ``url`` of the stored image."""
+        raise NotImplementedError
+
+
+class CloudinaryUploader(BaseUploader):
+    def upload(self, file: Any, public_id: str) -> Dict[str, str]:
+        response = cloudinary.uploader.upload(
+            file, public_id=public_id, overwrite=True, invalidate=True
+        )
+        return {"public_id": response["public_id"], "url": response["url"]}
+
+
+class LocalUploader(BaseUploader):
+    """Offline stand-in that stores images in ``default_storage``.
+
+    ``LOCAL_UPLOADER_LATENCY`` (seconds) and ``LOCAL_UPLOADER_FAILURE_RATE``
+    (0-1) simulate network latency and transient errors, which makes
+    throughput and retry behavior observable without a Cloudinary account.
+    """
+
+    location = "uploads/local-cloudinary"
+
+    def upload(self, file: Any, public_id: str) -> Dict[str, str]:
+        time.sleep(getattr(settings, "LOCAL_UPLOADER_LATENCY", 0))
+        if random.random() < getattr(settings, "LOCAL_UPLOADER_FAILURE_RATE", 0):
+            raise ConnectionError("Simulated upload failure.")
+
+        extension = os.path.splitext(getattr(file, "name", "") or "")[1]
+        name = os.path.join(self.location, f"{public_id}{extension}")
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        name = default_storage.save(name, file)
+        return {"public_id": public_id, "url": default_storage.url(name)}
+
+
+@lru_cache(maxsize=None)
+def get_uploader() -> BaseUploader:
+    return import_string(settings.PROFILE_PHOTO_UPLOADER)()
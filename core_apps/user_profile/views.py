@@ -1,24 +1,27 @@
 from typing import Any, List
 from loguru import logger
 
-from django.contrib.contenttypes.models import ContentType
 from django.http import Http404
-from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 
-from rest_framework import filters, generics, serializers, status
+from rest_framework import generics, serializers, status
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from core_apps.common.models import ContentView
+from core_apps.common.cookie_auth import StatelessCookieAuthentication
+from core_apps.common.models import ContentViewCount
+from core_apps.common.pagination import KeysetPagination
 from core_apps.common.permissions import IsBranchManager
 from core_apps.common.renderers import GenericJSONRenderer
+from core_apps.common.search import TrigramSearchFilter
+from core_apps.common.view_tracking import buffer_view
 from core_apps.accounts.utils import create_bank_account
 from core_apps.accounts.models import BankAccount
+from .cache import cache_profile, get_cached_profile
 from .models import NextOfKin, Profile
 from .serializers import NextOfKinSerializer, ProfileListSerializer, ProfileSerializer
 
@@ -32,16 +35,17 @@ class StandardResultsSetPagination(PageNumberPagination):
 class ProfileListAPIView(generics.ListAPIView):
     serializer_class = ProfileListSerializer
     renderer_classes = [GenericJSONRenderer]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetPagination
+    authentication_classes = [StatelessCookieAuthentication]
     permission_classes = [IsBranchManager]
     object_label = "profiles"
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter]
     search_fields = ["user__first_name", "user__last_name", "user__id_no"]
     filterset_fields = ["user__first_name", "user__last_name", "user__id_no"]
 
     def get_queryset(self) -> List[Profile]:
-        return Profile.objects.exclude(user__is_staff=True).exclude(
-            user__is_superuser=True
+        return Profile.objects.select_related("user").filter(
+            user__is_staff=False, user__is_superuser=False
         )
 
 
@@ -52,22 +56,15 @@ class ProfileDetailAPIView(generics.RetrieveUpdateAPIView):
     object_label = "profile"
 
     def get_object(self) -> Profile:
-        profile = get_object_or_404(Profile, user=self.request.user)
-        self.record_profile_view(profile)
+        queryset = Profile.objects.select_related("user").prefetch_related(
+            "next_of_kin"
+        )
+        profile = get_object_or_404(queryset, user=self.request.user)
+        self.record_profile_view(profile.id)
         return profile
 
-    def record_profile_view(self, profile: Profile) -> None:
-        content_type = ContentType.objects.get_for_model(profile)
-        viewer_ip = self.get_client_ip()
-        user = self.request.user
-
-        ContentView.objects.update_or_create(
-            content_type=content_type,
-            object_id=profile.id,
-            user=user,
-            viewer_ip=viewer_ip,
-            defaults={"last_viewed": timezone.now()},
-        )
+    def record_profile_view(self, profile_id: Any) -> None:
+        buffer_view(Profile, profile_id, self.request.user, self.get_client_ip())
 
     def get_client_ip(self) -> str:
         request = self.request
@@ -80,9 +77,19 @@ class ProfileDetailAPIView(generics.RetrieveUpdateAPIView):
         )
 
     def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        data = get_cached_profile(request.user.pk)
+
+        if data is None:
+            instance = self.get_object()
+            data = dict(self.get_serializer(instance).data)
+            # The view count changes independently of the profile, so it is not cached
+            view_count = data.pop("view_count")
+            cache_profile(request.user.pk, data)
+        else:
+            self.record_profile_view(data["id"])
+            view_count = ContentViewCount.get_count(Profile, data["id"])
+
+        return Response({**data, "view_count": view_count})
 
     def update(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         kwargs["partial"] = kwargs.get("partial", False)